@@ -6,7 +6,11 @@ takes already-fetched component data plus table metadata and produces aggregated
 estimates and margins of error, refusing to aggregate statistics that are not
 additive across geographies (medians, means, per-capita, index values).
 """
-from census_extractomatic.moe import aggregate_count
+from census_extractomatic.moe import aggregate_count, aggregate_counts, np
+
+# Value types the NumPy path aggregates exactly like aggregate_count; with any
+# other (e.g. Decimal), columns are aggregated one by one.
+_VECTOR_TYPES = frozenset((int, float, type(None)))
 
 # Keywords in a table or column title that mark a statistic as NOT additive
 # across geographies. "Aggregate" is deliberately excluded: aggregate totals
@@ -76,44 +80,30 @@ def aggregate_tables(components, metadata):
 
     Count columns are summed with the Census zero-estimate rule. Non-additive
     columns (medians, means, per-capita, index) are never summed; they are listed
-    in ``suppressed`` instead.
+    in ``suppressed`` instead. With NumPy installed, each table's columns are
+    aggregated together (aggregate_columns_vectorized), with the same results.
     """
     result = {}
     for table_id, table_meta in metadata.items():
         table_title = table_meta.get("title")
         columns = table_meta.get("columns", {})
 
-        estimates = {}
-        errors = {}
+        column_ids = []
         suppressed = []
-
         for column_id, column_meta in columns.items():
             column_title = (column_meta or {}).get("name")
             reason = suppression_reason(table_title, column_title)
             if reason is not None:
                 suppressed.append({"column_id": column_id, "reason": reason})
-                continue
+            else:
+                column_ids.append(column_id)
 
-            col_estimates = []
-            col_moes = []
-            col_weights = []
-            for component in components:
-                table_data = component["data"].get(table_id)
-                if not table_data:
-                    continue
-                est_value = table_data["estimate"][column_id]
-                moe_value = table_data["error"][column_id]
-                # A release may have no value for a column in a given geography;
-                # leave that component out of this column rather than crash.
-                if est_value is None or moe_value is None:
-                    continue
-                col_estimates.append(est_value)
-                col_moes.append(moe_value)
-                col_weights.append(component.get("weight", 1))
-
-            est, moe = aggregate_count(col_estimates, col_moes, weights=col_weights)
-            estimates[column_id] = est
-            errors[column_id] = moe
+        aggregated = None
+        if np is not None:
+            aggregated = aggregate_columns_vectorized(components, table_id, column_ids)
+        if aggregated is None:
+            aggregated = aggregate_columns(components, table_id, column_ids)
+        estimates, errors = aggregated
 
         result[table_id] = {
             "title": table_title,
@@ -122,3 +112,94 @@ def aggregate_tables(components, metadata):
             "suppressed": suppressed,
         }
     return result
+
+
+def aggregate_columns(components, table_id, column_ids):
+    """Aggregate the given columns of one table across the components, one
+    column at a time with aggregate_count. Returns (estimates, errors) dicts
+    keyed by column id."""
+    estimates = {}
+    errors = {}
+    for column_id in column_ids:
+        col_estimates = []
+        col_moes = []
+        col_weights = []
+        for component in components:
+            table_data = component["data"].get(table_id)
+            if not table_data:
+                continue
+            est_value = table_data["estimate"][column_id]
+            moe_value = table_data["error"][column_id]
+            # A release may have no value for a column in a given geography;
+            # leave that component out of this column rather than crash.
+            if est_value is None or moe_value is None:
+                continue
+            col_estimates.append(est_value)
+            col_moes.append(moe_value)
+            col_weights.append(component.get("weight", 1))
+
+        est, moe = aggregate_count(col_estimates, col_moes, weights=col_weights)
+        estimates[column_id] = est
+        errors[column_id] = moe
+    return estimates, errors
+
+
+def aggregate_columns_vectorized(components, table_id, column_ids):
+    """Like aggregate_columns, but with every column at once as NumPy
+    (components x columns) matrices, None values masked as NaN. Results are
+    identical to aggregate_columns, down to estimates staying ints when all
+    of a column's contributions are ints.
+
+    Returns None if there are values (e.g. Decimals) it can't aggregate the
+    same way.
+    """
+    estimate_rows = []
+    moe_rows = []
+    weights = []
+    for component in components:
+        table_data = component["data"].get(table_id)
+        if not table_data:
+            continue
+        estimate = table_data["estimate"]
+        error = table_data["error"]
+        estimate_rows.append([estimate[column_id] for column_id in column_ids])
+        moe_rows.append([error[column_id] for column_id in column_ids])
+        weights.append(component.get("weight", 1))
+
+    estimate_types = set()
+    moe_types = set()
+    for (estimate_row, moe_row) in zip(estimate_rows, moe_rows):
+        estimate_types.update(map(type, estimate_row))
+        moe_types.update(map(type, moe_row))
+    weight_types = set(map(type, weights))
+    if not (estimate_types | moe_types | weight_types) <= _VECTOR_TYPES or type(None) in weight_types:
+        return None
+
+    shape = (len(estimate_rows), len(column_ids))
+    estimate_values = np.array(estimate_rows, dtype=object).reshape(shape)
+    moe_values = np.array(moe_rows, dtype=object).reshape(shape)
+    # A release may have no value for a column in a given geography; leave
+    # that component out of this column.
+    present = ~(np.equal(estimate_values, None) | np.equal(moe_values, None))
+    estimate_matrix = np.where(present, estimate_values, np.nan).astype(float)
+    moe_matrix = np.where(present, moe_values, np.nan).astype(float)
+
+    totals, moes = aggregate_counts(estimate_matrix, moe_matrix, weights, present)
+
+    # aggregate_count's sum stays an int unless a contribution is a float
+    weight_is_float = np.array([type(w) is float for w in weights], dtype=bool)[:, np.newaxis]
+    if float not in estimate_types:
+        float_cells = np.broadcast_to(weight_is_float, shape)
+    elif estimate_types <= {float, type(None)}:
+        float_cells = np.ones(shape, dtype=bool)
+    else:
+        float_cells = np.frompyfunc(lambda value: type(value) is float, 1, 1)(estimate_values).astype(bool)
+        float_cells = float_cells | weight_is_float
+    column_is_float = (float_cells & present).any(axis=0)
+
+    estimates = {}
+    errors = {}
+    for (i, column_id) in enumerate(column_ids):
+        estimates[column_id] = float(totals[i]) if column_is_float[i] else int(totals[i])
+        errors[column_id] = float(moes[i])
+    return estimates, errors
@@ -2,6 +2,7 @@ from __future__ import division
 
 from flask import (
     Flask,
+    Response,
     abort,
     current_app,
     json,
@@ -10,19 +11,22 @@ from flask import (
     redirect,
     request,
     send_file,
+    stream_with_context,
 )
 from collections import OrderedDict
 from flask_caching import Cache
 from flask_cors import CORS, cross_origin
 from flask_sqlalchemy import SQLAlchemy
 from sqlalchemy import text
-from itertools import groupby
+from functools import partial
+from itertools import chain, groupby
 from werkzeug.exceptions import HTTPException
 import math
 import os
 import re
 import shutil
 import tempfile
+import threading
 import zipfile
 import hashlib
 import logging
@@ -54,9 +58,17 @@ from census_extractomatic.aggregate_acs import (
     select_components,
     aggregate_tables,
 )
-from census_extractomatic.full_text_search import perform_full_text_search
+from census_extractomatic.full_text_search import build_full_text_index, perform_full_text_search
 
 from census_extractomatic.exporters import supported_formats
+from census_extractomatic.tile_store import MBTilesReader, pyramid_path, tile_cache_key
+from census_extractomatic.tile_coverage import CoverageMask
+from census_extractomatic.single_flight import get_or_compute
+from census_extractomatic.geo_autocomplete import GeoAutocomplete
+from census_extractomatic.geo_names import GeoNames, NAME_COLUMNS
+from census_extractomatic.topology import DEFAULT_QUANTIZE, features_to_topology
+from census_extractomatic.table_search_index import TableSearchIndex, TabulationIndex
+from census_extractomatic.fts_index import FullTextIndex
 
 from timeit import default_timer as timer
 
@@ -211,6 +223,8 @@ expandable_geoid_re = re.compile(r"^((\d{3}\|))?([\dA-Z]{5}US[\d\-A-Z]*)$")
 geoid_re = re.compile(r"^[\dA-Z]{5}US[\d\-A-Z]*$")
 # A regex that matches things that look like table IDs
 table_re = re.compile(r"^[BC]\d{5,6}(?:[A-Z]{1,3})?$")
+# A regex that matches things that look like column IDs (e.g. B01001001, B01001A001)
+column_re = re.compile(r"^[BC]\d{5,6}(?:[A-Z]{1,3})?\d{3}$", re.IGNORECASE)
 
 
 @app.errorhandler(400)
@@ -321,7 +335,10 @@ def special_case_parents(geoid, levels):
     return levels
 
 
-def compute_profile_item_levels(geoid):
+def compute_profile_item_levels(geoid, containment=None):
+    '''Return the ordered parent levels of a geoid. ``containment`` maps child
+    geoids to their census_geo_containment rows, for computing many geoids at
+    once; by default the rows are queried.'''
     levels = []
     geoid_parts = []
 
@@ -342,14 +359,18 @@ def compute_profile_item_levels(geoid):
     id_part = geoid_parts[1]
 
     if sumlevel in ('140', '150', '160', '310', '330', '350', '860', '950', '960', '970'):
-        result = db.session.execute(text(
-            """SELECT * FROM tiger2024.census_geo_containment
-               WHERE child_geoid=:geoid
-               ORDER BY percent_covered ASC
-            """),
-            {'geoid': geoid},
-        )
-        for row in result.mappings().all():
+        if containment is None:
+            result = db.session.execute(text(
+                """SELECT * FROM tiger2024.census_geo_containment
+                   WHERE child_geoid=:geoid
+                   ORDER BY percent_covered ASC
+                """),
+                {'geoid': geoid},
+            )
+            containment_rows = result.mappings().all()
+        else:
+            containment_rows = containment.get(geoid, [])
+        for row in containment_rows:
             parent_sumlevel_name = SUMLEV_NAMES.get(row['parent_geoid'][:3])['name']
 
             levels.append({
@@ -391,6 +412,35 @@ def compute_profile_item_levels(geoid):
     return levels
 
 
+class RawJSON(object):
+    '''Text that is already JSON, like ST_AsGeoJSON output, to be written into
+    a response verbatim by dumps_with_raw_json.'''
+    __slots__ = ('text',)
+
+    def __init__(self, text):
+        self.text = text
+
+
+raw_json_placeholder_re = re.compile(r'"\\u0000(\d+)\\u0000"')
+
+
+def dumps_with_raw_json(obj, **kwargs):
+    '''json.dumps, except RawJSON values are spliced into the output as-is
+    rather than being parsed and serialized again.'''
+    raw_values = []
+
+    def default(o):
+        if isinstance(o, RawJSON):
+            raw_values.append(o.text)
+            return '\0%d\0' % (len(raw_values) - 1)
+        return current_app.json.default(o)
+
+    serialized = json.dumps(obj, default=default, **kwargs)
+    if not raw_values:
+        return serialized
+    return raw_json_placeholder_re.sub(lambda m: raw_values[int(m.group(1))], serialized)
+
+
 def get_acs_name(acs_slug):
     if acs_slug in ACS_NAMES:
         acs_name = ACS_NAMES[acs_slug]['name']
@@ -409,9 +459,105 @@ def convert_row(row):
     data['full_geoid'] = row['full_geoid']
     data['full_name'] = row['display_name']
     if 'geom' in row and row['geom']:
-        data['geom'] = json.loads(row['geom'])
+        data['geom'] = RawJSON(row['geom'])
     return data
 
+# The GeoJSON resolutions endpoints serve geometries at. tools/build_geometry_store.py
+# stores each one per geoid in <release>.census_geometry_store; without that
+# table they're simplified per request.
+GEOMETRY_RESOLUTIONS = OrderedDict([
+    # geo lookup of a single geography
+    ('detail', "ST_AsGeoJSON(ST_SimplifyPreserveTopology({geom}, 0.00005), 6)"),
+    # geo show, scaled to each geography's size
+    ('show', "ST_AsGeoJSON(ST_SimplifyPreserveTopology({geom},ST_Perimeter({geom}) / 2500))"),
+    # geo search and compare
+    ('overview', "ST_AsGeoJSON(ST_SimplifyPreserveTopology({geom},0.001), 5)"),
+])
+
+# TopoJSON is built from geometries snapped to a common grid rather than
+# simplified per feature, so neighbours keep identical borders; the borders
+# are simplified once they're extracted as arcs (see topology.py). The grid is
+# a quarter of the simplification tolerance.
+TOPOLOGY_GEOMETRY_SQL = "ST_AsGeoJSON(ST_RemoveRepeatedPoints(ST_SnapToGrid({geom}, {tolerance} / 4)), 6)"
+# as the overview resolution
+COMPARE_TOPOLOGY_TOLERANCE = 0.001
+
+# Seconds before a table found missing is looked for again, so a table built
+# while the API is running is picked up without a restart
+MISSING_TABLE_RECHECK = 300
+
+release_tables = {}
+
+
+def has_table(release, name):
+    '''Whether the release has a table built by one of the tools, e.g. the
+    census_geometry_store of pre-simplified GeoJSON. Found tables are
+    remembered for good; missing ones for MISSING_TABLE_RECHECK seconds.'''
+    key = (release, name)
+    checked = release_tables.get(key)
+    if checked is True:
+        return True
+    if checked is not None and timer() - checked < MISSING_TABLE_RECHECK:
+        return False
+    exists = db.session.execute(
+        text("SELECT to_regclass(:table) IS NOT NULL"),
+        {'table': '%s.%s' % (release, name)}
+    ).scalar()
+    release_tables[key] = True if exists else timer()
+    return bool(exists)
+
+
+def geometry_sql(release, resolution, table):
+    '''SQL expression for the GeoJSON of the census_name_lookup row ``table``
+    at one of GEOMETRY_RESOLUTIONS: read from the geometry store when the
+    release has one, otherwise simplified on the fly.'''
+    if has_table(release, 'census_geometry_store'):
+        return "(SELECT geojson_%s FROM %s.census_geometry_store gs WHERE gs.full_geoid = %s.full_geoid)" % (
+            resolution, release, table)
+    return GEOMETRY_RESOLUTIONS[resolution].format(geom='%s.geom' % table)
+
+
+geo_names = {}
+
+
+def get_geo_names(release):
+    '''Return the in-memory names and attributes of every geography in the
+    release's census_name_lookup, loaded once per process.'''
+    if release not in geo_names:
+        result = db.session.execute(text(
+            "SELECT DISTINCT %s FROM %s.census_name_lookup;" % (','.join(NAME_COLUMNS), release)))
+        geo_names[release] = GeoNames(release, result.mappings())
+    return geo_names[release]
+
+
+geo_search_indexes = {}
+geo_search_index_lock = threading.Lock()
+
+
+def get_geo_search_index(release):
+    '''Return the in-memory autocomplete index over the release's
+    census_name_lookup names, built once per process (see warm_indexes).
+    Concurrent first callers wait for a single build.'''
+    if release not in geo_search_indexes:
+        with geo_search_index_lock:
+            if release not in geo_search_indexes:
+                result = db.session.execute(text(
+                    """SELECT geoid,sumlevel,population,display_name,full_geoid,priority,prefix_match_name
+                       FROM %s.census_name_lookup
+                       WHERE prefix_match_name IS NOT NULL;""" % (release,)))
+                geo_search_indexes[release] = GeoAutocomplete(result.mappings())
+    return geo_search_indexes[release]
+
+
+# Summary levels that are unions of whole 2020 blocks and are only
+# redrawn with the decennial census, so the crosswalk's answer for a block is
+# the same as intersecting a point in it with each geography. Places, county
+# subdivisions, school districts, legislative districts and native areas are
+# updated every year, and can split 2020 blocks; they're always intersected.
+# The crosswalk has to be rebuilt when this changes.
+BLOCK_NESTED_SUMLEVELS = ('010', '020', '030', '040', '140', '150', '400', '795', '850', '860')
+
+
 # Example: /1.0/geo/search?q=spok
 # Example: /1.0/geo/search?q=spok&sumlevs=050,160
 @app.route("/1.0/geo/search")
@@ -420,7 +566,8 @@ def convert_row(row):
     'lon': {'valid': FloatRange(-180.0, 180.0)},
     'q': {'valid': NonemptyString()},
     'sumlevs': {'valid': StringList(item_validator=OneOf(SUMLEV_NAMES))},
-    'geom': {'valid': Bool()}
+    'geom': {'valid': Bool()},
+    'fuzzy': {'valid': Bool(), 'default': False},
 })
 @cross_origin(origins='*')
 def geo_search():
@@ -431,14 +578,45 @@ def geo_search():
     with_geom = request.qwargs.geom
 
     if lat and lon:
-        where = "ST_Intersects(geom, ST_SetSRID(ST_Point(:lon, :lat),4326))"
-        where_args = {'lon': lon, 'lat': lat}
+        if has_table('tiger2024', 'census_block_crosswalk'):
+            # find the one block under the point, then the block-nested
+            # geographies containing it; intersect the point with the rest
+            where = """(full_geoid IN (
+                SELECT unnest(full_geoids) FROM tiger2024.census_block_crosswalk
+                WHERE block_geoid = (
+                    SELECT geoid20 FROM blocks.tabblock20
+                    WHERE ST_Intersects(geom, ST_SetSRID(ST_Point(:lon, :lat),4326))
+                    LIMIT 1))
+                OR (sumlevel NOT IN :block_sumlevs
+                    AND ST_Intersects(geom, ST_SetSRID(ST_Point(:lon, :lat),4326))))"""
+            where_args = {'lon': lon, 'lat': lat, 'block_sumlevs': BLOCK_NESTED_SUMLEVELS}
+        else:
+            where = "ST_Intersects(geom, ST_SetSRID(ST_Point(:lon, :lat),4326))"
+            where_args = {'lon': lon, 'lat': lat}
     elif q:
+        # Text queries are answered from memory; only geometries, if asked
+        # for, come from the database.
         q = re.sub(r'[^a-zA-Z\,\.\-0-9]', ' ', q)
         q = re.sub(r'\s+', ' ', q)
-        where = "lower(prefix_match_name) LIKE lower(:q)"
-        q += '%'
-        where_args = {'q': q}
+        index = get_geo_search_index('tiger2024')
+        rows = index.search(q, sumlevs)
+        if not rows and request.qwargs.fuzzy:
+            # nothing starts with the query as typed; try it with misspelled
+            # words corrected, leaving an unfinished last word alone
+            corrected = index.fuzzy.correct(q, prefix_last=True)
+            if corrected:
+                rows = index.search(corrected, sumlevs)
+        if with_geom and rows:
+            result = db.session.execute(
+                text("""SELECT DISTINCT full_geoid,%s as geom
+                   FROM tiger2024.census_name_lookup
+                   WHERE full_geoid IN :geoids;""" % (geometry_sql('tiger2024', 'overview', 'census_name_lookup'),)),
+                {'geoids': tuple(row['full_geoid'] for row in rows)}
+            )
+            geoms = dict((row['full_geoid'], row['geom']) for row in result.mappings())
+            for row in rows:
+                row['geom'] = geoms.get(row['full_geoid'])
+        return geo_search_response(rows)
     else:
         abort(400, "Must provide either a lat/lon OR a query term.")
 
@@ -449,11 +627,11 @@ def geo_search():
         where_args['sumlevs'] = tuple(sumlevs)
 
     if with_geom:
-        sql = """SELECT DISTINCT geoid,sumlevel,population,display_name,full_geoid,priority,ST_AsGeoJSON(ST_SimplifyPreserveTopology(geom,0.001), 5) as geom
+        sql = """SELECT DISTINCT geoid,sumlevel,population,display_name,full_geoid,priority,%s as geom
             FROM tiger2024.census_name_lookup
             WHERE %s
             ORDER BY priority, population DESC NULLS LAST
-            LIMIT 25;""" % (where)
+            LIMIT 25;""" % (geometry_sql('tiger2024', 'overview', 'census_name_lookup'), where)
     else:
         sql = """SELECT DISTINCT geoid,sumlevel,population,display_name,full_geoid,priority
             FROM tiger2024.census_name_lookup
@@ -462,13 +640,126 @@ def geo_search():
             LIMIT 25;""" % (where)
     result = db.session.execute(text(sql), where_args)
 
-    resp = jsonify(results=[convert_row(row) for row in result.mappings().all()])
+    return geo_search_response(result.mappings().all())
+
+
+def geo_search_response(rows):
+    resp = make_response(dumps_with_raw_json(dict(results=[convert_row(row) for row in rows])))
+    resp.content_type = 'application/json'
     # Cache the result for 6 months
     resp.cache_control.max_age = 86400 * 180
     resp.cache_control.public = True
     return resp
 
 
+LOCATE_POINTS_SQL = """WITH points AS (
+    SELECT ord, ST_SetSRID(ST_Point(lon, lat),4326) AS geom
+    FROM unnest(CAST(:lons AS double precision[]), CAST(:lats AS double precision[]))
+         WITH ORDINALITY AS p(lon, lat, ord)
+)
+SELECT DISTINCT p.ord,n.geoid,n.sumlevel,n.population,n.display_name,n.full_geoid,n.priority
+FROM points p
+JOIN {release}.census_name_lookup n ON ST_Intersects(n.geom, p.geom)
+WHERE lower(n.display_name) NOT LIKE '%not defined%' {sumlevel_filter}
+ORDER BY p.ord, n.priority, n.population DESC NULLS LAST;"""
+
+LOCATE_POINTS_BY_BLOCK_SQL = """WITH points AS (
+    SELECT ord, ST_SetSRID(ST_Point(lon, lat),4326) AS geom
+    FROM unnest(CAST(:lons AS double precision[]), CAST(:lats AS double precision[]))
+         WITH ORDINALITY AS p(lon, lat, ord)
+), point_blocks AS (
+    SELECT p.ord, b.geoid20
+    FROM points p
+    CROSS JOIN LATERAL (
+        SELECT geoid20 FROM blocks.tabblock20
+        WHERE ST_Intersects(geom, p.geom)
+        LIMIT 1
+    ) b
+), located AS (
+    SELECT pb.ord, unnest(c.full_geoids) AS full_geoid
+    FROM point_blocks pb
+    JOIN {release}.census_block_crosswalk c ON c.block_geoid = pb.geoid20
+    UNION ALL
+    SELECT p.ord, n.full_geoid
+    FROM points p
+    JOIN {release}.census_name_lookup n
+      ON n.sumlevel NOT IN :block_sumlevs AND ST_Intersects(n.geom, p.geom)
+)
+SELECT DISTINCT l.ord,n.geoid,n.sumlevel,n.population,n.display_name,n.full_geoid,n.priority
+FROM located l
+JOIN {release}.census_name_lookup n ON n.full_geoid = l.full_geoid
+WHERE lower(n.display_name) NOT LIKE '%not defined%' {sumlevel_filter}
+ORDER BY l.ord, n.priority, n.population DESC NULLS LAST;"""
+
+
+# Example: POST /1.0/geo/tiger2024/locate
+#   body: {"points": [{"lat": 47.66, "lon": -117.43}, ...], "sumlevels": ["050", "140"]}
+@app.route("/1.0/geo/<release>/locate", methods=['POST', 'OPTIONS'])
+@cross_origin(origins='*')
+def geo_locate(release):
+    if release == 'latest':
+        release = allowed_tiger[0]
+    if release not in allowed_tiger:
+        abort(404, "Unknown TIGER release")
+
+    payload = request.get_json(force=True, silent=True) or {}
+
+    points = payload.get('points')
+    if not points or not isinstance(points, list):
+        abort(400, "A list of 'points', each with a 'lat' and 'lon', is required.")
+    max_points = current_app.config.get('MAX_POINTS_TO_LOCATE', 10000)
+    if len(points) > max_points:
+        abort(400, "You requested %s points. The maximum is %s. Please split the points "
+              "into several requests." % (len(points), max_points))
+
+    lats = []
+    lons = []
+    for point in points:
+        try:
+            lat = float(point['lat'])
+            lon = float(point['lon'])
+        except (KeyError, TypeError, ValueError):
+            abort(400, "Each point needs a numeric 'lat' and 'lon'.")
+        if not (-90.0 <= lat <= 90.0 and -180.0 <= lon <= 180.0):
+            abort(400, "Points must be within -90 to 90 latitude and -180 to 180 longitude.")
+        lats.append(lat)
+        lons.append(lon)
+
+    sumlevels = payload.get('sumlevels') or []
+    if not isinstance(sumlevels, list) or not all(s in SUMLEV_NAMES for s in sumlevels):
+        abort(400, "'sumlevels' must be a list of valid summary levels (e.g. 140 for tracts).")
+
+    params = {'lats': lats, 'lons': lons}
+    sumlevel_filter = ''
+    if sumlevels:
+        sumlevel_filter = 'AND n.sumlevel IN :sumlevs'
+        params['sumlevs'] = tuple(sumlevels)
+
+    # One set-based query for every point, through the block crosswalk
+    # (see tools/build_block_crosswalk.py) when the release has one
+    if has_table(release, 'census_block_crosswalk'):
+        sql = LOCATE_POINTS_BY_BLOCK_SQL
+        params['block_sumlevs'] = BLOCK_NESTED_SUMLEVELS
+    else:
+        sql = LOCATE_POINTS_SQL
+    result = db.session.execute(text(sql.format(release=release, sumlevel_filter=sumlevel_filter)), params)
+
+    geographies = [[] for _ in points]
+    for row in result.mappings():
+        point_geographies = geographies[row['ord'] - 1]
+        # the same limit geo_search applies to a single point
+        if len(point_geographies) < 25:
+            point_geographies.append(convert_row(row))
+
+    return jsonify(
+        release=release,
+        results=[
+            {'lat': lat, 'lon': lon, 'geographies': point_geographies}
+            for (lat, lon, point_geographies) in zip(lats, lons, geographies)
+        ],
+    )
+
+
 def num2deg(xtile, ytile, zoom):
     n = 2.0 ** zoom
     lon_deg = xtile / n * 360.0 - 180.0
@@ -479,7 +770,13 @@ def num2deg(xtile, ytile, zoom):
 
 # Example: /1.0/geo/tiger2014/tiles/160/10/261/373.geojson
 # Example: /1.0/geo/tiger2013/tiles/160/10/261/373.geojson
+# Example: /1.0/geo/tiger2024/tiles/140/10/261/373.mvt?acs=acs2024_5yr&column_ids=B01003001,B19013001&moe=true
 @app.route("/1.0/geo/<release>/tiles/<sumlevel>/<int:zoom>/<int:x>/<int:y>.<extension>")
+@qwarg_validate({
+    'acs': {'valid': OneOf(allowed_acs + ['latest']), 'default': 'latest'},
+    'column_ids': {'valid': StringList(item_validator=Regex(column_re))},
+    'moe': {'valid': Bool(), 'default': False},
+})
 @cross_origin(origins='*')
 def geo_tiles(release, sumlevel, zoom, x, y, extension):
     if release == 'latest':
@@ -492,26 +789,45 @@ def geo_tiles(release, sumlevel, zoom, x, y, extension):
         abort(400, "Don't support US tiles")
 
     if extension == 'geojson':
-        result_func = create_geojson_result
         content_type = 'application/json; charset=utf-8'
     elif extension == 'mvt':
-        result_func = create_mvt_result
         content_type = 'application/vnd.mapbox-vector-tile'
     else:
         abort(400, "Invalid format extension")
 
-    cache_key = str('1.0/geo/%s/tiles/%s/%s/%s/%s.%s' % (release, sumlevel, zoom, x, y, extension))
-    cached = cache.get(cache_key)
-    if cached:
-        resp = make_response(cached)
+    # data tiles carry ACS values as feature properties so a choropleth
+    # needs only one request per tile
+    column_ids = request.qwargs.column_ids
+    if column_ids:
+        if extension != 'mvt':
+            abort(400, "Data tiles are only available as .mvt")
+        column_ids = sorted(set(column_id.upper() for column_id in column_ids))
+        max_columns = current_app.config.get('MAX_DATA_TILE_COLUMNS', 20)
+        if len(column_ids) > max_columns:
+            abort(400, 'You requested %s columns. The maximum for a data tile is %s.' % (len(column_ids), max_columns))
+        acs = request.qwargs.acs
+        if acs == 'latest':
+            acs = release_to_expand_with
+        with_moe = request.qwargs.moe
+        data = (acs, column_ids, with_moe)
+        result_func = partial(create_data_mvt_result, acs=acs, column_ids=column_ids, with_moe=with_moe)
     else:
-        result = result_func(release, sumlevel, (zoom, x, y))
-
-        resp = make_response(result)
-        try:
-            cache.set(cache_key, result)
-        except Exception as e:
-            app.logger.warn('Skipping cache set for {} because {}'.format(cache_key, e.args))
+        data = None
+        result_func = create_geojson_result if extension == 'geojson' else create_mvt_result
+
+    cache_key = tile_cache_key(release, sumlevel, zoom, x, y, extension, data)
+    coverage = get_tile_coverage(release).get(sumlevel)
+    if coverage and not coverage.covers(zoom, x, y):
+        # no feature at this summary level comes near this tile
+        resp = make_response(EMPTY_TILES[extension])
+    else:
+        pyramid = get_tile_pyramid(release, sumlevel) if extension == 'mvt' and not column_ids else None
+        prerendered = pyramid.get(zoom, x, y) if pyramid else None
+        if prerendered is not None:
+            resp = make_response(prerendered)
+        else:
+            result = get_or_compute(cache, cache_key, lambda: result_func(release, sumlevel, (zoom, x, y)))
+            resp = make_response(result)
 
     # Cache the result for 6 months
     resp.cache_control.public = True
@@ -519,6 +835,48 @@ def geo_tiles(release, sumlevel, zoom, x, y, extension):
     resp.content_type = content_type
     return resp
 
+EMPTY_TILES = {
+    'mvt': b'',
+    'geojson': '{"type":"FeatureCollection","features":[]}',
+}
+
+tile_coverage_masks = {}
+
+
+def get_tile_coverage(release):
+    '''Return a dict of sumlevel -> CoverageMask for the release, loaded once per
+    process from census_tile_coverage (see tools/build_tile_coverage.py). Empty
+    if the masks haven't been built.'''
+    if release not in tile_coverage_masks:
+        if not has_table(release, 'census_tile_coverage'):
+            return {}
+        masks = {}
+        result = db.session.execute(text(
+            "SELECT sumlevel, zoom, mask FROM %s.census_tile_coverage" % (release,)))
+        for row in result.mappings().all():
+            masks[row['sumlevel']] = CoverageMask(row['zoom'], bytes(row['mask']))
+        tile_coverage_masks[release] = masks
+    return tile_coverage_masks[release]
+
+
+tile_pyramids = {}
+
+
+def get_tile_pyramid(release, sumlevel):
+    '''Return a reader for the pre-rendered MVT pyramid for this release and
+    sumlevel (see tools/build_tile_pyramid.py), or None if there isn't one.'''
+    pyramid_dir = current_app.config.get('TILE_PYRAMID_DIR')
+    if not pyramid_dir:
+        return None
+
+    path = pyramid_path(pyramid_dir, release, sumlevel)
+    if path not in tile_pyramids:
+        if not os.path.exists(path):
+            return None
+        tile_pyramids[path] = MBTilesReader(path)
+    return tile_pyramids[path]
+
+
 def compute_envelope(zoom, x, y):
     (miny, minx) = num2deg(x, y, zoom)
     (maxy, maxx) = num2deg(x + 1, y + 1, zoom)
@@ -538,18 +896,53 @@ def compute_envelope(zoom, x, y):
         'simplify_threshold': simplify_threshold,
     }
 
-def create_mvt_result(release, sumlevel, tile):
-    (zoom, x, y) = tile
+# Zoom bands of the pre-projected (EPSG:3857) geometry table built at release
+# load by tools/build_tile_geometry.py. Each column is simplified for the
+# highest zoom in its band; the last band is unsimplified.
+TILE_GEOMETRY_BANDS = (
+    (4, 'geom_z4'),
+    (8, 'geom_z8'),
+    (12, 'geom_z12'),
+    (None, 'geom_z13'),
+)
 
-    mvt_sql = f"""
-        WITH mvtgeom AS
-        (
-          SELECT ST_AsMVTGeom(ST_Transform(geom, 3857), ST_TileEnvelope(:zoom, :x, :y), extent => 4096, buffer => 64) AS geom, display_name, full_geoid
-          FROM {release}.census_name_lookup
-          WHERE geom && ST_Transform(ST_TileEnvelope(:zoom, :x, :y), 4326) AND sumlevel=:sumlev
-        )
-        SELECT ST_AsMVT(mvtgeom.*)
-        FROM mvtgeom;"""
+# Web Mercator meters per pixel of a 256px tile at zoom 0
+METERS_PER_PIXEL_Z0 = 40075016.68557849 / 256
+
+
+def tile_geometry_column(zoom):
+    for (max_zoom, column) in TILE_GEOMETRY_BANDS:
+        if max_zoom is None or zoom <= max_zoom:
+            return column
+
+
+def create_mvt_result(release, sumlevel, tile, data_sql=('', '')):
+    (zoom, x, y) = tile
+    (data_columns, data_joins) = data_sql
+
+    if has_table(release, 'census_tile_geometry'):
+        geom_column = tile_geometry_column(zoom)
+        mvt_sql = f"""
+            WITH mvtgeom AS
+            (
+              SELECT ST_AsMVTGeom({geom_column}, ST_TileEnvelope(:zoom, :x, :y), extent => 4096, buffer => 64) AS geom, display_name, full_geoid{data_columns}
+              FROM {release}.census_tile_geometry
+              {data_joins}
+              WHERE {geom_column} && ST_TileEnvelope(:zoom, :x, :y) AND sumlevel=:sumlev
+            )
+            SELECT ST_AsMVT(mvtgeom.*)
+            FROM mvtgeom;"""
+    else:
+        mvt_sql = f"""
+            WITH mvtgeom AS
+            (
+              SELECT ST_AsMVTGeom(ST_Transform(geom, 3857), ST_TileEnvelope(:zoom, :x, :y), extent => 4096, buffer => 64) AS geom, display_name, full_geoid{data_columns}
+              FROM {release}.census_name_lookup
+              {data_joins}
+              WHERE geom && ST_Transform(ST_TileEnvelope(:zoom, :x, :y), 4326) AND sumlevel=:sumlev
+            )
+            SELECT ST_AsMVT(mvtgeom.*)
+            FROM mvtgeom;"""
 
     params = {
             'sumlev': sumlevel,
@@ -564,21 +957,82 @@ def create_mvt_result(release, sumlevel, tile):
     return row[0].tobytes()
 
 
-def create_geojson_result(release, sumlevel, tile):
-    env = compute_envelope(*tile)
-
+def create_data_mvt_result(release, sumlevel, tile, acs, column_ids, with_moe):
+    '''Render an MVT tile whose features carry the given ACS columns (and,
+    optionally, their margins of error) as properties.'''
+    db.session.execute(text("SET search_path=:acs, public;"), {'acs': acs})
     result = db.session.execute(text(
-            """SELECT
-                ST_AsGeoJSON(ST_SimplifyPreserveTopology(
-                    ST_Intersection(ST_Buffer(ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326), %f, 'join=mitre'), geom),
-                    %f), 5) as geom,
-                full_geoid,
-                display_name
-               FROM %s.census_name_lookup
-               WHERE sumlevel=:sumlev AND ST_Intersects(ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326), geom)""" % (
-                env['tile_buffer'], env['simplify_threshold'], release,)),
-            {'minx': env['minx'], 'miny': env['miny'], 'maxx': env['maxx'], 'maxy': env['maxy'], 'sumlev': sumlevel}
-        )
+        """SELECT column_id
+           FROM census_column_metadata
+           WHERE column_id IN :column_ids"""),
+        {'column_ids': tuple(column_ids)}
+    )
+    invalid_column_ids = set(column_ids) - set(row['column_id'] for row in result.mappings().all())
+    if invalid_column_ids:
+        abort(404, "The %s release doesn't include column(s) %s." % (get_acs_name(acs), ','.join(sorted(invalid_column_ids))))
+
+    return create_mvt_result(release, sumlevel, tile, data_tile_sql(acs, column_ids, with_moe))
+
+
+def data_tile_sql(acs, column_ids, with_moe):
+    '''Build the extra select list and joins that add ACS columns to a tile query.
+    Column ids must already be validated.'''
+    tables = OrderedDict()
+    for column_id in column_ids:
+        tables.setdefault(column_id[:-3], []).append(column_id)
+
+    data_columns = ''
+    data_joins = ''
+    for (i, (table_id, table_column_ids)) in enumerate(tables.items()):
+        alias = 'd%d' % i
+        data_joins += ' LEFT JOIN %s.%s_moe %s ON %s.geoid = full_geoid' % (acs, table_id.lower(), alias, alias)
+        for column_id in table_column_ids:
+            data_columns += ', %s.%s AS "%s"' % (alias, column_id.lower(), column_id)
+            if with_moe:
+                data_columns += ', %s.%s_moe AS "%s_moe"' % (alias, column_id.lower(), column_id)
+
+    return (data_columns, data_joins)
+
+
+def create_geojson_result(release, sumlevel, tile):
+    if has_table(release, 'census_tile_geometry'):
+        (zoom, x, y) = tile
+        geom_column = tile_geometry_column(zoom)
+        result = db.session.execute(text(
+                f"""SELECT
+                    ST_AsGeoJSON(ST_Transform(clipped, 4326), 5) as geom,
+                    full_geoid,
+                    display_name
+                   FROM (
+                    SELECT ST_ClipByBox2D({geom_column}, ST_Expand(ST_TileEnvelope(:zoom, :x, :y), :tile_buffer)) AS clipped,
+                           full_geoid,
+                           display_name
+                    FROM {release}.census_tile_geometry
+                    WHERE sumlevel=:sumlev AND {geom_column} && ST_TileEnvelope(:zoom, :x, :y)
+                   ) tile
+                   WHERE NOT ST_IsEmpty(clipped)"""),
+                {
+                    'zoom': zoom,
+                    'x': x,
+                    'y': y,
+                    'tile_buffer': 10 * METERS_PER_PIXEL_Z0 / 2 ** zoom,  # ~ 10 pixel buffer
+                    'sumlev': sumlevel,
+                }
+            )
+    else:
+        env = compute_envelope(*tile)
+        result = db.session.execute(text(
+                """SELECT
+                    ST_AsGeoJSON(ST_SimplifyPreserveTopology(
+                        ST_Intersection(ST_Buffer(ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326), %f, 'join=mitre'), geom),
+                        %f), 5) as geom,
+                    full_geoid,
+                    display_name
+                   FROM %s.census_name_lookup
+                   WHERE sumlevel=:sumlev AND ST_Intersects(ST_MakeEnvelope(:minx, :miny, :maxx, :maxy, 4326), geom)""" % (
+                    env['tile_buffer'], env['simplify_threshold'], release,)),
+                {'minx': env['minx'], 'miny': env['miny'], 'maxx': env['maxx'], 'maxy': env['maxy'], 'sumlev': sumlevel}
+            )
 
     results = []
     for row in result.mappings().all():
@@ -588,10 +1042,10 @@ def create_geojson_result(release, sumlevel, tile):
                     "geoid": row['full_geoid'],
                     "name": row['display_name']
                 },
-                "geometry": json.loads(row['geom']) if row['geom'] else None
+                "geometry": RawJSON(row['geom']) if row['geom'] else None
             })
 
-    result = json.dumps(dict(type="FeatureCollection", features=results), separators=(',', ':'))
+    result = dumps_with_raw_json(dict(type="FeatureCollection", features=results), separators=(',', ':'))
     return result
 
 
@@ -612,42 +1066,8 @@ def geo_lookup(release, geoid):
         abort(404, 'Invalid GeoID')
 
     cache_key = str('1.0/geo/%s/show/%s.json?geom=%s' % (release, geoid, request.qwargs.geom))
-    cached = cache.get(cache_key)
-    if cached:
-        resp = make_response(cached)
-    else:
-        if request.qwargs.geom:
-            result = db.session.execute(text(
-                """SELECT display_name,simple_name,sumlevel,full_geoid,population,aland,awater,
-                   ST_AsGeoJSON(ST_SimplifyPreserveTopology(geom, 0.00005), 6) as geom
-                   FROM %s.census_name_lookup
-                   WHERE full_geoid=:geoid
-                   LIMIT 1""" % (release,)),
-                {'geoid': geoid}
-            )
-        else:
-            result = db.session.execute(text(
-                """SELECT display_name,simple_name,sumlevel,full_geoid,population,aland,awater
-                   FROM %s.census_name_lookup
-                   WHERE full_geoid=:geoid
-                   LIMIT 1""" % (release,)),
-                {'geoid': geoid}
-            )
-
-        result = result.mappings().fetchone()
-
-        if not result:
-            abort(404, 'Unknown GeoID')
-
-        result = dict(result)
-        geom = result.pop('geom', None)
-        if geom:
-            geom = json.loads(geom)
-
-        result = json.dumps(dict(type="Feature", properties=result, geometry=geom), separators=(',', ':'))
-
-        resp = make_response(result)
-        cache.set(cache_key, result)
+    result = get_or_compute(cache, cache_key, lambda: build_geo_lookup(release, geoid, request.qwargs.geom))
+    resp = make_response(result)
 
     # Cache the result for 6 months
     resp.cache_control.max_age = 86400 * 180
@@ -657,6 +1077,39 @@ def geo_lookup(release, geoid):
     return resp
 
 
+def build_geo_lookup(release, geoid, with_geom):
+    if with_geom:
+        result = db.session.execute(text(
+            """SELECT display_name,simple_name,sumlevel,full_geoid,population,aland,awater,
+               %s as geom
+               FROM %s.census_name_lookup
+               WHERE full_geoid=:geoid
+               LIMIT 1""" % (geometry_sql(release, 'detail', 'census_name_lookup'), release)),
+            {'geoid': geoid}
+        )
+    else:
+        result = db.session.execute(text(
+            """SELECT display_name,simple_name,sumlevel,full_geoid,population,aland,awater
+               FROM %s.census_name_lookup
+               WHERE full_geoid=:geoid
+               LIMIT 1""" % (release,)),
+            {'geoid': geoid}
+        )
+
+    result = result.mappings().fetchone()
+
+    if not result:
+        abort(404, 'Unknown GeoID')
+
+    result = dict(result)
+    geom = result.pop('geom', None)
+    if geom:
+        geom = RawJSON(geom)
+
+    result = dumps_with_raw_json(dict(type="Feature", properties=result, geometry=geom), separators=(',', ':'))
+    return result
+
+
 # Example: /1.0/geo/tiger2014/04000US53/parents
 # Example: /1.0/geo/tiger2013/04000US53/parents
 @app.route("/1.0/geo/<release>/<geoid>/parents")
@@ -671,47 +1124,90 @@ def geo_parent(release, geoid):
         abort(404, 'Invalid GeoID')
 
     cache_key = str('%s/show/%s.parents.json' % (release, geoid))
-    cached = cache.get(cache_key)
+    result = get_or_compute(cache, cache_key, lambda: build_geo_parents(release, geoid))
+    resp = make_response(result)
 
-    if cached:
-        resp = make_response(cached)
-    else:
-        try:
-            parents = compute_profile_item_levels(geoid)
-        except Exception as e:
-            abort(400, "Could not compute parents: " + e.args[0])
-        parent_geoids = [p['geoid'] for p in parents]
-
-        def build_item(p):
-            return (p['full_geoid'], {
-                "display_name": p['display_name'],
-                "sumlevel": p['sumlevel'],
-                "geoid": p['full_geoid'],
-            })
+    # Cache the result for 6 months
+    resp.cache_control.max_age = 86400 * 180
+    resp.cache_control.public = True
+    resp.content_type = 'application/json; charset=utf-8'
 
-        if parent_geoids:
-            result = db.session.execute(text(
-                """SELECT display_name,sumlevel,full_geoid
-                   FROM %s.census_name_lookup
-                   WHERE full_geoid IN :geoids
-                   ORDER BY sumlevel DESC""" % (release,)),
-                {'geoids': tuple(parent_geoids)}
-            )
-            parent_list = dict([build_item(p) for p in result.mappings().all()])
+    return resp
 
-            for parent in parents:
-                parent.update(parent_list.get(parent['geoid'], {}))
 
-        result = json.dumps(dict(parents=parents))
+def parent_name_item(row):
+    return (row['full_geoid'], {
+        "display_name": row['display_name'],
+        "sumlevel": row['sumlevel'],
+        "geoid": row['full_geoid'],
+    })
+
+
+def build_geo_parents(release, geoid):
+    if has_table(release, 'census_geo_parents'):
+        parents = db.session.execute(
+            text("SELECT parents FROM %s.census_geo_parents WHERE geoid=:geoid" % (release,)),
+            {'geoid': geoid.upper()}
+        ).scalar()
+        if parents is not None:
+            return dumps_with_raw_json(dict(parents=RawJSON(parents)))
+
+    try:
+        parents = compute_profile_item_levels(geoid)
+    except Exception as e:
+        abort(400, "Could not compute parents: " + e.args[0])
+    parent_geoids = [p['geoid'] for p in parents]
 
-        resp = make_response(result)
-        cache.set(cache_key, result)
+    if parent_geoids:
+        result = db.session.execute(text(
+            """SELECT display_name,sumlevel,full_geoid
+               FROM %s.census_name_lookup
+               WHERE full_geoid IN :geoids
+               ORDER BY sumlevel DESC""" % (release,)),
+            {'geoids': tuple(parent_geoids)}
+        )
+        parent_list = dict([parent_name_item(p) for p in result.mappings().all()])
+
+        for parent in parents:
+            parent.update(parent_list.get(parent['geoid'], {}))
+
+    result = json.dumps(dict(parents=parents))
+    return result
 
+
+# Example: /1.0/geo/tiger2024/names?geo_ids=04000US55,050|04000US56
+@app.route("/1.0/geo/<release>/names")
+@qwarg_validate({
+    'geo_ids': {'valid': StringList(item_validator=Regex(expandable_geoid_re)), 'required': True},
+})
+@cross_origin(origins='*')
+def geo_names_lookup(release):
+    if release == 'latest':
+        release = allowed_tiger[0]
+    if release not in allowed_tiger:
+        abort(404, "Unknown TIGER release")
+    geo_ids, child_parent_map = expand_geoids(request.qwargs.geo_ids, release_to_expand_with)
+
+    max_geoids = current_app.config.get('MAX_GEOIDS_TO_SHOW', 3000)
+    if len(geo_ids) > max_geoids:
+        abort(400, 'You requested %s geoids. The maximum is %s. Please contact us for bulk data.' % (len(geo_ids), max_geoids))
+
+    geographies = OrderedDict()
+    for (geoid, geo) in get_geo_names(release).lookup(geo_ids).items():
+        geographies[geoid] = OrderedDict([
+            ('name', geo.display_name),
+            ('sumlevel', geo.sumlevel),
+            ('population', geo.population),
+            ('aland', geo.aland),
+            ('awater', geo.awater),
+        ])
+    if not geographies:
+        abort(404, 'None of the geo_ids specified were valid: %s' % ', '.join(request.qwargs.geo_ids))
+
+    resp = jsonify(geographies=geographies)
     # Cache the result for 6 months
     resp.cache_control.max_age = 86400 * 180
     resp.cache_control.public = True
-    resp.content_type = 'application/json; charset=utf-8'
-
     return resp
 
 
@@ -720,6 +1216,8 @@ def geo_parent(release, geoid):
 @app.route("/1.0/geo/show/<release>")
 @qwarg_validate({
     'geo_ids': {'valid': StringList(item_validator=Regex(expandable_geoid_re)), 'required': True},
+    'format': {'valid': OneOf(['geojson', 'topojson']), 'default': 'geojson'},
+    'quantize': {'valid': IntegerRange(2, 10 ** 9), 'default': DEFAULT_QUANTIZE},
 })
 @cross_origin(origins='*')
 def show_specified_geo_data(release):
@@ -739,6 +1237,15 @@ def show_specified_geo_data(release):
     if len(geo_ids) > max_geoids:
         abort(400, 'You requested %s geoids. The maximum is %s. Please contact us for bulk data.' % (len(geo_ids), max_geoids))
 
+    if request.qwargs.format == 'topojson':
+        # one tolerance for every feature, scaled like the show resolution
+        # to the features' average size
+        tolerance = 'avg(ST_Perimeter(geom)) OVER () / 2500'
+        geom_column = TOPOLOGY_GEOMETRY_SQL.format(geom='geom', tolerance=tolerance)
+        geom_column += ' as geom, %s as simplify_tolerance' % tolerance
+    else:
+        geom_column = geometry_sql(release, 'show', 'census_name_lookup') + ' as geom'
+
     result = []
     if geo_ids:
         result = db.session.execute(text(
@@ -747,9 +1254,9 @@ def show_specified_geo_data(release):
                 aland,
                 awater,
                 population,
-                ST_AsGeoJSON(ST_SimplifyPreserveTopology(geom,ST_Perimeter(geom) / 2500)) as geom
+                %s
             FROM %s.census_name_lookup
-            WHERE geom is not null and full_geoid IN :geoids;""" % (release,)),
+            WHERE geom is not null and full_geoid IN :geoids;""" % (geom_column, release)),
             {'geoids': tuple(geo_ids)}
         ).mappings().all()
 
@@ -766,19 +1273,27 @@ def show_specified_geo_data(release):
                 "awater": row['awater'],
                 "2013_population_estimate": row['population'],
             },
-            "geometry": json.loads(row['geom'])
+            "geometry": RawJSON(row['geom'])
         })
 
     invalid_geo_ids = set(geo_ids) - set(valid_geo_ids)
     if invalid_geo_ids:
         abort(404, "GeoID(s) %s are not valid." % (','.join(invalid_geo_ids)))
 
-    resp_data = {
-        'type': 'FeatureCollection',
-        'features': results
-    }
-
-    resp = jsonify(**resp_data)
+    if request.qwargs.format == 'topojson':
+        for feature in results:
+            feature['id'] = feature['properties']['geoid']
+            feature['geometry'] = json.loads(feature['geometry'].text)
+        simplify = result[0]['simplify_tolerance'] if result else None
+        topology = features_to_topology(results, request.qwargs.quantize, simplify=simplify)
+        resp = make_response(json.dumps(topology, separators=(',', ':')))
+    else:
+        resp_data = {
+            'type': 'FeatureCollection',
+            'features': results
+        }
+        resp = make_response(dumps_with_raw_json(resp_data))
+    resp.content_type = 'application/json'
     # Cache the result for 6 months
     resp.cache_control.max_age = 86400 * 180
     resp.cache_control.public = True
@@ -816,6 +1331,49 @@ def format_table_search_result(obj, obj_type):
     return result
 
 
+table_search_indexes = {}
+
+
+def get_table_search_index(acs):
+    '''Return the in-memory table search index for an ACS release, built once
+    per process from its metadata tables.'''
+    if acs not in table_search_indexes:
+        db.session.execute(text("SET search_path=:acs, public;"), {'acs': acs})
+        tabulations = db.session.execute(text(
+            """SELECT tab.tabulation_code,
+                      tab.table_title,
+                      tab.simple_table_title,
+                      tab.universe,
+                      tab.topics,
+                      tab.weight,
+                      tab.tables_in_one_yr,
+                      tab.tables_in_three_yr,
+                      tab.tables_in_five_yr
+               FROM census_tabulation_metadata tab"""
+        )).mappings().all()
+        tables = db.session.execute(text(
+            """SELECT tab.table_id,
+                      tab.table_title,
+                      tab.simple_table_title,
+                      tab.universe,
+                      tab.topics
+               FROM census_table_metadata tab"""
+        )).mappings().all()
+        columns = db.session.execute(text(
+            """SELECT col.column_id,
+                      col.column_title,
+                      tab.table_id,
+                      tab.table_title,
+                      tab.simple_table_title,
+                      tab.universe,
+                      tab.topics
+               FROM census_column_metadata col
+               LEFT OUTER JOIN census_table_metadata tab USING (table_id)"""
+        )).mappings().all()
+        table_search_indexes[acs] = TableSearchIndex(tabulations, tables, columns)
+    return table_search_indexes[acs]
+
+
 # Example: /1.0/table/search?q=norweg
 # Example: /1.0/table/search?q=norweg&topics=age,sex
 # Example: /1.0/table/search?topics=housing,poverty
@@ -823,7 +1381,8 @@ def format_table_search_result(obj, obj_type):
 @qwarg_validate({
     'acs': {'valid': OneOf(allowed_acs), 'default': default_table_search_release},
     'q': {'valid': NonemptyString()},
-    'topics': {'valid': StringList()}
+    'topics': {'valid': StringList()},
+    'fuzzy': {'valid': Bool(), 'default': False},
 })
 @cross_origin(origins='*')
 def table_search():
@@ -837,107 +1396,38 @@ def table_search():
 
     data = []
 
-    if re.match(r'^\w\d{2,}$', q, flags=re.IGNORECASE):
-        # we need to search 'em all because not every table is in every release...
-        # might be better to have a shared table like census_tabulation_metadata?
-        table_id_acs = acs
-        acs_to_search = allowed_acs[:]
-        acs_to_search.remove(table_id_acs)
+    if q and re.match(r'^\w\d{2,}$', q, flags=re.IGNORECASE):
+        # we need to search 'em all because not every table is in every release
         ids_found = set()
-        while table_id_acs:
+        for table_id_acs in [acs] + [a for a in allowed_acs if a != acs]:
             # Matching for table id
-            db.session.execute(text("SET search_path=:acs, public;"), {'acs': table_id_acs})
-            result = db.session.execute(text(
-                """SELECT tab.table_id,
-                          tab.table_title,
-                          tab.simple_table_title,
-                          tab.universe,
-                          tab.topics
-                   FROM census_table_metadata tab
-                   WHERE lower(table_id) like lower(:table_id)"""),
-                {'table_id': '{}%'.format(q)}
-            )
-            for row in result.mappings().all():
+            for row in get_table_search_index(table_id_acs).tables_by_id_prefix(q):
                 if row['table_id'] not in ids_found:
                     data.append(format_table_search_result(row, 'table'))
                     ids_found.add(row['table_id'])
-            try:
-                table_id_acs = acs_to_search.pop(0)
-            except IndexError:
-                table_id_acs = None
         if data:
             data.sort(key=lambda x: x['unique_key'])
             return json.dumps(data)
 
-    db.session.execute(text("SET search_path=:acs, public;"), {'acs': acs})
-    table_where_parts = []
-    table_where_args = {}
-    column_where_parts = []
-    column_where_args = {}
-
-    if q and q != '*':
-        q = '%%%s%%' % q
-        table_where_parts.append("lower(tab.table_title) LIKE lower(:query)")
-        table_where_args['query'] = q
-        column_where_parts.append("lower(col.column_title) LIKE lower(:query)")
-        column_where_args['query'] = q
-
-    if topics:
-        table_where_parts.append('tab.topics @> :topics')
-        table_where_args['topics'] = topics
-        column_where_parts.append('tab.topics @> :topics')
-        column_where_args['topics'] = topics
-
-    if table_where_parts:
-        table_where = ' AND '.join(table_where_parts)
-        column_where = ' AND '.join(column_where_parts)
-    else:
-        table_where = 'TRUE'
-        column_where = 'TRUE'
+    index = get_table_search_index(acs)
+    query = q if q and q != '*' else None
 
-    # retrieve matching tables.
-    result = db.session.execute(text(
-        """SELECT tab.tabulation_code,
-                  tab.table_title,
-                  tab.simple_table_title,
-                  tab.universe,
-                  tab.topics,
-                  tab.tables_in_one_yr,
-                  tab.tables_in_three_yr,
-                  tab.tables_in_five_yr
-           FROM census_tabulation_metadata tab
-           WHERE %s
-           ORDER BY tab.weight DESC""" % (table_where)),
-        table_where_args
-    )
-    for tabulation in result.mappings().all():
-        tabulation = dict(tabulation)
-        for tables_for_release_col in ('tables_in_one_yr', 'tables_in_three_yr', 'tables_in_five_yr'):
-            if tabulation[tables_for_release_col]:
-                tabulation['table_id'] = tabulation[tables_for_release_col][0]
-            else:
-                continue
-            break
-        data.append(format_table_search_result(tabulation, 'table'))
+    def search(query):
+        # retrieve matching tables.
+        results = [format_table_search_result(tabulation, 'table') for tabulation in index.search_tabulations(query, topics)]
 
-    # retrieve matching columns.
-    if q != '*':
-        # Special case for when we want ALL the tables (but not all the columns)
-        result = db.session.execute(text(
-            """SELECT col.column_id,
-                      col.column_title,
-                      tab.table_id,
-                      tab.table_title,
-                      tab.simple_table_title,
-                      tab.universe,
-                      tab.topics
-               FROM census_column_metadata col
-               LEFT OUTER JOIN census_table_metadata tab USING (table_id)
-               WHERE %s
-               ORDER BY char_length(tab.table_id), tab.table_id""" % (column_where)),
-            column_where_args
-        )
-        data.extend([format_table_search_result(column, 'column') for column in result.mappings().all()])
+        # retrieve matching columns.
+        if q != '*':
+            # Special case for when we want ALL the tables (but not all the columns)
+            results.extend([format_table_search_result(column, 'column') for column in index.search_columns(query, topics)])
+        return results
+
+    data.extend(search(query))
+    if not data and query and request.qwargs.fuzzy:
+        # nothing matches as typed; try again with misspelled words corrected
+        corrected = index.fuzzy.correct(query)
+        if corrected:
+            data.extend(search(corrected))
 
     serialized_json = json.dumps(data)
     resp = make_response(serialized_json)
@@ -998,56 +1488,43 @@ def search_tabulations():
     codes = request.qwargs.codes
     q = request.qwargs.q
 
-    table_where_parts = []
-    table_where_args = {}
-
-    if topics:
-        table_where_parts.append('tab.topics @> :topics')
-        table_where_args['topics'] = topics
-
-    if prefix:
-        table_where_parts.append('tab.tabulation_code like :prefix')
-        table_where_args['prefix'] = "{}%".format(prefix)
-
-    if q:
-        table_where_parts.append('lower(tab.table_title) like lower(:q)')
-        table_where_args['q'] = "%{}%".format(q)
-
-    if codes:
-        table_where_parts.append('tab.tabulation_code = any(:codes)')
-        table_where_args['codes'] = codes
-
-    if table_where_parts:
-        table_where = ' AND '.join(table_where_parts)
+    index = get_tabulation_index()
+    if prefix or topics or codes or q:
+        serialized_json = json.dumps(index['tabulations'].search(prefix=prefix, topics=topics, q=q, codes=codes))
     else:
-        table_where = 'TRUE'
+        # the unfiltered list never changes, so it's serialized only once
+        serialized_json = index['all_json']
+    resp = make_response(serialized_json)
+    resp.headers.set('Content-Type', 'application/json')
 
-    # retrieve matching tables.
-    result = db.session.execute(text(
-        """SELECT tab.tabulation_code,
-                  tab.table_title,
-                  tab.simple_table_title,
-                  tab.universe,
-                  tab.topics,
-                  tab.tables_in_one_yr,
-                  tab.tables_in_three_yr,
-                  tab.tables_in_five_yr
-           FROM census_tabulation_metadata tab
-           WHERE %s
-           ORDER BY tab.tabulation_code""" % (table_where)),
-        table_where_args
-    )
+    return resp
 
-    data = []
 
-    for tabulation in result.mappings().all():
-        data.append(dict(tabulation))
+tabulation_index = {}
 
-    serialized_json = json.dumps(data)
-    resp = make_response(serialized_json)
-    resp.headers.set('Content-Type', 'application/json')
 
-    return resp
+def get_tabulation_index():
+    '''Return the in-memory index of census_tabulation_metadata (with the
+    serialized full list under 'all_json'), built once per process. It's
+    stored in one step, so a concurrent request never sees it half built.'''
+    if 'index' not in tabulation_index:
+        result = db.session.execute(text(
+            """SELECT tab.tabulation_code,
+                      tab.table_title,
+                      tab.simple_table_title,
+                      tab.universe,
+                      tab.topics,
+                      tab.tables_in_one_yr,
+                      tab.tables_in_three_yr,
+                      tab.tables_in_five_yr
+               FROM census_tabulation_metadata tab"""
+        ))
+        tabulations = TabulationIndex(result.mappings().all())
+        tabulation_index['index'] = {
+            'tabulations': tabulations,
+            'all_json': json.dumps(tabulations.rows),
+        }
+    return tabulation_index['index']
 
 # Example: /1.0/table/B28001?release=acs2013_1yr
 @app.route("/1.0/table/<table_id>")
@@ -1062,58 +1539,57 @@ def table_details(table_id):
         abort(404, "Invalid table ID")
 
     cache_key = str('tables/%s/%s.json' % (release, table_id))
-    cached = cache.get(cache_key)
-    if cached:
-        resp = make_response(cached)
-    else:
-        db.session.execute(text("SET search_path=:acs, public;"), {'acs': request.qwargs.acs})
+    result = get_or_compute(cache, cache_key, lambda: build_table_details(release, table_id))
+    resp = make_response(result)
 
-        result = db.session.execute(text(
-            """SELECT *
-               FROM census_table_metadata tab
-               WHERE table_id=:table_id"""),
-            {'table_id': table_id}
-        )
-        row = result.mappings().fetchone()
-
-        if not row:
-            abort(404, "Table %s not found in release %s. Try specifying another release." % (table_id.upper(), release))
-
-        data = OrderedDict([
-            ("table_id", row['table_id']),
-            ("table_title", row['table_title']),
-            ("simple_table_title", row['simple_table_title']),
-            ("subject_area", row['subject_area']),
-            ("universe", row['universe']),
-            ("denominator_column_id", row['denominator_column_id']),
-            ("topics", row['topics'])
-        ])
+    resp.headers.set('Content-Type', 'application/json')
+    resp.headers.set('Cache-Control', 'public,max-age=%d' % int(3600 * 4))
 
-        result = db.session.execute(text(
-            """SELECT *
-               FROM census_column_metadata
-               WHERE table_id=:table_id"""),
-            {'table_id': row['table_id']}
-        )
+    return resp
 
-        rows = []
-        for row in result.mappings().all():
-            rows.append((row['column_id'], dict(
-                column_title=row['column_title'],
-                indent=row['indent'],
-                parent_column_id=row['parent_column_id']
-            )))
-        data['columns'] = OrderedDict(rows)
 
-        result = json.dumps(data)
+def build_table_details(release, table_id):
+    db.session.execute(text("SET search_path=:acs, public;"), {'acs': release})
 
-        resp = make_response(result)
-        cache.set(cache_key, result)
+    result = db.session.execute(text(
+        """SELECT *
+           FROM census_table_metadata tab
+           WHERE table_id=:table_id"""),
+        {'table_id': table_id}
+    )
+    row = result.mappings().fetchone()
 
-    resp.headers.set('Content-Type', 'application/json')
-    resp.headers.set('Cache-Control', 'public,max-age=%d' % int(3600 * 4))
+    if not row:
+        abort(404, "Table %s not found in release %s. Try specifying another release." % (table_id.upper(), release))
+
+    data = OrderedDict([
+        ("table_id", row['table_id']),
+        ("table_title", row['table_title']),
+        ("simple_table_title", row['simple_table_title']),
+        ("subject_area", row['subject_area']),
+        ("universe", row['universe']),
+        ("denominator_column_id", row['denominator_column_id']),
+        ("topics", row['topics'])
+    ])
 
-    return resp
+    result = db.session.execute(text(
+        """SELECT *
+           FROM census_column_metadata
+           WHERE table_id=:table_id"""),
+        {'table_id': row['table_id']}
+    )
+
+    rows = []
+    for row in result.mappings().all():
+        rows.append((row['column_id'], dict(
+            column_title=row['column_title'],
+            indent=row['indent'],
+            parent_column_id=row['parent_column_id']
+        )))
+    data['columns'] = OrderedDict(rows)
+
+    result = json.dumps(data)
+    return result
 
 
 # Example: /2.0/table/latest/B28001
@@ -1232,7 +1708,7 @@ def table_geo_comparison_rowcount(table_id):
             release['table_name'] = table_record['table_title']
             release['table_universe'] = table_record['universe']
 
-            child_geoheaders = get_child_geoids(parent_geoid, child_summary_level)
+            child_geoheaders = get_child_geoids(acs, parent_geoid, child_summary_level)
 
             if child_geoheaders:
                 child_geoids = [child['geoid'] for child in child_geoheaders]
@@ -1284,6 +1760,34 @@ FTS_URL_BUILDERS = {
     'profile': build_profile_url,
     'table': build_table_url
 }
+
+
+full_text_index = {}
+full_text_index_lock = threading.Lock()
+
+
+def get_full_text_index():
+    '''Return the embedded full-text index if FULL_TEXT_SEARCH_BACKEND is
+    'embedded', or None. It's loaded from FULL_TEXT_INDEX_FILE if that exists,
+    or else built from search_metadata, once per process (see warm_indexes).
+    Concurrent first callers wait for a single load.'''
+    if current_app.config.get('FULL_TEXT_SEARCH_BACKEND', 'postgres') != 'embedded':
+        return None
+
+    if 'index' not in full_text_index:
+        with full_text_index_lock:
+            if 'index' not in full_text_index:
+                filename = current_app.config.get('FULL_TEXT_INDEX_FILE')
+                if filename and os.path.exists(filename):
+                    full_text_index['index'] = FullTextIndex.load(filename)
+                else:
+                    app.logger.warning(
+                        "FULL_TEXT_INDEX_FILE %s doesn't exist; building the full-text index from search_metadata. "
+                        "Prebuild it with tools/build_fts_index.py to keep this load off the database.", filename)
+                    full_text_index['index'] = build_full_text_index(db)
+    return full_text_index['index']
+
+
 @app.route("/2.1/full-text/search")
 @qwarg_validate({
     'q': {'valid': NonemptyString()},
@@ -1297,7 +1801,7 @@ def full_text_search():
     search_type = request.qwargs.type
     limit = request.qwargs.limit
 
-    prepared_result = perform_full_text_search(db, q, search_type, limit)
+    prepared_result = perform_full_text_search(db, q, search_type, limit, get_full_text_index())
     # some results need their URLs qualified, which can only be done based on the app config
     # so post-process the results before serving them
     for row in prepared_result:
@@ -1316,98 +1820,74 @@ def full_text_search():
 
 # get geoheader data for children at the requested summary level
 def get_child_geoids(release, parent_geoid, child_summary_level):
+    sql, params = child_geoids_query(parent_geoid, child_summary_level)
+
+    # Use the "worst"/biggest ACS to find all child geoids
+    db.session.execute(text("SET search_path=:acs,public;"), {'acs': release})
+    result = db.session.execute(text(sql), params)
+    return result.mappings().fetchall()
+
+
+# build the query selecting (geoid, name) geoheader rows for children at the
+# requested summary level. The query reads the geoheader on the current
+# search_path so it can be used on its own or as a CTE inside a larger query.
+def child_geoids_query(parent_geoid, child_summary_level):
     parent_sumlevel = parent_geoid[0:3]
     if parent_sumlevel == '010':
-        return get_all_child_geoids(release, child_summary_level)
+        return all_child_geoids_query(child_summary_level)
     elif parent_sumlevel in PARENT_CHILD_CONTAINMENT and child_summary_level in PARENT_CHILD_CONTAINMENT[parent_sumlevel]:
-        return get_child_geoids_by_prefix(release, parent_geoid, child_summary_level)
+        return child_geoids_by_prefix_query(parent_geoid, child_summary_level)
     elif parent_sumlevel == '160' and child_summary_level in ('140', '150'):
-        return get_child_geoids_by_coverage(release, parent_geoid, child_summary_level)
+        return child_geoids_by_coverage_query(parent_geoid, child_summary_level)
     elif parent_sumlevel == '310' and child_summary_level in ('160', '860'):
-        return get_child_geoids_by_coverage(release, parent_geoid, child_summary_level)
+        return child_geoids_by_coverage_query(parent_geoid, child_summary_level)
     elif parent_sumlevel == '040' and child_summary_level in ('310', '860'):
-        return get_child_geoids_by_coverage(release, parent_geoid, child_summary_level)
+        return child_geoids_by_coverage_query(parent_geoid, child_summary_level)
     elif parent_sumlevel == '050' and child_summary_level in ('160', '860', '950', '960', '970'):
-        return get_child_geoids_by_coverage(release, parent_geoid, child_summary_level)
+        return child_geoids_by_coverage_query(parent_geoid, child_summary_level)
     else:
-        return get_child_geoids_by_gis(release, parent_geoid, child_summary_level)
+        return child_geoids_by_gis_query(parent_geoid, child_summary_level)
 
 
-def get_all_child_geoids(release, child_summary_level):
-    db.session.execute(text("SET search_path=:acs,public;"), {'acs': release})
-    result = db.session.execute(text(
-        """SELECT geoid,name
-           FROM geoheader
-           WHERE sumlevel=:sumlev AND component='00' AND geoid NOT IN ('04000US72')
-           ORDER BY name"""),
-        {'sumlev': int(child_summary_level)}
-    )
+def all_child_geoids_query(child_summary_level):
+    sql = """SELECT geoid,name
+             FROM geoheader
+             WHERE sumlevel=:child_sumlev AND component='00' AND geoid NOT IN ('04000US72')
+             ORDER BY name"""
+    return sql, {'child_sumlev': int(child_summary_level)}
 
-    return result.mappings().fetchall()
 
+def child_geoids_by_coverage_query(parent_geoid, child_summary_level):
+    sql = """SELECT DISTINCT geoid, name
+             FROM tiger2024.census_geo_containment, geoheader
+             WHERE geoheader.geoid = census_geo_containment.child_geoid
+               AND census_geo_containment.parent_geoid = :parent_geoid
+               AND census_geo_containment.child_geoid LIKE :child_geoids"""
+    return sql, {'parent_geoid': parent_geoid, 'child_geoids': child_summary_level + '%'}
 
-def get_child_geoids_by_coverage(release, parent_geoid, child_summary_level):
-    # Use the "worst"/biggest ACS to find all child geoids
-    db.session.execute(text("SET search_path=:acs,public;"), {'acs': release})
-    result = db.session.execute(text(
-        """SELECT geoid, name
-           FROM tiger2024.census_geo_containment, geoheader
-           WHERE geoheader.geoid = census_geo_containment.child_geoid
-             AND census_geo_containment.parent_geoid = :parent_geoid
-             AND census_geo_containment.child_geoid LIKE :child_geoids"""),
-        {'parent_geoid': parent_geoid, 'child_geoids': child_summary_level + '%'}
-    )
-
-    rowdicts = []
-    seen_geoids = set()
-    for row in result.mappings().all():
-        if not row['geoid'] in seen_geoids:
-            rowdicts.append(row)
-            seen_geoids.add(row['geoid'])
-
-    return rowdicts
 
-
-def get_child_geoids_by_gis(release, parent_geoid, child_summary_level):
+def child_geoids_by_gis_query(parent_geoid, child_summary_level):
     parent_sumlevel = parent_geoid[0:3]
-    result = db.session.execute(text(
-        """SELECT child.full_geoid
-           FROM tiger2024.census_name_lookup parent
-           JOIN tiger2024.census_name_lookup child ON ST_Intersects(parent.geom, child.geom) AND child.sumlevel=:child_sumlevel
-           WHERE parent.full_geoid=:parent_geoid AND parent.sumlevel=:parent_sumlevel"""),
-        {'child_sumlevel': child_summary_level, 'parent_geoid': parent_geoid, 'parent_sumlevel': parent_sumlevel}
-    )
-    child_geoids = [r['full_geoid'] for r in result.mappings().all()]
-
-    if child_geoids:
-        # Use the "worst"/biggest ACS to find all child geoids
-        db.session.execute(text("SET search_path=:acs,public;"), {'acs': release})
-        result = db.session.execute(text(
-            """SELECT geoid,name
-               FROM geoheader
-               WHERE geoid IN :child_geoids
-               ORDER BY name"""),
-            {'child_geoids': tuple(child_geoids)}
-        )
-        return result.mappings().fetchall()
-    else:
-        return []
-
-
-def get_child_geoids_by_prefix(release, parent_geoid, child_summary_level):
+    sql = """SELECT geoid,name
+             FROM geoheader
+             WHERE geoid IN (
+                 SELECT child.full_geoid
+                 FROM tiger2024.census_name_lookup parent
+                 JOIN tiger2024.census_name_lookup child ON ST_Intersects(parent.geom, child.geom) AND child.sumlevel=:child_sumlevel
+                 WHERE parent.full_geoid=:parent_geoid AND parent.sumlevel=:parent_sumlevel
+             )
+             ORDER BY name"""
+    return sql, {'child_sumlevel': child_summary_level, 'parent_geoid': parent_geoid, 'parent_sumlevel': parent_sumlevel}
+
+
+def child_geoids_by_prefix_query(parent_geoid, child_summary_level):
     child_geoid_prefix = '%s00US%s%%' % (child_summary_level, parent_geoid.upper().split('US')[1])
-
-    # Use the "worst"/biggest ACS to find all child geoids
-    db.session.execute(text("SET search_path=:acs,public;"), {'acs': release})
-    result = db.session.execute(text(
-        """SELECT geoid,name
-           FROM geoheader
-           WHERE geoid LIKE :geoid_prefix
-             AND name NOT LIKE :not_name
-           ORDER BY geoid"""),
-        {'geoid_prefix': child_geoid_prefix, 'not_name': '%%not defined%%'}
-    )
-    return result.mappings().fetchall()
+    sql = """SELECT geoid,name
+             FROM geoheader
+             WHERE geoid LIKE :geoid_prefix
+               AND name NOT LIKE :not_name
+             ORDER BY geoid"""
+    return sql, {'geoid_prefix': child_geoid_prefix, 'not_name': '%%not defined%%'}
 
 
 def expand_geoids(geoid_list, release):
@@ -1511,22 +1991,15 @@ def show_specified_data(acs):
     named_geo_ids = valid_geo_ids | parents_of_groups
 
     # Fill in the display name for the geos
-    result = db.session.execute(text(
-        """SELECT full_geoid,population,display_name
-           FROM tiger2024.census_name_lookup
-           WHERE full_geoid IN :geoids;"""),
-        {'geoids': tuple(named_geo_ids)}
-    )
-
     geo_metadata = OrderedDict()
-    for geo in result.mappings().all():
-        geo_metadata[geo['full_geoid']] = {
-            'name': geo['display_name'],
+    for (geoid, geo) in get_geo_names('tiger2024').lookup(named_geo_ids).items():
+        geo_metadata[geoid] = {
+            'name': geo.display_name,
         }
         # let children know who their parents are to distinguish between
         # groups at the same summary level
-        if geo['full_geoid'] in child_parent_map:
-            geo_metadata[geo['full_geoid']]['parent_geoid'] = child_parent_map[geo['full_geoid']]
+        if geoid in child_parent_map:
+            geo_metadata[geoid]['parent_geoid'] = child_parent_map[geoid]
 
     for release_to_use in releases_to_use:
         db.session.execute(text("SET search_path=:acs, public;"), {'acs': release_to_use})
@@ -1897,19 +2370,11 @@ def download_specified_data(acs):
         abort(400, 'You requested %s geoids. The maximum is %s. Please contact us for bulk data.' % (len(valid_geo_ids), max_geoids))
 
     # Fill in the display name for the geos
-    result = db.session.execute(text(
-        """SELECT full_geoid,
-                  population,
-                  display_name
-           FROM tiger2024.census_name_lookup
-           WHERE full_geoid IN :geo_ids;"""),
-        {'geo_ids': tuple(valid_geo_ids)}
-    )
-
+    names = get_geo_names('tiger2024')
     geo_metadata = OrderedDict()
-    for geo in result.mappings().all():
-        geo_metadata[geo['full_geoid']] = {
-            "name": geo['display_name'],
+    for (geoid, geo) in names.lookup(valid_geo_ids).items():
+        geo_metadata[geoid] = {
+            "name": geo.display_name,
         }
 
     for release_to_use in releases_to_use:
@@ -1998,7 +2463,7 @@ def download_specified_data(acs):
         out_filename = os.path.join(inner_path, '%s.%s' % (file_ident, request.qwargs.format))
         format_info = supported_formats.get(request.qwargs.format)
         builder_func = format_info['function']
-        builder_func(db.session, data, table_metadata, valid_geo_ids, file_ident, out_filename, request.qwargs.format)
+        builder_func(db.session, data, table_metadata, names, valid_geo_ids, file_ident, out_filename, request.qwargs.format)
 
         metadata_dict = {
             'release': {
@@ -2026,12 +2491,80 @@ def download_specified_data(acs):
     return abort(400, "None of the releases had the requested geo_ids and table_ids")
 
 
+# Parent and child rows for a comparison in one round trip: the child geoheader
+# selection (see child_geoids_query) is cut to the children with data, ranked
+# by the requested sort column and paged before being joined to the data table
+# and, optionally, to a simplified geometry. The parent row sorts first so the
+# response can be validated before the children are streamed out, and carries
+# the number of children with data, which a page past the end still needs.
+COMPARE_GEOGRAPHIES_SQL = """
+WITH children AS ({children_sql}),
+with_data AS (
+    SELECT children.geoid,
+           children.name,
+           row_number() OVER (ORDER BY {child_order}) AS rank
+    FROM children
+    JOIN {table_id}_moe d USING (geoid)
+    WHERE {child_has_data}
+),
+ranked AS (
+    SELECT geoid, name, rank
+    FROM with_data
+    ORDER BY rank
+    LIMIT :limit OFFSET :offset
+),
+geographies AS (
+    SELECT 'parent' AS relation, geoid, name, 0 AS rank,
+           (SELECT count(*) FROM with_data) AS total_results
+    FROM geoheader
+    WHERE geoid = :parent_geoid
+    UNION ALL
+    SELECT 'child' AS relation, geoid, name, rank, NULL AS total_results
+    FROM ranked
+)
+SELECT g.relation, g.name, g.rank, g.total_results, {geom_column} d.*
+FROM geographies g
+JOIN {table_id}_moe d USING (geoid)
+{geom_join}
+ORDER BY g.rank
+"""
+
+# Child rows read before a comparison response starts streaming
+COMPARE_PREFETCH_ROWS = 1000
+
+COMPARE_GEOM_JOIN = """LEFT JOIN LATERAL (
+    SELECT full_geoid, geom FROM tiger2024.census_name_lookup WHERE full_geoid = d.geoid LIMIT 1
+) nl ON TRUE"""
+
+
+def split_compare_row(row, column_ids):
+    '''Pivot one comparison row into estimate and error dicts keyed by column id.
+    Also reports whether any column has both an estimate and an error.'''
+    column_data = OrderedDict()
+    column_moe = OrderedDict()
+    has_data = False
+    for column_id in column_ids:
+        value = row[column_id]
+        moe_value = row[column_id + '_moe']
+        if value is not None and moe_value is not None:
+            has_data = True
+        column_data[column_id.upper()] = value
+        column_moe[column_id.upper()] = moe_value
+    return column_data, column_moe, has_data
+
+
 # Example: /1.0/data/compare/acs2012_5yr/B01001?sumlevel=050&within=04000US53
 @app.route("/1.0/data/compare/<acs>/<table_id>")
 @qwarg_validate({
     'within': {'valid': Regex(geoid_re), 'required': True},
     'sumlevel': {'valid': OneOf(SUMLEV_NAMES), 'required': True},
-    'geom': {'valid': Bool(), 'default': False}
+    'geom': {'valid': Bool(), 'default': False},
+    'sort': {'valid': Regex(column_re)},
+    'order': {'valid': OneOf(['asc', 'desc']), 'default': 'desc'},
+    'limit': {'valid': IntegerRange(1, 10000)},
+    'offset': {'valid': IntegerRange(0, 1000000), 'default': 0},
+    'format': {'valid': OneOf(['geojson', 'topojson']), 'default': 'geojson'},
+    'quantize': {'valid': IntegerRange(2, 10 ** 9), 'default': DEFAULT_QUANTIZE},
 })
 @cross_origin(origins='*')
 def data_compare_geographies_within_parent(acs, table_id):
@@ -2041,13 +2574,17 @@ def data_compare_geographies_within_parent(acs, table_id):
     db.session.execute(text("SET search_path=:acs, public;"), {'acs': acs})
 
     parent_geoid = request.qwargs.within
+    parent_sumlevel = parent_geoid[:3]
     child_summary_level = request.qwargs.sumlevel
+    with_geom = request.qwargs.geom
+    # with TopoJSON, geometries are collected into one topology at the end
+    # of the response instead of being written with each geography
+    topology_features = [] if with_geom and request.qwargs.format == 'topojson' else None
 
     # create the containers we need for our response
     comparison = OrderedDict()
     table = OrderedDict()
     parent_geography = OrderedDict()
-    child_geographies = OrderedDict()
 
     # add some basic metadata about the comparison and data table requested.
     comparison['child_summary_level'] = child_summary_level
@@ -2068,7 +2605,7 @@ def data_compare_geographies_within_parent(acs, table_id):
            ORDER BY column_id;"""),
         {'table_ids': table_id}
     )
-    table_metadata = result.fetchall()
+    table_metadata = result.mappings().fetchall()
 
     if not table_metadata:
         abort(404, 'Table %s isn\'t available in the %s release.' % (table_id.upper(), get_acs_name(acs)))
@@ -2091,121 +2628,113 @@ def data_compare_geographies_within_parent(acs, table_id):
     table['denominator_column_id'] = table_record['denominator_column_id']
     table['columns'] = column_map
 
-    # add some data about the parent geography
-    result = db.session.execute(text("SELECT * FROM geoheader WHERE geoid=:geoid;"), {'geoid': parent_geoid})
-    parent_geoheader = result.fetchone()
-    parent_sumlevel = '%03d' % parent_geoheader['sumlevel']
+    # rank children by a data column if requested, otherwise by geoid
+    sort_column_id = request.qwargs.sort
+    if sort_column_id:
+        sort_column_id = sort_column_id.upper()
+        if sort_column_id not in column_map:
+            abort(400, 'Column %s isn\'t in table %s.' % (sort_column_id, validated_table_id))
+        child_order = 'd.%s %s NULLS LAST, geoid' % (sort_column_id.lower(), request.qwargs.order.upper())
+        comparison['sort'] = sort_column_id
+        comparison['order'] = request.qwargs.order
+    else:
+        child_order = 'geoid'
+    comparison['limit'] = request.qwargs.limit
+    comparison['offset'] = request.qwargs.offset
+
+    # fetch the parent and the requested page of children, with their data
+    # and (optionally) geometries, in a single query
+    children_sql, params = child_geoids_query(parent_geoid, child_summary_level)
+    params.update({
+        'parent_geoid': parent_geoid,
+        'limit': request.qwargs.limit,
+        'offset': request.qwargs.offset,
+    })
+    if topology_features is None:
+        geom_column = geometry_sql('tiger2024', 'overview', 'nl')
+    else:
+        geom_column = TOPOLOGY_GEOMETRY_SQL.format(geom='nl.geom', tolerance=COMPARE_TOPOLOGY_TOLERANCE)
+    sql = COMPARE_GEOGRAPHIES_SQL.format(
+        children_sql=children_sql,
+        child_order=child_order,
+        # the same test as split_compare_row's: a column with both an
+        # estimate and an error
+        child_has_data=' OR '.join(
+            '(d.{0} IS NOT NULL AND d.{0}_moe IS NOT NULL)'.format(column_id.lower()) for column_id in column_map) or 'FALSE',
+        table_id=validated_table_id,
+        geom_column=geom_column + ' AS geometry,' if with_geom else '',
+        geom_join=COMPARE_GEOM_JOIN if with_geom else '',
+    )
+    result = db.session.execute(text(sql), params, execution_options={'stream_results': True})
+    rows = result.mappings()
+
+    # work out the estimate columns once rather than sorting every row
+    column_ids = sorted(
+        key for key in result.keys()
+        if key not in ('relation', 'name', 'rank', 'total_results', 'geometry', 'geoid') and not key.endswith('_moe')
+    )
+
+    parent_row = next(rows, None)
+    if not parent_row or parent_row['relation'] != 'parent':
+        abort(404, 'GeoID %s isn\'t available in the %s release of table %s.' % (parent_geoid, get_acs_name(acs), validated_table_id))
+
+    # Read the first batch of children before the response starts, so that the
+    # query has run its ranking and the first geometry joins: errors there
+    # still get an error status instead of a truncated 200.
+    first_children = rows.fetchmany(COMPARE_PREFETCH_ROWS)
 
+    # add some data about the parent geography
     parent_geography['geography'] = OrderedDict()
-    parent_geography['geography']['name'] = parent_geoheader['name']
+    parent_geography['geography']['name'] = parent_row['name']
     parent_geography['geography']['summary_level'] = parent_sumlevel
+    if parent_row.get('geometry'):
+        if topology_features is None:
+            parent_geography['geography']['geometry'] = RawJSON(parent_row['geometry'])
+        else:
+            topology_features.append({'id': parent_geoid, 'geometry': json.loads(parent_row['geometry'])})
+    parent_geography['data'], parent_geography['error'], _ = split_compare_row(parent_row, column_ids)
 
     comparison['parent_summary_level'] = parent_sumlevel
     comparison['parent_geography_name'] = SUMLEV_NAMES.get(parent_sumlevel, {}).get('name')
-    comparison['parent_name'] = parent_geoheader['name']
+    comparison['parent_name'] = parent_row['name']
     comparison['parent_geoid'] = parent_geoid
 
-    child_geoheaders = get_child_geoids(parent_geoid, child_summary_level)
-
-    # start compiling child data for our response
-    child_geoid_list = [geoheader['geoid'] for geoheader in child_geoheaders]
-    child_geoid_names = dict([(geoheader['geoid'], geoheader['name']) for geoheader in child_geoheaders])
-
-    # get geographical data if requested
-    child_geodata_map = {}
-    if request.qwargs.geom:
-        # get the parent geometry and add to API response
-        result = db.session.execute(text(
-            """SELECT ST_AsGeoJSON(ST_SimplifyPreserveTopology(geom,0.001), 5) as geometry
-               FROM tiger2024.census_name_lookup
-               WHERE full_geoid=:geo_ids;"""),
-            {'geo_ids': parent_geoid}
-        )
-        parent_geometry = result.fetchone()
-        try:
-            parent_geography['geography']['geometry'] = json.loads(parent_geometry['geometry'])
-        except Exception:
-            # we may not have geometries for all sumlevs
-            pass
-
-        # get the child geometries and store for later
-        result = db.session.execute(text(
-            """SELECT geoid, ST_AsGeoJSON(ST_SimplifyPreserveTopology(geom,0.001), 5) as geometry
-               FROM tiger2024.census_name_lookup
-               WHERE full_geoid IN :geo_ids
-               ORDER BY full_geoid;"""),
-            {'geo_ids': tuple(child_geoid_list)}
-        )
-        child_geodata = result.fetchall()
-        child_geodata_map = dict([(record['geoid'], json.loads(record['geometry'])) for record in child_geodata])
-
-    # make the where clause and query the requested census data table
-    # get parent data first...
-    result = db.session.execute(text("SELECT * FROM %s_moe WHERE geoid=:geoid" % (validated_table_id)), {'geoid': parent_geoheader['geoid']})
-    parent_data = result.fetchone()
-    parent_data.pop('geoid', None)
-    column_data = []
-    column_moe = []
-    sorted_data = iter(sorted(list(parent_data.items()), key=lambda tup: tup[0]))
-    for (k, v) in sorted_data:
-        (moe_k, moe_v) = next(sorted_data)
-        column_data.append((k.upper(), v))
-        column_moe.append((k.upper(), moe_v))
-    parent_geography['data'] = OrderedDict(column_data)
-    parent_geography['error'] = OrderedDict(column_moe)
-
-    if child_geoheaders:
-        # ... and then children so we can loop through with cursor
-        child_geoids = [child['geoid'] for child in child_geoheaders]
-        result = db.session.execute(text("SELECT * FROM %s_moe WHERE geoid IN :geo_ids" % (validated_table_id)), {'geo_ids': tuple(child_geoids)})
-
-        # grab one row at a time
-        for record in result.mappings().all():
-            child_geoid = record.pop('geoid')
+    def generate():
+        yield '{"parent_geography":%s,"table":%s,"child_geographies":{' % (
+            dumps_with_raw_json(parent_geography), json.dumps(table))
 
+        results = 0
+        for record in chain(first_children, rows):
             child_data = OrderedDict()
-            this_geo_has_data = False
 
             # build the child item
             child_data['geography'] = OrderedDict()
-            child_data['geography']['name'] = child_geoid_names[child_geoid]
+            child_data['geography']['name'] = record['name']
             child_data['geography']['summary_level'] = child_summary_level
+            child_data['data'], child_data['error'], this_geo_has_data = split_compare_row(record, column_ids)
 
-            column_data = []
-            column_moe = []
-            sorted_data = iter(sorted(list(record.items()), key=lambda tup: tup[0]))
-            for (k, v) in sorted_data:
-
-                if v is not None and moe_v is not None:
-                    this_geo_has_data = True
-
-                (moe_k, moe_v) = next(sorted_data)
-                column_data.append((k.upper(), v))
-                column_moe.append((k.upper(), moe_v))
-            child_data['data'] = OrderedDict(column_data)
-            child_data['error'] = OrderedDict(column_moe)
-
-            if child_geodata_map:
-                try:
-                    child_data['geography']['geometry'] = child_geodata_map[child_geoid.split('US')[1]]
-                except Exception:
-                    # we may not have geometries for all sumlevs
-                    pass
+            # we may not have geometries for all sumlevs
+            if record.get('geometry') and this_geo_has_data:
+                if topology_features is None:
+                    child_data['geography']['geometry'] = RawJSON(record['geometry'])
+                else:
+                    topology_features.append({'id': record['geoid'], 'geometry': json.loads(record['geometry'])})
 
             if this_geo_has_data:
-                child_geographies[child_geoid] = child_data
+                yield '%s%s:%s' % (',' if results else '', json.dumps(record['geoid']), dumps_with_raw_json(child_data))
+                results += 1
 
-            # TODO Do we really need this?
-            comparison['results'] = len(child_geographies)
-    else:
-        comparison['results'] = 0
+        if topology_features is None:
+            yield '}'
+        else:
+            yield '},"topology":%s' % json.dumps(features_to_topology(
+                topology_features, request.qwargs.quantize, simplify=COMPARE_TOPOLOGY_TOLERANCE), separators=(',', ':'))
 
-    resp = jsonify(
-        comparison=comparison,
-        table=table,
-        parent_geography=parent_geography,
-        child_geographies=child_geographies,
-    )
+        comparison['results'] = results
+        comparison['total_results'] = parent_row['total_results']
+        yield ',"comparison":%s}' % json.dumps(comparison)
+
+    resp = Response(stream_with_context(generate()), mimetype='application/json')
     # cache the response for 1 day
     resp.cache_control.max_age = 86400
     resp.cache_control.public = True
@@ -2384,5 +2913,15 @@ def aggregate(hash_digest, release, table_code):
     return send_file(zf.name, 'application/zip', download_name=zipfile_name)
 
 
+def warm_indexes():
+    '''Build the in-memory search indexes before the process serves
+    requests, so no request waits for them. Called by wsgi.py as each
+    worker starts.'''
+    with app.app_context():
+        get_geo_search_index('tiger2024')
+        get_full_text_index()
+        db.session.remove()
+
+
 if __name__ == "__main__":
     app.run(host='0.0.0.0', port=5000, debug=True)
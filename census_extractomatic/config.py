@@ -5,12 +5,22 @@ class Config(object):
     SENTRY_DSN = os.environ.get('SENTRY_DSN')
     MAX_GEOIDS_TO_SHOW = 10000
     MAX_GEOIDS_TO_DOWNLOAD = 10000
+    MAX_DATA_TILE_COLUMNS = 20
+    MAX_POINTS_TO_LOCATE = 10000
     CENSUS_REPORTER_URL_ROOT = 'https://censusreporter.org'
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     BYPASS_CACHE = False
     CACHE_TYPE = os.environ.get('CACHE_TYPE', 'null')
     CACHE_DEFAULT_TIMEOUT = int(os.environ.get('CACHE_DEFAULT_TIMEOUT')) if os.environ.get('CACHE_DEFAULT_TIMEOUT') else None
     SQLALCHEMY_DATABASE_URI = os.environ.get('DATABASE_URL')
+    # Directory of pre-rendered <release>/<sumlevel>.mbtiles tile pyramids
+    # (see census_extractomatic/tools/build_tile_pyramid.py)
+    TILE_PYRAMID_DIR = os.environ.get('TILE_PYRAMID_DIR')
+    # 'postgres', or 'embedded' to answer /2.1/full-text/search from an
+    # in-process BM25 index of search_metadata, read from FULL_TEXT_INDEX_FILE
+    # if it's set (see census_extractomatic/tools/build_fts_index.py)
+    FULL_TEXT_SEARCH_BACKEND = os.environ.get('FULL_TEXT_SEARCH_BACKEND', 'postgres')
+    FULL_TEXT_INDEX_FILE = os.environ.get('FULL_TEXT_INDEX_FILE')
 
 
 class Production(Config):
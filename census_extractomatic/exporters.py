@@ -1,5 +1,4 @@
 from openpyxl.styles import Alignment, Font
-from sqlalchemy import text
 import logging
 import openpyxl
 
@@ -16,7 +15,7 @@ def get_sql_config(session):
             bind.url.database)
 
 
-def create_excel_download(session, data, table_metadata, valid_geo_ids, file_ident, out_filename, format):
+def create_excel_download(session, data, table_metadata, geo_names, valid_geo_ids, file_ident, out_filename, format):
     def excel_helper(sheet, table_id, table, option):
         """
         Create excel sheet.
@@ -58,21 +57,11 @@ def create_excel_download(session, data, table_metadata, valid_geo_ids, file_ide
         # Resize column width
         sheet.column_dimensions['A'].width = 50
 
-        # this SQL echoed in OGR export but no geom so copying instead of factoring out
-        # plus different binding when using SQLAlchemy
-        result = session.execute(text(
-            """SELECT full_geoid,display_name
-                     FROM tiger2022.census_name_lookup
-                     WHERE full_geoid IN :geoids
-                     ORDER BY full_geoid"""),
-            {'geoids': tuple(valid_geo_ids)}
-        )
-
         geo_headers = []
         any_zero_denominators = False
         has_denominator_column = False
-        for i, (geoid, name) in enumerate(result):
-            geo_headers.append(name)
+        for i, (geoid, geo) in enumerate(geo_names.lookup(valid_geo_ids).items()):
+            geo_headers.append(geo.display_name)
             col_values = []
             col_errors = []
             for table_id, table in table_metadata.items():
@@ -146,7 +135,7 @@ def create_excel_download(session, data, table_metadata, valid_geo_ids, file_ide
     wb.save(out_filename)
 
 
-def create_ogr_download(session, data, table_metadata, valid_geo_ids, file_ident, out_filename, format):
+def create_ogr_download(session, data, table_metadata, geo_names, valid_geo_ids, file_ident, out_filename, format):
     from osgeo import ogr
     from osgeo import osr
     format_info = supported_formats[format]
@@ -177,11 +166,11 @@ def create_ogr_download(session, data, table_metadata, valid_geo_ids, file_ident
                 out_layer.CreateField(ogr.FieldDefn(column_id, ogr.OFTReal))
                 out_layer.CreateField(ogr.FieldDefn(column_id + ", Error", ogr.OFTReal))
 
-    # this SQL echoed in Excel export but no geom so copying instead of factoring out
-    sql = """SELECT geom,full_geoid,display_name
-             FROM tiger2022.census_name_lookup
+    # only the geometries come from the database; names are already in memory
+    sql = """SELECT geom,full_geoid
+             FROM %s.census_name_lookup
              WHERE full_geoid IN (%s)
-             ORDER BY full_geoid""" % ', '.join("'%s'" % g for g in valid_geo_ids)
+             ORDER BY full_geoid""" % (geo_names.release, ', '.join("'%s'" % g for g in valid_geo_ids))
     in_layer = conn.ExecuteSQL(sql)
 
     in_feat = in_layer.GetNextFeature()
@@ -191,7 +180,7 @@ def create_ogr_download(session, data, table_metadata, valid_geo_ids, file_ident
             out_feat.SetGeometry(in_feat.GetGeometryRef())
         geoid = in_feat.GetField('full_geoid')
         out_feat.SetField('geoid', geoid)
-        out_feat.SetField('name', in_feat.GetField('display_name'))
+        out_feat.SetField('name', geo_names.get(geoid).display_name)
         for (table_id, table) in table_metadata.items():
             table_estimates = data[geoid][table_id]['estimate']
             table_errors = data[geoid][table_id]['error']
@@ -0,0 +1,163 @@
+"""Per-process cache of full-text search results, for as-you-type queries.
+
+Autocomplete sends "spo", "spok", "spoka" and so on, one request per
+keystroke. Results are kept per normalized query, search type and limit, so
+a repeated query is answered from memory. Profile searches also keep their
+candidate rows in the order the profile query ranks them, with each row's
+lexemes: when a longer query extends a cached one whose candidates weren't
+cut off at the candidate limit, its matches are a subset of those
+candidates, found by checking the lexemes the way to_tsquery('simple', ...)
+would. Only queries of plain lowercase words and numbers are refined;
+anything else goes to PostgreSQL, whose parser and stemmer can't be
+reproduced here.
+
+Entries expire CACHE_TTL seconds after they're stored, so results follow
+changes to search_metadata (a rebuild, or new table priorities) within that
+time; FullTextCache.clear() drops them at once.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+import re
+import threading
+import time
+from collections import OrderedDict
+
+plain_word_re = re.compile(r'^[a-z0-9]+$')
+
+# Number of result lists and of candidate lists kept, least recently used
+# dropped first
+RESULTS_CACHE_SIZE = 1024
+CANDIDATES_CACHE_SIZE = 256
+
+# Seconds a result or candidate list is kept
+CACHE_TTL = 3600
+
+# Candidate rows fetched for a profile query; more than a page of results, so
+# that lists for short prefixes are often complete and can be refined
+CANDIDATE_LIMIT = 500
+
+
+def normalize_query(q):
+    return ' '.join(q.lower().split())
+
+
+def plain_words(normalized):
+    """The words of a normalized query, or None if any of them is more than
+    letters and digits."""
+    words = normalized.split()
+    if not words or not all(plain_word_re.match(word) for word in words):
+        return None
+    return words
+
+
+def matches(words, lexemes):
+    """Whether ``lexemes`` match ``words`` as the tsquery
+    'word1 & word2 & ... & wordN:*'."""
+    (last, full_words) = (words[-1], words[:-1])
+    return (all(word in lexemes for word in full_words)
+            and any(lexeme.startswith(last) for lexeme in lexemes))
+
+
+class CandidateList(object):
+    """Rows matching a profile query, in the profile query's order, each a
+    (result, score, lexemes) tuple. ``complete`` if the query's candidate
+    limit didn't cut the list off."""
+
+    def __init__(self, rows, complete):
+        self.rows = [(result, score, frozenset(lexemes)) for (result, score, lexemes) in rows]
+        self.complete = complete
+
+    def results(self, limit, words=None):
+        """The first ``limit`` rows (those matching ``words``, if given),
+        highest score first, as result dicts with their score."""
+        rows = self.rows
+        if words is not None:
+            rows = [row for row in rows if matches(words, row[2])]
+        top = sorted(rows[:limit], key=lambda row: row[1], reverse=True)
+        return [dict(result, score=score) for (result, score, lexemes) in top]
+
+
+class LRUDict(object):
+    """Least recently used items, each dropped ``ttl`` seconds after it was
+    put."""
+
+    def __init__(self, size, ttl=CACHE_TTL, clock=time.monotonic):
+        self.size = size
+        self.ttl = ttl
+        self.clock = clock
+        self.items = OrderedDict()
+
+    def get(self, key):
+        item = self.items.get(key)
+        if item is None:
+            return None
+        (expires, value) = item
+        if self.clock() >= expires:
+            del self.items[key]
+            return None
+        self.items.move_to_end(key)
+        return value
+
+    def put(self, key, value):
+        self.items[key] = (self.clock() + self.ttl, value)
+        self.items.move_to_end(key)
+        while len(self.items) > self.size:
+            self.items.popitem(last=False)
+
+    def clear(self):
+        self.items.clear()
+
+
+class FullTextCache(object):
+    def __init__(self, results_size=RESULTS_CACHE_SIZE, candidates_size=CANDIDATES_CACHE_SIZE,
+                 ttl=CACHE_TTL, clock=time.monotonic):
+        self.results = LRUDict(results_size, ttl, clock)
+        self.candidates = LRUDict(candidates_size, ttl, clock)
+        self.lock = threading.Lock()
+
+    def clear(self):
+        """Drop every entry, e.g. after search_metadata is rebuilt."""
+        with self.lock:
+            self.results.clear()
+            self.candidates.clear()
+
+    def get(self, search_type, q, limit):
+        """Cached results for a search, or None if it has to be run. Each
+        call returns new result dicts, so callers can modify them."""
+        normalized = normalize_query(q)
+        with self.lock:
+            results = self.results.get((search_type, normalized, limit))
+            if results is None and search_type == 'profile':
+                results = self._refine(normalized, limit)
+                if results is not None:
+                    self.results.put((search_type, normalized, limit), results)
+        if results is None:
+            return None
+        return [dict(result) for result in results]
+
+    def _refine(self, normalized, limit):
+        words = plain_words(normalized)
+        if words is None:
+            return None
+        # longest cached prefix first; its candidates are the fewest to check
+        for end in range(len(normalized), 0, -1):
+            candidates = self.candidates.get(normalized[:end])
+            if candidates is None:
+                continue
+            if end == len(normalized) and (candidates.complete or limit <= len(candidates.rows)):
+                return candidates.results(limit)
+            if candidates.complete:
+                return candidates.results(limit, words)
+        return None
+
+    def put(self, search_type, q, limit, results):
+        with self.lock:
+            self.results.put((search_type, normalize_query(q), limit), [dict(result) for result in results])
+
+    def put_candidates(self, q, candidates):
+        """Keep the CandidateList for a profile query, if it can be refined."""
+        normalized = normalize_query(q)
+        if plain_words(normalized) is None:
+            return
+        with self.lock:
+            self.candidates.put(normalized, candidates)
@@ -0,0 +1,247 @@
+"""Embedded BM25 search over the rows of search_metadata.
+
+An alternative to the PostgreSQL full-text queries in full_text_search.py,
+so that search doesn't compete with data queries for the database. Each
+object type (profile, table, topic) gets its own inverted index from its
+rows' lexemes (the lexemes of their tsvector documents, each with a term
+frequency weighted by the document's A-D label weights), and queries are
+matched and ranked in memory:
+
+* Like the tsqueries they replace, every query word must match, and the
+  last one is a prefix for profiles and tables.
+* Tables and topics are indexed by English stems, which can't be computed
+  here; a query word also matches a stem it starts with (e.g. "populations"
+  matches "popul"), and English stopwords are dropped.
+* Each type's rows are cut to the limit in the order of its SQL query, and
+  the types are merged by the same score as the SQL: priority and
+  population for profiles, priority plus relevance for tables, relevance
+  for topics. A table's BM25 relevance is normalized the way ts_rank's
+  2|8|32 flags normalize the SQL's, then put on the same log scale, so
+  table scores are comparable between the backends; topic relevance is
+  scaled to [0, 1] by the best match.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+import gzip
+import heapq
+import json
+import math
+import re
+from array import array
+from bisect import bisect_left
+
+word_re = re.compile(r'[a-z0-9]+')
+
+# Sorts after any character in a lexeme, to find the end of a prefix range
+MAX_CHAR = chr(0x10ffff)
+
+# Weights of tsvector labels A-D, as in ts_rank
+LABEL_WEIGHTS = {'A': 1.0, 'B': 0.4, 'C': 0.2, 'D': 0.1}
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Shortest stem a longer query word may match
+MIN_STEM_LENGTH = 3
+
+# PostgreSQL's english stopword list
+ENGLISH_STOPWORDS = frozenset("""
+    i me my myself we our ours ourselves you your yours yourself yourselves
+    he him his himself she her hers herself it its itself they them their
+    theirs themselves what which who whom this that these those am is are was
+    were be been being have has had having do does did doing a an the and but
+    if or because as until while of at by for with about against between into
+    through during before after above below to from up down in out on off over
+    under again further then once here there when where why how all any both
+    each few more most other some such no nor not only own same so than too
+    very s t can will just don should now
+""".split())
+
+# How each object type's query matches: whether its lexemes are English
+# stems, and whether the last query word is a prefix
+TYPE_MATCHING = {
+    'profile': {'stemmed': False, 'prefix': True},
+    'table': {'stemmed': True, 'prefix': True},
+    'topic': {'stemmed': True, 'prefix': False},
+}
+SEARCH_TYPES = ('profile', 'table', 'topic')
+
+POP_US = 318857056.0
+TABLE_PRIORITY_RANGE = 100.0
+
+
+def weighted_frequencies(lexemes, weights):
+    """Term frequencies from tsvector lexemes and, for each, the labels of
+    its positions (e.g. 'AAC'; empty counts as one D position)."""
+    return dict(
+        (lexeme, sum(LABEL_WEIGHTS[label] for label in labels) if labels else LABEL_WEIGHTS['D'])
+        for (lexeme, labels) in zip(lexemes, weights))
+
+
+def profile_rank_key(row, relevance):
+    # priority ASC (NULLs last), population DESC (NULLs first), relevance DESC
+    return (row['priority'] is None, row['priority'] or 0,
+            row['population'] is not None, -(row['population'] or 0), -relevance)
+
+
+def table_rank_key(row, relevance):
+    # priority DESC (NULLs first), relevance DESC
+    return (row['priority'] is not None, -(row['priority'] or 0), -relevance)
+
+
+def topic_rank_key(row, relevance):
+    return (-relevance,)
+
+
+RANK_KEYS = {'profile': profile_rank_key, 'table': table_rank_key, 'topic': topic_rank_key}
+
+
+def ts_rank_normalized(row, relevance):
+    """Relevance divided by the document's length and by its number of
+    distinct lexemes, then mapped to [0, 1) as r / (r + 1), like
+    ts_rank(..., 2|8|32)."""
+    terms = row['terms']
+    if not terms:
+        return 0.0
+    length = max(sum(terms.values()), 1.0)
+    relevance = relevance / length / len(terms)
+    return relevance / (relevance + 1)
+
+
+def profile_score(row, relevance, best):
+    if row['static_score'] is not None:
+        return row['static_score']
+    # as in metadata_script.sql, no priority counts as the lowest
+    priority = (row['priority'] if row['priority'] is not None else 320) - 5
+    population = row['population'] or 1
+    return ((1 - priority / 315.0) * 0.8 +
+            (1 + math.log(population / POP_US) / math.log(POP_US)) * 0.2)
+
+
+def table_score(row, relevance, best):
+    # as in the SQL: relevance in [1E-9, 1E-1] has its log mapped onto [0, 1]
+    relevance = ts_rank_normalized(row, relevance)
+    return ((row['priority'] or 0) / TABLE_PRIORITY_RANGE * 2 +
+            (math.log10(max(relevance, 1E-9)) + 9) / 8.0 * 0.5)
+
+
+def topic_score(row, relevance, best):
+    # topic pages have lots of words so look more relevant
+    return relevance / best * 0.75
+
+
+SCORES = {'profile': profile_score, 'table': table_score, 'topic': topic_score}
+
+
+class BM25Index(object):
+    """Inverted index over rows of one object type, each with a ``terms``
+    dict of lexeme to weighted frequency."""
+
+    def __init__(self, rows, stemmed=False):
+        self.rows = rows
+        self.stemmed = stemmed
+        self.lengths = array('f', (sum(row['terms'].values()) for row in rows))
+        self.average_length = (sum(self.lengths) / len(rows)) if rows else 0.0
+        postings = {}
+        for (row_id, row) in enumerate(rows):
+            for (lexeme, frequency) in row['terms'].items():
+                postings.setdefault(lexeme, []).append((row_id, frequency))
+        self.lexemes = sorted(postings)
+        self.postings = {}
+        self.idf = {}
+        for (lexeme, posting) in postings.items():
+            self.postings[lexeme] = (array('I', (row_id for (row_id, _) in posting)),
+                                     array('f', (frequency for (_, frequency) in posting)))
+            self.idf[lexeme] = math.log(1 + (len(rows) - len(posting) + 0.5) / (len(posting) + 0.5))
+
+    def matching_lexemes(self, word, prefix):
+        if prefix:
+            start = bisect_left(self.lexemes, word)
+            end = bisect_left(self.lexemes, word + MAX_CHAR, start)
+            found = self.lexemes[start:end]
+        else:
+            found = [word] if word in self.postings else []
+        if self.stemmed:
+            found.extend(word[:length] for length in range(MIN_STEM_LENGTH, len(word))
+                         if word[:length] in self.postings)
+        return found
+
+    def search(self, words, prefix=False):
+        """BM25 relevance of the rows matching every word (the last as a
+        prefix, if ``prefix``), as a dict of row id to score."""
+        scores = None
+        for (i, word) in enumerate(words):
+            word_scores = {}
+            for lexeme in self.matching_lexemes(word, prefix and i == len(words) - 1):
+                idf = self.idf[lexeme]
+                (row_ids, frequencies) = self.postings[lexeme]
+                for (row_id, frequency) in zip(row_ids, frequencies):
+                    if scores is not None and row_id not in scores:
+                        continue
+                    norm = BM25_K1 * (1 - BM25_B + BM25_B * self.lengths[row_id] / self.average_length)
+                    score = idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+                    if score > word_scores.get(row_id, 0.0):
+                        word_scores[row_id] = score
+            if scores is None:
+                scores = word_scores
+            else:
+                scores = dict((row_id, scores[row_id] + score) for (row_id, score) in word_scores.items())
+            if not scores:
+                break
+        return scores or {}
+
+
+class FullTextIndex(object):
+    """BM25 indexes over search_metadata rows. Rows are dicts with ``type``,
+    the fields of their type's search results, ``priority``, ``population``,
+    ``static_score`` and ``terms``."""
+
+    def __init__(self, rows):
+        self.rows = rows
+        by_type = dict((search_type, []) for search_type in SEARCH_TYPES)
+        for row in rows:
+            if row['type'] in by_type:
+                by_type[row['type']].append(row)
+        self.indexes = dict(
+            (search_type, BM25Index(type_rows, TYPE_MATCHING[search_type]['stemmed']))
+            for (search_type, type_rows) in by_type.items())
+
+    def search_type(self, search_type, q, limit):
+        """The top ``limit`` rows of one type in its SQL query's order, as
+        (row, score) pairs."""
+        index = self.indexes[search_type]
+        words = word_re.findall(q.lower())
+        if index.stemmed:
+            words = [word for word in words if word not in ENGLISH_STOPWORDS]
+        if not words:
+            return []
+        relevances = index.search(words, TYPE_MATCHING[search_type]['prefix'])
+        if not relevances:
+            return []
+        best = max(relevances.values())
+        rank_key = RANK_KEYS[search_type]
+        score = SCORES[search_type]
+        top = heapq.nsmallest(
+            limit, relevances.items(),
+            key=lambda item: rank_key(index.rows[item[0]], item[1]) + (item[0],))
+        return [(index.rows[row_id], score(index.rows[row_id], relevance, best)) for (row_id, relevance) in top]
+
+    def search(self, q, search_type, limit):
+        """Rows for a full-text search as (row, score) pairs, highest score
+        first, like perform_full_text_search."""
+        search_types = SEARCH_TYPES if search_type == 'all' else (search_type,)
+        results = []
+        for object_type in search_types:
+            if object_type in self.indexes:
+                results.extend(self.search_type(object_type, q, limit))
+        results.sort(key=lambda result: result[1], reverse=True)
+        return results[:limit]
+
+    def save(self, filename):
+        with gzip.open(filename, 'wt') as f:
+            json.dump(self.rows, f)
+
+    @classmethod
+    def load(cls, filename):
+        with gzip.open(filename, 'rt') as f:
+            return cls(json.load(f))
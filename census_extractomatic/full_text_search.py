@@ -1,128 +1,148 @@
-from math import log10, log
 from sqlalchemy import text
 import re
 
-def do_search(db, q, object_type, limit):
-    """ Search for objects (profiles, tables, topics) matching query q.
+from census_extractomatic.fts_cache import CANDIDATE_LIMIT, CandidateList, FullTextCache, normalize_query, plain_words
+from census_extractomatic.fts_index import FullTextIndex, weighted_frequencies
+
+# Each object type's search keeps its own ordering and limit, as it did when
+# they were separate queries, and adds the ranking score used to merge them.
+# All three select the same columns, filling in NULL for the other types', so
+# they can be combined with UNION ALL into a single query.
+SEARCH_SQL = {
+    'profile': """SELECT type, display_name, sumlevel, sumlevel_name, full_geoid,
+                         NULL AS tabulation_code, NULL AS table_title, NULL AS topics,
+                         NULL AS simple_table_title, NULL AS tables, NULL AS topic_name, NULL AS url,
+                         relevance,
+                         -- Profiles rank on priority and population alone,
+                         -- precomputed by metadata_script.sql
+                         COALESCE(static_score, 0) AS score
+                  FROM (SELECT text1 AS display_name,
+                               text2 AS sumlevel,
+                               text3 AS sumlevel_name,
+                               text4 AS full_geoid,
+                               static_score,
+                               ts_rank(document, to_tsquery('simple', :search_term)) AS relevance,
+                               type
+                        FROM search_metadata
+                        WHERE document @@ to_tsquery('simple', :search_term)
+                        AND type = 'profile'
+                        ORDER BY priority ASC,
+                                 population DESC,
+                                 relevance DESC
+                        LIMIT :limit) profiles""",
+
+    'table': """SELECT type, NULL AS display_name, NULL AS sumlevel, NULL AS sumlevel_name, NULL AS full_geoid,
+                       tabulation_code, table_title, topics, simple_table_title, tables,
+                       NULL AS topic_name, NULL AS url,
+                       relevance,
+                       -- Tables; static_score holds the priority part. The
+                       -- PostgreSQL relevance appears to always be in
+                       -- [1E-8, 1E-2]; generalized to [1E-9, 1E-1], its log
+                       -- is mapped onto [0, 1].
+                       COALESCE(static_score, 0) +
+                       (log(GREATEST(relevance, 1E-9)) + 9) / 8.0 * 0.5 AS score
+                FROM (SELECT text1 AS tabulation_code,
+                             text2 AS table_title,
+                             text3 AS topics,
+                             text4 AS simple_table_title,
+                             text5 AS tables,
+                             priority,
+                             static_score,
+                             ts_rank(document, to_tsquery(:search_term), 2|8|32) AS relevance,
+                             type
+                      FROM search_metadata
+                      WHERE document @@ to_tsquery(:search_term)
+                      AND type = 'table'
+                      ORDER BY priority DESC, relevance DESC
+                      LIMIT :limit) tables""",
+
+    'topic': """SELECT type, NULL AS display_name, NULL AS sumlevel, NULL AS sumlevel_name, NULL AS full_geoid,
+                       NULL AS tabulation_code, NULL AS table_title, NULL AS topics,
+                       NULL AS simple_table_title, NULL AS tables, topic_name, url,
+                       relevance,
+                       -- Topic pages have lots of words, so look more relevant
+                       relevance * 0.75 AS score
+                FROM (SELECT text1 as topic_name,
+                             text3 as url,
+                             ts_rank(document, plainto_tsquery(:search_term)) AS relevance,
+                             type
+                      FROM search_metadata
+                      WHERE document @@ plainto_tsquery(:search_term)
+                      AND type = 'topic'
+                      ORDER BY relevance DESC
+                      LIMIT :limit) topics""",
+}
+
+SEARCH_TYPES = ('profile', 'table', 'topic')
+
+# Profile search rows for the as-you-type cache, in the order of the profile
+# branch above, with their lexemes so longer queries can be matched in memory.
+PROFILE_CANDIDATES_SQL = """SELECT text1 AS display_name,
+                                   text2 AS sumlevel,
+                                   text3 AS sumlevel_name,
+                                   text4 AS full_geoid,
+                                   static_score AS score,
+                                   tsvector_to_array(document) AS lexemes,
+                                   type
+                            FROM search_metadata
+                            WHERE document @@ to_tsquery('simple', :search_term)
+                            AND type = 'profile'
+                            ORDER BY priority ASC,
+                                     population DESC,
+                                     ts_rank(document, to_tsquery('simple', :search_term)) DESC
+                            LIMIT :limit;"""
+
+fts_cache = FullTextCache()
+
+# Every search_metadata row with its lexemes and their position labels, for
+# the embedded search index (see fts_index.py)
+FULL_TEXT_INDEX_SQL = """SELECT type, text1, text2, text3, text4, text5,
+                               priority, population, static_score,
+                               ARRAY(SELECT lexeme FROM unnest(document)) AS lexemes,
+                               ARRAY(SELECT array_to_string(weights, '') FROM unnest(document)) AS weights
+                        FROM search_metadata;"""
+
+# The result fields held in text1 to text5 for each object type, as named by
+# the queries in SEARCH_SQL
+TEXT_FIELDS = {
+    'profile': ('display_name', 'sumlevel', 'sumlevel_name', 'full_geoid'),
+    'table': ('tabulation_code', 'table_title', 'topics', 'simple_table_title', 'tables'),
+    'topic': ('topic_name', None, 'url'),
+}
+
+
+def build_full_text_index(db):
+    """ Read search_metadata into an embedded FullTextIndex. """
+
+    rows = []
+    for row in db.session.execute(text(FULL_TEXT_INDEX_SQL)).mappings():
+        if row['type'] not in TEXT_FIELDS:
+            continue
+        indexed = {
+            'type': row['type'],
+            'priority': row['priority'],
+            'population': row['population'],
+            'static_score': row['static_score'],
+            'terms': weighted_frequencies(row['lexemes'], row['weights']),
+        }
+        for (i, field) in enumerate(TEXT_FIELDS[row['type']], 1):
+            if field:
+                indexed[field] = row['text%d' % i]
+        rows.append(indexed)
+    return FullTextIndex(rows)
 
-    Return a list, because it's easier to work with than a SQLAlchemy
-    ResultProxy object (notably, the latter does not support indexing).
-    """
 
-    if object_type == 'profile':
-        query = """SELECT text1 AS display_name,
-                            text2 AS sumlevel,
-                            text3 AS sumlevel_name,
-                            text4 AS full_geoid,
-                            text5 AS population,
-                            text6 AS priority,
-                            ts_rank(document, to_tsquery('simple', :search_term)) AS relevance,
-                            type
-                    FROM search_metadata
-                    WHERE document @@ to_tsquery('simple', :search_term)
-                    AND type = 'profile'
-                    ORDER BY CAST(text6 as INT) ASC,
-                                CAST(text5 as INT) DESC,
-                                relevance DESC
-                    LIMIT :limit;"""
-
-    elif object_type == 'table':
-        query = """SELECT text1 AS tabulation_code,
-                            text2 AS table_title,
-                            text3 AS topics,
-                            text4 AS simple_table_title,
-                            text5 AS tables,
-                            cast(text6 AS INT) AS priority,
-                            ts_rank(document, to_tsquery(:search_term), 2|8|32) AS relevance,
-                            type
-                    FROM search_metadata
-                    WHERE document @@ to_tsquery(:search_term)
-                    AND type = 'table'
-                    ORDER BY priority DESC, relevance DESC
-                    LIMIT :limit;"""
-
-    elif object_type == 'topic':
-        query = """SELECT text1 as topic_name,
-                            text3 as url,
-                            ts_rank(document, plainto_tsquery(:search_term)) AS relevance,
-                            type
-                    FROM search_metadata
-                    WHERE document @@ plainto_tsquery(:search_term)
-                    AND type = 'topic'
-                    ORDER BY relevance DESC
-                    LIMIT :limit;"""
-
-    objects = db.execute(text(query), {"search_term": q, "limit": limit})
-    return [row for row in objects.mappings().all()]
-
-def compute_score(row):
-    """ Compute a ranking score in range [0, 1] from a row result.
-
-    params: row - SQLAlchemy RowProxy object, which is returned by queries
-    return: score in range [0, 1]
-    """
+def search_sql(search_type):
+    """ Return one query searching the object types for search_type ('all'
+    for every type), ranked by score across types. """
+
+    object_types = SEARCH_TYPES if search_type == 'all' else (search_type,)
+    branches = '\nUNION ALL\n'.join('(%s)' % SEARCH_SQL[object_type] for object_type in object_types)
+    return """SELECT *
+              FROM (%s) results
+              ORDER BY score DESC
+              LIMIT :limit;""" % branches
 
-    object_type = row['type']
-
-    # Topics; set somewhat-arbitrary cutoff for PSQL relevance, above which
-    # the result should appear first, and below which it should simply be
-    # multiplied by some amount to make it appear slightly higher
-
-    if object_type == 'topic':
-        relevance = row['relevance']
-        return relevance * .75 # topic pages have lots of words so look more relevant
-
-    # Tables; take the PSQL relevance score, which (from our testing)
-    # appears to always be in the range [1E-8, 1E-2]. For safety, we
-    # generalize that to [1E-9, 1E-1] (factor of 10 on each side).
-    #
-    # The log sends [1E-9, 1E-1] to [-9, -1]; add 9 to send it to [0, 8];
-    # divide by 8 to send it to [0, 1].
-
-    elif object_type == 'table':
-        relevance = (log10(row['relevance']) + 9) / 8.0
-        TABLE_PRIORITY_RANGE = 100
-        try:
-            raw_priority = row['priority'] if row['priority'] else 0
-        except KeyError:
-            raw_priority = 0
-        priority = raw_priority / TABLE_PRIORITY_RANGE
-        score = priority * 2 + relevance * 0.5
-        return score
-
-    # Profiles; compute score based off priority and population. In
-    # general, larger, more populous areas should be returned first.
-
-    elif object_type == 'profile':
-        priority = row['priority']
-        population = row['population']
-
-        # Priority bounds are 5 (nation) to 320 (whatever the smallest one
-        # is), so the actual range is the difference, 315.
-        PRIORITY_RANGE = 320.0 - 5
-
-        # Approximate value, but realistically it shouldn't matter much.
-        POP_US = 318857056.0
-
-        # Make population nonzero (catch both empty string and string '0')
-        if not population or not int(population):
-            population = 1
-
-        priority, population = int(priority), int(population)
-
-        # Decrement priority by 5, to map [5, 320] to [0, 315].
-        priority -= 5
-
-        # Since priority is now in [0, 315], and PRIORITY_RANGE = 315, the
-        # function (1 - priority / PRIORITY_RANGE) sends 0 -> 0, 315 -> 1.
-        # Similarly, the second line incorporating population maps the range
-        # [0, max population] to [0, 1].
-        #
-        # We weight priority more than population, because from testing it
-        # gives the most relevant results; the 0.8 and 0.2 can be tweaked
-        # so long as they add up to 1.
-        return ((1 - priority / PRIORITY_RANGE) * 0.8 +
-                (1 + log(population / POP_US) / log(POP_US)) * 0.2)
 
 def choose_table(tables):
     """ Choose a representative table for a list of table_ids.
@@ -208,44 +228,50 @@ def process_fulltext_result(row):
     return result
 
 
-def perform_full_text_search(db, q, search_type, limit):
+def perform_full_text_search(db, q, search_type, limit, index=None):
     # Support choice of 'search type' as returning table results, profile
-    # results, topic results, or all. Only the needed queries will get
-    # executed; e.g., for a profile search, the profiles list will be filled
-    # but tables and topics will be empty.
+    # results, topic results, or all. Only the needed object types are
+    # searched; e.g., for a profile search, only profiles are returned.
+    # Scoring and merging happen in the database, in a single query, or in
+    # the embedded FullTextIndex if one is given.
+    if search_type != 'all' and search_type not in SEARCH_SQL:
+        return []
+
+    if index is not None:
+        prepared_result = []
+        for (row, score) in index.search(q, search_type, limit):
+            processed = process_fulltext_result(row)
+            processed['score'] = score
+            prepared_result.append(processed)
+        return prepared_result
+
+    cached = fts_cache.get(search_type, q, limit)
+    if cached is not None:
+        return cached
 
     # Build query by replacing apostrophes with spaces, separating words
     # with '&', and adding a wildcard character to support prefix matching.
-    q = ' & '.join(q.split())
-    q += ':*'
-
-    profiles, tables, topics = [], [], []
-
-    if search_type == 'profile' or search_type == 'all':
-        profiles = do_search(db.session, q, 'profile', limit)
-
-    if search_type == 'table' or search_type == 'all':
-        tables = do_search(db.session, q, 'table', limit)
-
-    if search_type == 'topic' or search_type == 'all':
-        topics = do_search(db.session, q, 'topic', limit)
-
-    # Compute ranking scores of each object that we want to return
-    results = []
-
-    for row in profiles + tables + topics:
-        results.append((row, compute_score(row)))
-
-    # Sort by second entry (score), descending; the lambda pulls the second
-    # element of a tuple.
-    results = sorted(results, key=lambda x: x[1], reverse=True)
-
-    # Format of results is a list of tuples, with each tuple being a profile
-    # or table followed by its score. The profile or table is then result[0].
-    prepared_result = []
-
-    for result in results[:limit]:
-        processed = process_fulltext_result(result[0])
-        processed['score'] = result[1]
-        prepared_result.append(processed)
+    search_term = ' & '.join(q.split())
+    search_term += ':*'
+
+    if search_type == 'profile' and plain_words(normalize_query(q)):
+        # Fetch more than asked for, so that longer queries typed after
+        # this one can be answered from the candidates
+        candidate_limit = max(CANDIDATE_LIMIT, limit)
+        rows = db.session.execute(text(PROFILE_CANDIDATES_SQL),
+                                  {"search_term": search_term, "limit": candidate_limit}).mappings().all()
+        candidates = CandidateList(
+            [(process_fulltext_result(row), row['score'], row['lexemes']) for row in rows],
+            len(rows) < candidate_limit)
+        fts_cache.put_candidates(q, candidates)
+        prepared_result = candidates.results(limit)
+    else:
+        results = db.session.execute(text(search_sql(search_type)), {"search_term": search_term, "limit": limit})
+        prepared_result = []
+        for row in results.mappings().all():
+            processed = process_fulltext_result(row)
+            processed['score'] = row['score']
+            prepared_result.append(processed)
+
+    fts_cache.put(search_type, q, limit, prepared_result)
     return prepared_result
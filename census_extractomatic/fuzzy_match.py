@@ -0,0 +1,133 @@
+"""Typo-tolerant correction of search terms.
+
+A FuzzyIndex holds the vocabulary of words in a set of titles or names, with a
+trigram index over the words. A misspelled query word is corrected to the
+closest vocabulary words: candidates are the words sharing enough trigrams
+with it (k edits can destroy at most 3k of a word's trigrams, or 4k when
+swapping adjacent letters),
+and each candidate is verified with an edit distance computation that gives up
+as soon as the distance exceeds the bound. Searches then run again with the
+corrected query.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+import re
+import time
+from bisect import bisect_left
+from collections import Counter
+
+word_re = re.compile(r'[a-z0-9]+')
+
+# Words shorter than this aren't corrected; too many words are one edit away.
+MIN_WORD_LENGTH = 4
+
+# Longest a correction may spend verifying candidates, in seconds.
+TIME_BUDGET = 0.05
+
+
+def padded_trigrams(word):
+    padded = '$%s$' % word
+    return set(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def max_distance(word):
+    return 1 if len(word) < 8 else 2
+
+
+def bounded_edit_distance(a, b, bound):
+    """Edit distance between ``a`` and ``b``, counting a swap of adjacent
+    letters as one edit, or None if it's more than ``bound``."""
+    if abs(len(a) - len(b)) > bound:
+        return None
+    before = None
+    previous = list(range(len(b) + 1))
+    for (i, ca) in enumerate(a, 1):
+        current = [i]
+        for (j, cb) in enumerate(b, 1):
+            distance = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (ca != cb),
+            )
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                distance = min(distance, before[j - 2] + 1)
+            current.append(distance)
+        # a swap can skip a row, so give up only when two rows are over
+        if min(current) > bound and min(previous) > bound:
+            return None
+        (before, previous) = (previous, current)
+    return previous[-1] if previous[-1] <= bound else None
+
+
+class FuzzyIndex(object):
+    """Vocabulary of the lowercased words in ``texts``."""
+
+    def __init__(self, texts):
+        self.frequency = Counter()
+        for text in texts:
+            if text:
+                self.frequency.update(word_re.findall(text.lower()))
+        self.words = sorted(self.frequency)
+        self.postings = {}
+        for word in self.words:
+            for gram in padded_trigrams(word):
+                self.postings.setdefault(gram, []).append(word)
+
+    def __contains__(self, word):
+        return word in self.frequency
+
+    def is_prefix(self, prefix):
+        """Whether any vocabulary word starts with ``prefix``."""
+        position = bisect_left(self.words, prefix)
+        return position < len(self.words) and self.words[position].startswith(prefix)
+
+    def suggest(self, word, limit=5, deadline=None):
+        """Up to ``limit`` vocabulary words within max_distance(word) edits,
+        closest and most frequent first. Stops verifying at ``deadline``
+        (a time.monotonic() value) and returns what it has."""
+        word = word.lower()
+        if len(word) < MIN_WORD_LENGTH:
+            return []
+        bound = max_distance(word)
+        grams = padded_trigrams(word)
+        shared = Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        required = len(grams) - 4 * bound
+
+        matches = []
+        for (candidate, count) in shared.most_common():
+            if count < required:
+                break
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            distance = bounded_edit_distance(word, candidate, bound)
+            if distance is not None:
+                matches.append((distance, -self.frequency[candidate], candidate))
+        return [candidate for (distance, _, candidate) in sorted(matches)[:limit]]
+
+    def correct(self, query, prefix_last=False, time_budget=TIME_BUDGET):
+        """Return ``query`` lowercased with each unknown word replaced by its
+        best suggestion, or None if nothing could be corrected. With
+        ``prefix_last``, a final word that starts some vocabulary word is
+        taken as an unfinished word and left alone."""
+        deadline = time.monotonic() + time_budget
+        query = query.lower()
+        last_word_end = max([m.end() for m in word_re.finditer(query)] or [None])
+        corrected = False
+
+        def replace(match):
+            nonlocal corrected
+            word = match.group(0)
+            if word in self:
+                return word
+            if prefix_last and match.end() == last_word_end and self.is_prefix(word):
+                return word
+            suggestions = self.suggest(word, limit=1, deadline=deadline)
+            if not suggestions:
+                return word
+            corrected = True
+            return suggestions[0]
+
+        result = word_re.sub(replace, query)
+        return result if corrected else None
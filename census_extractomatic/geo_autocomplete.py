@@ -0,0 +1,128 @@
+"""In-memory prefix autocomplete for geography names.
+
+Built once per process from census_name_lookup, this answers the text queries
+of /1.0/geo/search without asking PostgreSQL. Every prefix_match_name is
+lowercased and kept in one sorted list, so the names starting with a prefix
+are a contiguous range found by bisection. Ranking follows the SQL it
+replaces (priority, then population descending, NULLs last); for prefixes
+matching more than PRECOMPUTE_MIN_RANGE names the top results are computed at
+build time, overall and per summary level, so short prefixes like "s" cost no
+more than long ones.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+import heapq
+from bisect import bisect_left, bisect_right
+
+from census_extractomatic.fuzzy_match import FuzzyIndex
+
+RESULT_COLUMNS = ('geoid', 'sumlevel', 'population', 'display_name', 'full_geoid', 'priority')
+RESULT_LIMIT = 25
+
+# Prefix ranges larger than this get their rankings precomputed; smaller ones
+# are ranked on the fly, which is cheap at this size.
+PRECOMPUTE_MIN_RANGE = 256
+
+# Sorts after any character in a lowercased name, to find the end of a prefix range
+MAX_CHAR = chr(0x10ffff)
+
+
+def rank_key(entry):
+    (geoid, sumlevel, population, display_name, full_geoid, priority) = entry
+    return (priority is None, priority or 0, population is None, -(population or 0), full_geoid)
+
+
+class GeoAutocomplete(object):
+    """Prefix index over rows with the RESULT_COLUMNS plus prefix_match_name."""
+
+    def __init__(self, rows, limit=RESULT_LIMIT, precompute_min_range=PRECOMPUTE_MIN_RANGE):
+        self.limit = limit
+        self.entries = []
+        entry_ids = {}
+        names = []
+        for row in rows:
+            if not row['prefix_match_name'] or not row['display_name']:
+                continue
+            if 'not defined' in row['display_name'].lower():
+                continue
+            entry = tuple(row[column] for column in RESULT_COLUMNS)
+            entry_id = entry_ids.get(entry)
+            if entry_id is None:
+                entry_id = entry_ids[entry] = len(self.entries)
+                self.entries.append(entry)
+            names.append((row['prefix_match_name'].lower(), entry_id))
+        names.sort()
+        self.names = [name for (name, entry_id) in names]
+        self.name_entries = [entry_id for (name, entry_id) in names]
+
+        # Rank as a plain int per entry, so ranking compares ints rather than tuples
+        order = sorted(range(len(self.entries)), key=lambda i: rank_key(self.entries[i]))
+        self.rank = [0] * len(self.entries)
+        for (position, entry_id) in enumerate(order):
+            self.rank[entry_id] = position
+
+        self.top = {}
+        self._precompute(precompute_min_range)
+        self._fuzzy = None
+
+    @property
+    def fuzzy(self):
+        """FuzzyIndex over the words of the names, built on first use."""
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex(self.names)
+        return self._fuzzy
+
+    def _prefix_range(self, prefix, lo=0, hi=None):
+        if hi is None:
+            hi = len(self.names)
+        start = bisect_left(self.names, prefix, lo, hi)
+        end = bisect_right(self.names, prefix + MAX_CHAR, start, hi)
+        return (start, end)
+
+    def _rank_range(self, start, end, sumlevs=None):
+        entry_ids = set(self.name_entries[start:end])
+        if sumlevs is not None:
+            entry_ids = [i for i in entry_ids if self.entries[i][1] in sumlevs]
+        return heapq.nsmallest(self.limit, entry_ids, key=self.rank.__getitem__)
+
+    def _precompute(self, min_range):
+        # Walk down from the empty prefix; only ranges above min_range can
+        # contain sub-ranges above min_range, so the walk stays small.
+        stack = [('', 0, len(self.names))]
+        while stack:
+            (prefix, start, end) = stack.pop()
+            if end - start <= min_range:
+                continue
+
+            by_sumlevel = {}
+            for entry_id in set(self.name_entries[start:end]):
+                by_sumlevel.setdefault(self.entries[entry_id][1], []).append(entry_id)
+            top = {None: self._rank_range(start, end)}
+            for (sumlevel, entry_ids) in by_sumlevel.items():
+                top[sumlevel] = heapq.nsmallest(self.limit, entry_ids, key=self.rank.__getitem__)
+            self.top[prefix] = top
+
+            length = len(prefix)
+            position = start
+            while position < end and len(self.names[position]) == length:
+                position += 1
+            while position < end:
+                child = self.names[position][:length + 1]
+                child_end = self._prefix_range(child, position, end)[1]
+                stack.append((child, position, child_end))
+                position = child_end
+
+    def search(self, q, sumlevs=None):
+        """Return up to ``limit`` result dicts for names starting with ``q``,
+        optionally restricted to a collection of summary levels."""
+        prefix = q.lower()
+        top = self.top.get(prefix)
+        if top is None:
+            (start, end) = self._prefix_range(prefix)
+            entry_ids = self._rank_range(start, end, set(sumlevs) if sumlevs else None)
+        elif sumlevs:
+            lists = [top[sumlevel] for sumlevel in set(sumlevs) if sumlevel in top]
+            entry_ids = list(heapq.merge(*lists, key=self.rank.__getitem__))[:self.limit]
+        else:
+            entry_ids = top[None]
+        return [dict(zip(RESULT_COLUMNS, self.entries[entry_id])) for entry_id in entry_ids]
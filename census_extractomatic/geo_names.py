@@ -0,0 +1,41 @@
+"""In-memory geography names and attributes for a TIGER release.
+
+Loaded once per process from census_name_lookup, so endpoints that only need
+to label geoids (data show, downloads, the exporters, /1.0/geo/<release>/names)
+don't query the database for them.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+from collections import OrderedDict, namedtuple
+
+NAME_COLUMNS = ('full_geoid', 'display_name', 'sumlevel', 'population', 'aland', 'awater')
+
+GeoName = namedtuple('GeoName', NAME_COLUMNS[1:])
+
+
+class GeoNames(object):
+    """Mapping of full geoid to GeoName, built from rows with the NAME_COLUMNS."""
+
+    def __init__(self, release, rows):
+        self.release = release
+        self.names = {}
+        for row in rows:
+            self.names[row['full_geoid']] = GeoName(*(row[column] for column in NAME_COLUMNS[1:]))
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, geoid):
+        return geoid in self.names
+
+    def get(self, geoid):
+        return self.names.get(geoid)
+
+    def lookup(self, geoids):
+        """Return an OrderedDict of geoid -> GeoName for the known geoids,
+        sorted by geoid."""
+        return OrderedDict(
+            (geoid, self.names[geoid])
+            for geoid in sorted(set(geoids))
+            if geoid in self.names
+        )
@@ -7,6 +7,12 @@ Using American Community Survey Data: What All Data Users Need to Know".
 """
 import math
 
+try:
+    import numpy as np
+except ImportError:
+    # only aggregate_counts needs NumPy
+    np = None
+
 
 def aggregate_count(estimates, moes, weights=None):
     """Aggregate (sum) a set of count estimates and propagate their MoE.
@@ -44,6 +50,31 @@ def aggregate_count(estimates, moes, weights=None):
     return total, moe
 
 
+def aggregate_counts(estimates, moes, weights, present):
+    """aggregate_count for many columns at once, with NumPy.
+
+    ``estimates`` and ``moes`` are (components x columns) float arrays,
+    ``weights`` has one weight per component, and ``present`` is a boolean
+    array of the cells to aggregate; the others are left out whatever they
+    hold. Sums run over the components in order, as aggregate_count's do, so
+    each column comes out the same as aggregate_count of its present cells.
+
+    Returns a (estimates, moes) tuple of arrays, one value per column.
+    """
+    weights = np.asarray(weights, dtype=float)[:, np.newaxis]
+    # reducing over the outer axis adds row by row, not pairwise
+    total = np.add.reduce(np.where(present, weights * estimates, 0.0), axis=0)
+
+    scaled_moes = weights * moes
+    zero = present & (estimates == 0)
+    nonzero = present & ~zero
+    squares = np.add.reduce(np.where(nonzero, scaled_moes * scaled_moes, 0.0), axis=0)
+    # zero-estimate rule: only the largest zero-estimate MoE is kept, added last
+    zero_max = np.where(zero, scaled_moes, -np.inf).max(axis=0, initial=-np.inf)
+    squares = squares + np.where(zero.any(axis=0), zero_max * zero_max, 0.0)
+    return total, np.sqrt(squares)
+
+
 def derived_ratio(num, num_moe, den, den_moe):
     """MoE of a ratio R = num / den where num is NOT a subset of den.
 
@@ -0,0 +1,57 @@
+"""Single-flight computation of cached values.
+
+When many requests miss the cache for the same key at once (a map pan asks
+every worker for the same uncached tile), only the request that wins a
+short-lived lock in the cache backend computes the value; the rest poll the
+cache until it appears. ``cache.add`` is atomic on the shared backends we use
+(Redis SETNX, memcached add), which is what makes the lock work across
+gunicorn workers.
+
+The cache is passed in, so this has no Flask dependency and can be
+unit-tested in isolation.
+"""
+import logging
+import time
+
+logger = logging.getLogger('gunicorn.error')
+
+# Longest a computation may hold the lock before another request may take over.
+LOCK_TIMEOUT = 60
+# Longest a request waits for someone else's computation before doing it itself.
+WAIT_TIMEOUT = 30
+POLL_INTERVAL = 0.05
+
+
+def get_or_compute(cache, key, compute, timeout=None,
+                   lock_timeout=LOCK_TIMEOUT, wait_timeout=WAIT_TIMEOUT, poll_interval=POLL_INTERVAL):
+    """Return the cached value for ``key``, calling ``compute()`` to fill it on
+    a miss. Concurrent misses for the same key wait for a single computation.
+    ``timeout`` is passed through to ``cache.set``."""
+    value = cache.get(key)
+    if value is not None:
+        return value
+
+    lock_key = key + '.lock'
+    if not cache.add(lock_key, 1, timeout=lock_timeout):
+        deadline = time.monotonic() + wait_timeout
+        while time.monotonic() < deadline:
+            time.sleep(poll_interval)
+            value = cache.get(key)
+            if value is not None:
+                return value
+            if cache.get(lock_key) is None:
+                # the other computation finished without caching a value
+                # (it failed, or the value couldn't be cached); try ourselves
+                break
+        if not cache.add(lock_key, 1, timeout=lock_timeout):
+            return compute()
+
+    try:
+        value = compute()
+        try:
+            cache.set(key, value, timeout=timeout)
+        except Exception as e:
+            logger.warning('Skipping cache set for {} because {}'.format(key, e.args))
+        return value
+    finally:
+        cache.delete(lock_key)
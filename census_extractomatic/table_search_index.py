@@ -0,0 +1,192 @@
+"""In-memory search over the table metadata of an ACS release.
+
+Built once per process and release from census_tabulation_metadata,
+census_table_metadata and census_column_metadata, this answers
+/1.0/table/search without SQL. Titles are matched as case-insensitive
+substrings, like the ``LIKE '%q%'`` queries it replaces: a trigram inverted
+index narrows the candidates to titles containing every trigram of the query,
+and each candidate is then checked. Rows are kept in the order the endpoint
+returns them (tabulations by weight, columns by table id), so results come
+out already sorted.
+
+Filters are combined as bitmaps over those rows, held in Python ints: each
+topic has a precomputed bitmap, so filtering on several topics (like
+``topics @> :topics``) is a bitwise AND.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+from bisect import bisect_left, bisect_right
+
+from census_extractomatic.fuzzy_match import FuzzyIndex
+
+# Sorts after any character in a lowercased table id, to find the end of a prefix range
+MAX_CHAR = chr(0x10ffff)
+
+
+def trigrams(text):
+    return set(text[i:i + 3] for i in range(len(text) - 2))
+
+
+def positions_to_mask(positions, size):
+    """Bitmap with the bits at ``positions`` set."""
+    bits = bytearray((size + 7) // 8)
+    for p in positions:
+        bits[p >> 3] |= 1 << (p & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def mask_to_positions(mask, size):
+    """Ascending positions of the bits set in ``mask``."""
+    positions = []
+    for (byte_index, byte) in enumerate(mask.to_bytes((size + 7) // 8, 'little')):
+        if byte:
+            base = byte_index << 3
+            positions.extend(base + bit for bit in range(8) if byte & (1 << bit))
+    return positions
+
+
+class TitleIndex(object):
+    """Rows plus a trigram index over one lowercased title field."""
+
+    def __init__(self, rows, title_field):
+        self.rows = rows
+        self.size = len(rows)
+        self.all_mask = (1 << self.size) - 1
+        self.titles = [(row[title_field] or '').lower() for row in rows]
+        self.postings = {}
+        for (position, title) in enumerate(self.titles):
+            for trigram in trigrams(title):
+                self.postings.setdefault(trigram, []).append(position)
+
+        topic_positions = {}
+        for (position, row) in enumerate(rows):
+            for topic in set(row['topics'] or []):
+                topic_positions.setdefault(topic, []).append(position)
+        self.topic_masks = dict(
+            (topic, positions_to_mask(positions, self.size))
+            for (topic, positions) in topic_positions.items()
+        )
+
+    def _candidates(self, q):
+        grams = trigrams(q)
+        if not grams:
+            # too short to index; check every title
+            return range(len(self.rows))
+        postings = sorted((self.postings.get(gram, []) for gram in grams), key=len)
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                break
+        return sorted(candidates)
+
+    def topic_mask(self, topics):
+        mask = self.all_mask
+        for topic in set(topics):
+            mask &= self.topic_masks.get(topic, 0)
+        return mask
+
+    def mask(self, q=None, topics=None):
+        """Bitmap of rows whose title contains ``q`` (every row if it's None)
+        and whose topics include all of ``topics``."""
+        mask = self.topic_mask(topics) if topics else self.all_mask
+        if q is not None and mask:
+            q = q.lower()
+            # check titles only for rows the topics allow
+            allowed = mask.to_bytes((self.size + 7) // 8, 'little')
+            mask = positions_to_mask(
+                (p for p in self._candidates(q)
+                 if allowed[p >> 3] & (1 << (p & 7)) and q in self.titles[p]),
+                self.size)
+        return mask
+
+    def rows_for(self, mask):
+        return [self.rows[p] for p in mask_to_positions(mask, self.size)]
+
+    def search(self, q=None, topics=None):
+        """Rows matching ``mask(q, topics)``, in their original order."""
+        return self.rows_for(self.mask(q, topics))
+
+
+class TableSearchIndex(object):
+    """Search over one release's tabulations, tables and columns.
+
+    ``tabulations`` rows need tabulation_code, table_title, simple_table_title,
+    universe, topics, weight and the tables_in_*_yr lists; ``tables`` rows need
+    table_id, table_title, simple_table_title, universe and topics;
+    ``columns`` rows need column_id and column_title plus those table fields.
+    """
+
+    def __init__(self, tabulations, tables, columns):
+        tabulation_rows = []
+        for tabulation in tabulations:
+            tabulation = dict(tabulation)
+            for tables_for_release_col in ('tables_in_one_yr', 'tables_in_three_yr', 'tables_in_five_yr'):
+                if tabulation[tables_for_release_col]:
+                    tabulation['table_id'] = tabulation[tables_for_release_col][0]
+                    break
+            else:
+                tabulation['table_id'] = None
+            tabulation_rows.append(tabulation)
+        # weight DESC, which puts NULLs first in PostgreSQL
+        tabulation_rows.sort(key=lambda t: (t['weight'] is not None, -(t['weight'] or 0), t['tabulation_code']))
+        self.tabulations = TitleIndex(tabulation_rows, 'table_title')
+
+        column_rows = sorted(
+            (dict(column) for column in columns),
+            key=lambda c: (c['table_id'] is None, len(c['table_id'] or ''), c['table_id'] or '', c['column_id']))
+        self.columns = TitleIndex(column_rows, 'column_title')
+
+        self.tables = sorted((dict(table) for table in tables), key=lambda t: t['table_id'].lower())
+        self.table_ids = [table['table_id'].lower() for table in self.tables]
+        self._fuzzy = None
+
+    @property
+    def fuzzy(self):
+        """FuzzyIndex over the words of the table and column titles, built
+        on first use."""
+        if self._fuzzy is None:
+            self._fuzzy = FuzzyIndex(self.tabulations.titles + self.columns.titles)
+        return self._fuzzy
+
+    def tables_by_id_prefix(self, prefix):
+        """Tables whose id starts with ``prefix``, ignoring case."""
+        prefix = prefix.lower()
+        start = bisect_left(self.table_ids, prefix)
+        end = bisect_right(self.table_ids, prefix + MAX_CHAR, start)
+        return self.tables[start:end]
+
+    def search_tabulations(self, q=None, topics=None):
+        return self.tabulations.search(q, topics)
+
+    def search_columns(self, q=None, topics=None):
+        return self.columns.search(q, topics)
+
+
+class TabulationIndex(object):
+    """Tabulations in tabulation code order, filterable like /1.0/tabulations/
+    by code prefix, topics, title substring and a list of codes. ``tabulations``
+    rows need at least tabulation_code, table_title and topics; they are
+    returned as given."""
+
+    def __init__(self, tabulations):
+        rows = sorted((dict(tabulation) for tabulation in tabulations), key=lambda t: t['tabulation_code'])
+        self.titles = TitleIndex(rows, 'table_title')
+        self.codes = [row['tabulation_code'] for row in rows]
+        self.code_positions = dict((code, p) for (p, code) in enumerate(self.codes))
+
+    @property
+    def rows(self):
+        return self.titles.rows
+
+    def search(self, prefix=None, topics=None, q=None, codes=None):
+        mask = self.titles.mask(q, topics)
+        if prefix:
+            start = bisect_left(self.codes, prefix)
+            end = bisect_right(self.codes, prefix + MAX_CHAR, start)
+            mask &= positions_to_mask(range(start, end), self.titles.size)
+        if codes:
+            mask &= positions_to_mask(
+                (self.code_positions[code] for code in codes if code in self.code_positions),
+                self.titles.size)
+        return self.titles.rows_for(mask)
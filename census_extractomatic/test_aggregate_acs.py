@@ -2,9 +2,15 @@
 (census_extractomatic.aggregate_acs): column suppression and table aggregation
 over a set of component geographies."""
 import math
+import random
+from decimal import Decimal
+
+import pytest
 
 from census_extractomatic.aggregate_acs import (
     suppression_reason,
+    aggregate_columns,
+    aggregate_columns_vectorized,
     aggregate_tables,
     select_components,
 )
@@ -166,3 +172,48 @@ def test_select_components_threshold_filters_below_cutoff():
     assert [c["geoid"] for c in comps] == [
         "14000US36061000100", "14000US36061000300"
     ]
+
+
+def test_vectorized_columns_match_column_by_column():
+    """The NumPy path gives exactly the results of aggregate_count per column,
+    types included, over mixed ints, floats, zeros, Nones and weights."""
+    pytest.importorskip("numpy")
+    rng = random.Random(7)
+    column_ids = ["B01001%03d" % i for i in range(1, 50)]
+    for trial in range(20):
+        components = []
+        for _ in range(rng.randint(0, 40)):
+            estimate = {}
+            error = {}
+            for column_id in column_ids:
+                kind = rng.random()
+                if kind < 0.1:
+                    estimate[column_id], error[column_id] = None, None
+                elif kind < 0.3:
+                    estimate[column_id], error[column_id] = 0, rng.randint(1, 200)
+                elif kind < 0.6:
+                    estimate[column_id], error[column_id] = rng.randint(1, 5000), rng.randint(1, 500)
+                else:
+                    estimate[column_id], error[column_id] = rng.uniform(0, 5000), rng.uniform(0, 500)
+            if trial % 2:
+                components.append(_component({"B01001": {"estimate": estimate, "error": error}}, rng.random()))
+            else:
+                components.append(_component({"B01001": {"estimate": estimate, "error": error}}))
+        if trial % 5 == 0:
+            components.append(_component({}))
+
+        expected = aggregate_columns(components, "B01001", column_ids)
+        actual = aggregate_columns_vectorized(components, "B01001", column_ids)
+        for (expected_values, actual_values) in zip(expected, actual):
+            for column_id in column_ids:
+                assert type(actual_values[column_id]) is type(expected_values[column_id])
+                assert actual_values[column_id] == expected_values[column_id]
+
+
+def test_vectorized_columns_leave_decimals_to_aggregate_count():
+    pytest.importorskip("numpy")
+    components = [_component({"B01001": {"estimate": {"B01001001": Decimal("1.5")},
+                                         "error": {"B01001001": Decimal("0.5")}}})]
+    assert aggregate_columns_vectorized(components, "B01001", ["B01001001"]) is None
+    result = aggregate_tables(components, {"B01001": {"title": "Sex by Age", "columns": {"B01001001": {"name": "Total"}}}})
+    assert result["B01001"]["estimate"]["B01001001"] == Decimal("1.5")
@@ -0,0 +1,79 @@
+"""Unit tests for the full-text search result cache (census_extractomatic.fts_cache)."""
+from census_extractomatic.fts_cache import CandidateList, FullTextCache, matches
+
+
+def _profile(name, score, lexemes):
+    return ({'type': 'profile', 'full_name': name}, score, lexemes)
+
+
+ROWS = [
+    _profile('Washington', 0.95, ['washington']),
+    _profile('Spokane County, WA', 0.7, ['spokane', 'county', 'wa', 'washington']),
+    _profile('Spokane, WA', 0.72, ['spokane', 'wa', 'washington']),
+    _profile('Spokane Valley, WA', 0.6, ['spokane', 'valley', 'wa', 'washington']),
+]
+
+
+def _names(results):
+    return [r['full_name'] for r in results]
+
+
+def test_matches_like_prefix_tsquery():
+    assert matches(['spok'], {'spokane', 'wa'})
+    assert matches(['spokane', 'va'], {'spokane', 'valley'})
+    assert not matches(['spo', 'valley'], {'spokane', 'valley'})
+    assert not matches(['valley'], {'spokane'})
+
+
+def test_candidates_keep_query_order_then_sort_by_score():
+    candidates = CandidateList(ROWS, complete=True)
+    assert _names(candidates.results(2)) == ['Washington', 'Spokane County, WA']
+    assert _names(candidates.results(10, ['spokane'])) == ['Spokane, WA', 'Spokane County, WA', 'Spokane Valley, WA']
+    assert candidates.results(1)[0]['score'] == 0.95
+
+
+def test_longer_queries_refine_complete_candidates():
+    cache = FullTextCache()
+    cache.put_candidates('Spo', CandidateList(ROWS[1:], complete=True))
+    assert _names(cache.get('profile', 'spokane  VAL', 10)) == ['Spokane Valley, WA']
+    assert _names(cache.get('profile', 'spok', 1)) == ['Spokane County, WA']
+    assert cache.get('profile', 'sp', 10) is None
+    assert cache.get('all', 'spokane', 10) is None
+
+
+def test_incomplete_candidates_only_answer_their_own_query():
+    cache = FullTextCache()
+    cache.put_candidates('wa', CandidateList(ROWS, complete=False))
+    assert cache.get('profile', 'wash', 10) is None
+    assert cache.get('profile', 'wa', 10) is None
+    assert _names(cache.get('profile', 'wa', 2)) == ['Washington', 'Spokane County, WA']
+
+
+def test_results_are_copied():
+    cache = FullTextCache()
+    cache.put('table', 'age', 10, [{'type': 'table', 'table_id': 'B01001'}])
+    cache.get('table', 'AGE', 10)[0]['url'] = 'changed'
+    assert cache.get('table', 'age', 10) == [{'type': 'table', 'table_id': 'B01001'}]
+    assert cache.get('table', 'age', 5) is None
+    assert cache.put_candidates("o'fallon", CandidateList([], complete=True)) is None
+    assert cache.get('profile', "o'fallon", 10) is None
+
+
+def test_entries_expire():
+    now = [0.0]
+    cache = FullTextCache(ttl=60, clock=lambda: now[0])
+    cache.put('table', 'age', 10, [{'type': 'table', 'table_id': 'B01001'}])
+    cache.put_candidates('spo', CandidateList(ROWS[1:], complete=True))
+    now[0] = 59.0
+    assert cache.get('table', 'age', 10) is not None
+    assert cache.get('profile', 'spokane', 10) is not None
+    now[0] = 120.0
+    assert cache.get('table', 'age', 10) is None
+    assert cache.get('profile', 'spokane valley', 10) is None
+
+
+def test_clear():
+    cache = FullTextCache()
+    cache.put('table', 'age', 10, [{'type': 'table', 'table_id': 'B01001'}])
+    cache.clear()
+    assert cache.get('table', 'age', 10) is None
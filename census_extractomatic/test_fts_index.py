@@ -0,0 +1,99 @@
+"""Unit tests for the embedded BM25 full-text search (census_extractomatic.fts_index)."""
+from census_extractomatic.fts_index import FullTextIndex, ts_rank_normalized, weighted_frequencies
+
+
+def _profile(name, full_geoid, priority, population, lexemes):
+    return {'type': 'profile', 'display_name': name, 'sumlevel': full_geoid[:3], 'sumlevel_name': '',
+            'full_geoid': full_geoid, 'priority': priority, 'population': population, 'static_score': None,
+            'terms': dict((lexeme, 1.0) for lexeme in lexemes)}
+
+
+def _table(code, title, priority, terms):
+    return {'type': 'table', 'tabulation_code': code, 'table_title': title, 'topics': 'age',
+            'simple_table_title': title, 'tables': 'B' + code, 'priority': priority, 'population': None,
+            'static_score': None, 'terms': terms}
+
+
+def _topic(name, terms):
+    return {'type': 'topic', 'topic_name': name, 'url': '/topics/%s/' % name, 'priority': None,
+            'population': None, 'static_score': None, 'terms': terms}
+
+
+INDEX = FullTextIndex([
+    _profile('Spokane, WA', '16000US5367000', 160, 228989, ['spokane', 'wa', 'washington']),
+    _profile('Spokane County, WA', '05000US53063', 50, 539339, ['spokane', 'county', 'wa', 'washington']),
+    _profile('Washington', '04000US53', 40, 7705281, ['washington', '04000us53']),
+    _table('01001', 'Sex by Age', 90, {'sex': 1.0, 'age': 1.0, 'male': 0.2, 'femal': 0.2}),
+    _table('01002', 'Median Age by Sex', 10, {'median': 1.0, 'age': 1.0, 'sex': 1.0}),
+    _table('21001', 'Veteran Status', 50, {'veteran': 1.0, 'status': 1.0, 'age': 0.1}),
+    _topic('age-sex', {'age': 1.0, 'sex': 1.0, 'median': 0.2}),
+])
+
+
+def _labels(results):
+    return [row.get('display_name') or row.get('tabulation_code') or row.get('topic_name') for (row, score) in results]
+
+
+def test_weighted_frequencies_use_label_weights():
+    assert weighted_frequencies(['age', 'sex'], ['AAC', '']) == {'age': 2.2, 'sex': 0.1}
+
+
+def test_profiles_match_every_word_with_last_as_prefix():
+    assert _labels(INDEX.search('spok', 'profile', 10)) == ['Spokane County, WA', 'Spokane, WA']
+    assert _labels(INDEX.search('Spokane  cou', 'profile', 10)) == ['Spokane County, WA']
+    assert _labels(INDEX.search('wash', 'profile', 10)) == ['Washington', 'Spokane County, WA', 'Spokane, WA']
+    assert INDEX.search('spo washingtonx', 'profile', 10) == []
+
+
+def test_profiles_are_limited_in_priority_order():
+    assert _labels(INDEX.search('wa', 'profile', 2)) == ['Washington', 'Spokane County, WA']
+
+
+def test_profiles_without_priority_score_lowest():
+    index = FullTextIndex([
+        _profile('Spokane, WA', '16000US5367000', 160, 228989, ['spokane']),
+        _profile('Spokane CDP', '16000US9999999', None, 228989, ['spokane']),
+    ])
+    results = index.search('spokane', 'profile', 10)
+    assert _labels(results) == ['Spokane, WA', 'Spokane CDP']
+    assert results[0][1] > results[1][1]
+
+
+def test_tables_match_stems_and_skip_stopwords():
+    assert _labels(INDEX.search('ages of sexes', 'table', 10)) == ['01001', '01002']
+    assert _labels(INDEX.search('females', 'table', 10)) == ['01001']
+    assert INDEX.search('the', 'table', 10) == []
+
+
+def test_tables_score_priority_and_relevance():
+    results = INDEX.search('age', 'table', 10)
+    assert _labels(results) == ['01001', '21001', '01002']
+    # relevance is normalized like ts_rank(..., 2|8|32), so it adds to the
+    # priority on the SQL's log scale rather than a full 0.5 for the best
+    assert 1.8 < results[0][1] < 1.8 + 0.5
+    assert 0.2 < results[2][1] < 0.2 + 0.5
+
+
+def test_ts_rank_normalized_divides_by_length_and_lexemes():
+    row = {'terms': {'age': 2.0, 'sex': 1.0}}
+    relevance = 1.0 / 3.0 / 2
+    assert abs(ts_rank_normalized(row, 1.0) - relevance / (relevance + 1)) < 1e-9
+    assert ts_rank_normalized({'terms': {}}, 1.0) == 0.0
+
+
+def test_topics_need_whole_words():
+    assert _labels(INDEX.search('age', 'topic', 10)) == ['age-sex']
+    assert INDEX.search('ag', 'topic', 10) == []
+
+
+def test_all_types_merge_by_score():
+    results = INDEX.search('age', 'all', 3)
+    assert _labels(results) == ['01001', '21001', 'age-sex']
+    assert [score for (row, score) in results] == sorted((score for (row, score) in results), reverse=True)
+
+
+def test_save_and_load(tmp_path):
+    filename = str(tmp_path / 'fts_index.json.gz')
+    INDEX.save(filename)
+    loaded = FullTextIndex.load(filename)
+    assert _labels(loaded.search('spok', 'all', 10)) == _labels(INDEX.search('spok', 'all', 10))
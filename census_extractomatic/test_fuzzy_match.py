@@ -0,0 +1,45 @@
+"""Unit tests for typo-tolerant search term correction
+(census_extractomatic.fuzzy_match)."""
+from census_extractomatic.fuzzy_match import FuzzyIndex, bounded_edit_distance
+
+TITLES = [
+    'Hispanic or Latino Origin by Race',
+    'Poverty Status in the Past 12 Months by Age',
+    'Poverty Status of Families',
+    'Sex by Age',
+    'Median Household Income',
+]
+
+
+def test_bounded_edit_distance():
+    assert bounded_edit_distance('poverty', 'poverty', 1) == 0
+    assert bounded_edit_distance('povrety', 'poverty', 1) == 1
+    assert bounded_edit_distance('povetry', 'poverty', 0) is None
+    assert bounded_edit_distance('abcd', 'badc', 2) == 2
+    assert bounded_edit_distance('hispanik', 'hispanic', 1) == 1
+    assert bounded_edit_distance('age', 'median', 2) is None
+
+
+def test_suggest():
+    index = FuzzyIndex(TITLES)
+    assert index.suggest('hispanik') == ['hispanic']
+    assert index.suggest('povrety') == ['poverty']
+    assert index.suggest('housold') == []  # two edits away, but only seven letters
+    assert index.suggest('houshold') == ['household']
+    assert index.suggest('agz') == []  # too short to correct
+
+
+def test_correct_replaces_unknown_words_only():
+    index = FuzzyIndex(TITLES)
+    assert index.correct('Hispanik origin') == 'hispanic origin'
+    assert index.correct('povertty status') == 'poverty status'
+    assert index.correct('poverty status') is None
+    assert index.correct('zzzzzz') is None
+
+
+def test_correct_leaves_an_unfinished_last_word():
+    index = FuzzyIndex(['Spokane, WA', 'Spokane Valley, WA', 'Seattle, WA'])
+    assert index.correct('spokan valy', prefix_last=True) == 'spokane valy'
+    assert index.correct('spokane val', prefix_last=True) is None
+    assert index.correct('seatle', prefix_last=True) == 'seattle'
+    assert index.correct('spokan', prefix_last=True) is None
@@ -0,0 +1,81 @@
+"""Unit tests for the in-memory geography autocomplete
+(census_extractomatic.geo_autocomplete)."""
+import random
+
+from census_extractomatic.geo_autocomplete import GeoAutocomplete, RESULT_COLUMNS, rank_key
+
+
+def _row(full_geoid, name, sumlevel, population, priority, prefix_match_name=None):
+    return {
+        'geoid': full_geoid[7:],
+        'sumlevel': sumlevel,
+        'population': population,
+        'display_name': name,
+        'full_geoid': full_geoid,
+        'priority': priority,
+        'prefix_match_name': prefix_match_name or name,
+    }
+
+
+ROWS = [
+    _row('16000US5367000', 'Spokane, WA', '160', 228989, 5),
+    _row('05000US53063', 'Spokane County, WA', '050', 539339, 3),
+    _row('05000US53063', 'Spokane County, WA', '050', 539339, 3, 'Spokane'),
+    _row('16000US5367167', 'Spokane Valley, WA', '160', 102976, 5),
+    _row('16000US5363000', 'Seattle, WA', '160', 737015, 5),
+    _row('86000US99999', 'ZCTA not defined', '860', None, 7),
+]
+
+
+def _names(results):
+    return [r['display_name'] for r in results]
+
+
+def test_prefix_matches_in_rank_order():
+    index = GeoAutocomplete(ROWS)
+    assert _names(index.search('spok')) == ['Spokane County, WA', 'Spokane, WA', 'Spokane Valley, WA']
+    assert _names(index.search('SEA')) == ['Seattle, WA']
+    assert index.search('x') == []
+
+
+def test_entries_matched_by_several_names_appear_once():
+    index = GeoAutocomplete(ROWS)
+    assert _names(index.search('spokane')).count('Spokane County, WA') == 1
+
+
+def test_sumlevel_filter():
+    index = GeoAutocomplete(ROWS)
+    assert _names(index.search('s', ['160'])) == ['Seattle, WA', 'Spokane, WA', 'Spokane Valley, WA']
+
+
+def test_not_defined_names_are_skipped():
+    index = GeoAutocomplete(ROWS)
+    assert index.search('zcta') == []
+
+
+def test_precomputed_prefixes_match_on_the_fly_ranking():
+    rng = random.Random(1)
+    rows = []
+    for i in range(2000):
+        name = ''.join(rng.choice('abc ') for _ in range(6)).strip() or 'a'
+        population = rng.choice([None, rng.randint(0, 100000)])
+        rows.append(_row('16000US%07d' % i, name, rng.choice(['050', '140', '160']), population, rng.randint(1, 5)))
+
+    precomputed = GeoAutocomplete(rows, limit=10, precompute_min_range=20)
+    on_the_fly = GeoAutocomplete(rows, limit=10, precompute_min_range=len(rows))
+    assert precomputed.top and not on_the_fly.top
+    for prefix in ['', 'a', 'ab', 'b c', 'cc', 'abc', 'ca b']:
+        for sumlevs in [None, ['140'], ['050', '160']]:
+            expected = sorted(
+                {tuple(r[c] for c in RESULT_COLUMNS) for r in rows
+                 if r['prefix_match_name'].startswith(prefix) and (not sumlevs or r['sumlevel'] in sumlevs)},
+                key=rank_key)[:10]
+            assert [r['full_geoid'] for r in precomputed.search(prefix, sumlevs)] == [e[4] for e in expected]
+            assert precomputed.search(prefix, sumlevs) == on_the_fly.search(prefix, sumlevs)
+
+
+def test_fuzzy_corrects_misspelled_names():
+    index = GeoAutocomplete(ROWS)
+    assert index.search('spokan vall') == []
+    corrected = index.fuzzy.correct('spokan vall', prefix_last=True)
+    assert _names(index.search(corrected)) == ['Spokane Valley, WA']
@@ -0,0 +1,28 @@
+"""Unit tests for the in-memory geography names (census_extractomatic.geo_names)."""
+from census_extractomatic.geo_names import GeoNames, GeoName
+
+ROWS = [
+    {'full_geoid': '04000US53', 'display_name': 'Washington', 'sumlevel': '040',
+     'population': 7812880, 'aland': 172118957044, 'awater': 12559395357},
+    {'full_geoid': '05000US53063', 'display_name': 'Spokane County, WA', 'sumlevel': '050',
+     'population': 539339, 'aland': 4568461530, 'awater': 44831016},
+    {'full_geoid': '01000US', 'display_name': 'United States', 'sumlevel': '010',
+     'population': None, 'aland': None, 'awater': None},
+]
+
+
+def test_get():
+    names = GeoNames('tiger2024', ROWS)
+    assert len(names) == 3
+    assert names.release == 'tiger2024'
+    assert names.get('05000US53063') == GeoName('Spokane County, WA', '050', 539339, 4568461530, 44831016)
+    assert names.get('05000US53063').display_name == 'Spokane County, WA'
+    assert names.get('05000US99999') is None
+    assert '04000US53' in names
+
+
+def test_lookup_skips_unknown_and_sorts():
+    names = GeoNames('tiger2024', ROWS)
+    found = names.lookup(['05000US53063', '04000US53', '05000US99999', '04000US53'])
+    assert list(found) == ['04000US53', '05000US53063']
+    assert found['04000US53'].sumlevel == '040'
@@ -0,0 +1,91 @@
+"""Unit tests for single-flight cache filling (census_extractomatic.single_flight)."""
+import threading
+import time
+
+from census_extractomatic.single_flight import get_or_compute
+
+
+class DictCache(object):
+    """The subset of the flask-caching interface get_or_compute uses."""
+
+    def __init__(self):
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        return self.values.get(key)
+
+    def set(self, key, value, timeout=None):
+        self.values[key] = value
+
+    def add(self, key, value, timeout=None):
+        with self.lock:
+            if key in self.values:
+                return False
+            self.values[key] = value
+            return True
+
+    def delete(self, key):
+        self.values.pop(key, None)
+
+
+def test_hit_does_not_compute():
+    cache = DictCache()
+    cache.set('k', 'cached')
+    assert get_or_compute(cache, 'k', lambda: 1 / 0) == 'cached'
+
+
+def test_miss_computes_and_caches():
+    cache = DictCache()
+    assert get_or_compute(cache, 'k', lambda: 'fresh') == 'fresh'
+    assert cache.get('k') == 'fresh'
+    assert cache.get('k.lock') is None
+
+
+def test_concurrent_misses_compute_once():
+    cache = DictCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        time.sleep(0.1)
+        return 'value'
+
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(get_or_compute(cache, 'k', compute, poll_interval=0.01)))
+        for _ in range(8)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ['value'] * 8
+    assert len(calls) == 1
+
+
+def test_failed_computation_releases_lock():
+    cache = DictCache()
+
+    def fail():
+        raise ValueError('boom')
+
+    try:
+        get_or_compute(cache, 'k', fail)
+    except ValueError:
+        pass
+    assert cache.get('k.lock') is None
+    assert get_or_compute(cache, 'k', lambda: 'retry') == 'retry'
+
+
+def test_waiter_computes_when_holder_gives_up():
+    cache = DictCache()
+    cache.add('k.lock', 1)
+
+    def release():
+        time.sleep(0.05)
+        cache.delete('k.lock')
+
+    threading.Thread(target=release).start()
+    assert get_or_compute(cache, 'k', lambda: 'mine', poll_interval=0.01) == 'mine'
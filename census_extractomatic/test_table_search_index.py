@@ -0,0 +1,95 @@
+"""Unit tests for the in-memory table search (census_extractomatic.table_search_index)."""
+from census_extractomatic.table_search_index import (
+    TableSearchIndex,
+    TabulationIndex,
+    mask_to_positions,
+    positions_to_mask,
+)
+
+
+def _tabulation(code, title, weight, topics, five_yr):
+    return {'tabulation_code': code, 'table_title': title, 'simple_table_title': title, 'universe': 'Total population',
+            'topics': topics, 'weight': weight, 'tables_in_one_yr': [], 'tables_in_three_yr': [],
+            'tables_in_five_yr': five_yr}
+
+
+def _table(table_id, title, topics):
+    return {'table_id': table_id, 'table_title': title, 'simple_table_title': title, 'universe': 'Total population',
+            'topics': topics}
+
+
+def _column(column_id, title, table):
+    return dict(table, column_id=column_id, column_title=title)
+
+
+TABLES = [
+    _table('B04006', 'People Reporting Ancestry', ['ancestry']),
+    _table('B01001', 'Sex by Age', ['age', 'sex']),
+    _table('B01001A', 'Sex by Age (White Alone)', ['age', 'sex', 'race']),
+]
+
+INDEX = TableSearchIndex(
+    [
+        _tabulation('04006', 'People Reporting Ancestry', 5, ['ancestry'], ['B04006']),
+        _tabulation('01001', 'Sex by Age', 100, ['age', 'sex'], ['B01001', 'B01001A']),
+        _tabulation('99999', 'Unweighted', None, None, []),
+    ],
+    TABLES,
+    [
+        _column('B04006063', 'Norwegian', TABLES[0]),
+        _column('B01001002', 'Male:', TABLES[1]),
+        _column('B01001A002', 'Male:', TABLES[2]),
+        _column('B01001026', 'Female:', TABLES[1]),
+    ],
+)
+
+
+def test_tabulations_by_title_in_weight_order():
+    assert [t['tabulation_code'] for t in INDEX.search_tabulations()] == ['99999', '01001', '04006']
+    assert [t['table_id'] for t in INDEX.search_tabulations('AGE')] == ['B01001']
+    assert [t['table_id'] for t in INDEX.search_tabulations('an')] == ['B04006']
+    assert INDEX.search_tabulations('norwegian') == []
+
+
+def test_columns_by_title_in_table_order():
+    assert [c['column_id'] for c in INDEX.search_columns('male')] == ['B01001002', 'B01001026', 'B01001A002']
+    assert [c['column_id'] for c in INDEX.search_columns('norweg')] == ['B04006063']
+    assert [c['column_id'] for c in INDEX.search_columns('fe')] == ['B01001026']
+
+
+def test_topics_must_all_match():
+    assert [t['table_id'] for t in INDEX.search_tabulations(topics=['age', 'sex'])] == ['B01001']
+    assert [c['column_id'] for c in INDEX.search_columns('male', ['race'])] == ['B01001A002']
+    assert INDEX.search_tabulations(topics=['age', 'ancestry']) == []
+
+
+def test_tables_by_id_prefix():
+    assert [t['table_id'] for t in INDEX.tables_by_id_prefix('b01')] == ['B01001', 'B01001A']
+    assert [t['table_id'] for t in INDEX.tables_by_id_prefix('B04006')] == ['B04006']
+    assert INDEX.tables_by_id_prefix('C01') == []
+
+
+def test_masks_round_trip():
+    positions = [0, 7, 8, 63, 64, 1000]
+    assert mask_to_positions(positions_to_mask(positions, 1001), 1001) == positions
+    assert mask_to_positions(0, 10) == []
+
+
+TABULATIONS = TabulationIndex([
+    _tabulation('04006', 'People Reporting Ancestry', 5, ['ancestry'], ['B04006']),
+    _tabulation('01001', 'Sex by Age', 100, ['age', 'sex'], ['B01001', 'B01001A']),
+    _tabulation('01002', 'Median Age by Sex', 50, ['age', 'sex'], ['B01002']),
+])
+
+
+def _codes(rows):
+    return [row['tabulation_code'] for row in rows]
+
+
+def test_tabulations_filters_combine():
+    assert _codes(TABULATIONS.search()) == ['01001', '01002', '04006']
+    assert _codes(TABULATIONS.search(prefix='010')) == ['01001', '01002']
+    assert _codes(TABULATIONS.search(topics=['sex', 'age'], q='median')) == ['01002']
+    assert _codes(TABULATIONS.search(prefix='01', codes=['01002', '04006', '99999'])) == ['01002']
+    assert TABULATIONS.search(topics=['age', 'housing']) == []
+    assert 'weight' in TABULATIONS.rows[0]
@@ -0,0 +1,68 @@
+"""Unit tests for the per-sumlevel tile coverage masks
+(census_extractomatic.tile_coverage)."""
+import pytest
+
+from census_extractomatic.tile_coverage import CoverageMask
+from census_extractomatic.tile_store import deg2num
+
+# Roughly the bounding box of Rhode Island
+RHODE_ISLAND = (-71.91, 41.15, -71.12, 42.02)
+
+
+def _mask():
+    mask = CoverageMask(zoom=8)
+    mask.add_bounds(RHODE_ISLAND)
+    return mask
+
+
+def test_empty_mask_covers_nothing():
+    mask = CoverageMask(zoom=8)
+    assert not mask.covers(0, 0, 0)
+    assert not mask.covers(12, 1000, 1000)
+
+
+def test_tiles_at_reference_zoom():
+    mask = _mask()
+    (x, y) = deg2num(41.8, -71.4, 8)
+    assert mask.covers(8, x, y)
+    (x, y) = deg2num(47.6, -122.3, 8)  # Seattle
+    assert not mask.covers(8, x, y)
+
+
+def test_deeper_tiles_use_their_ancestor():
+    mask = _mask()
+    (x, y) = deg2num(41.8, -71.4, 14)
+    assert mask.covers(14, x, y)
+    (x, y) = deg2num(47.6, -122.3, 14)
+    assert not mask.covers(14, x, y)
+
+
+def test_coarser_tiles_check_the_whole_block():
+    mask = _mask()
+    assert mask.covers(0, 0, 0)
+    # z1: Rhode Island is in the northwest quadrant only
+    assert mask.covers(1, 0, 0)
+    assert not mask.covers(1, 1, 0)
+    assert not mask.covers(1, 0, 1)
+    # z6 (block narrower than a byte) still works
+    (x, y) = deg2num(41.8, -71.4, 6)
+    assert mask.covers(6, x, y)
+    assert not mask.covers(6, x + 1, y)
+
+
+def test_tiles_off_the_map_are_not_covered():
+    mask = _mask()
+    assert not mask.covers(2, 4, 0)
+    assert not mask.covers(12, -1, 0)
+
+
+def test_round_trip_through_bytes():
+    mask = _mask()
+    copy = CoverageMask(zoom=8, mask=mask.to_bytes())
+    (x, y) = deg2num(41.8, -71.4, 8)
+    assert copy.covers(8, x, y)
+
+
+def test_zoom_must_allow_whole_byte_rows():
+    with pytest.raises(ValueError):
+        CoverageMask(zoom=2)
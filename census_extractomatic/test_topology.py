@@ -0,0 +1,132 @@
+"""Unit tests for the TopoJSON encoder (census_extractomatic.topology)."""
+import math
+
+import pytest
+
+from census_extractomatic.topology import features_to_topology
+
+
+def _feature(geoid, geometry):
+    return {'type': 'Feature', 'id': geoid, 'properties': {'geoid': geoid}, 'geometry': geometry}
+
+
+def _square(x, y, size=1):
+    return [[x, y], [x + size, y], [x + size, y + size], [x, y + size], [x, y]]
+
+
+def _decode_arc(topology, index):
+    arc = topology['arcs'][~index if index < 0 else index]
+    points = []
+    (x, y) = (0, 0)
+    for (dx, dy) in arc:
+        (x, y) = (x + dx, y + dy)
+        (kx, ky) = topology['transform']['scale']
+        (tx, ty) = topology['transform']['translate']
+        points.append([round(x * kx + tx, 6), round(y * ky + ty, 6)])
+    return points[::-1] if index < 0 else points
+
+
+def _decode_ring(topology, arcs):
+    ring = []
+    for index in arcs:
+        points = _decode_arc(topology, index)
+        ring.extend(points[1:] if ring else points)
+    return ring
+
+
+def _same_ring(a, b):
+    a = a[:-1]
+    b = b[:-1]
+    start = b.index(a[0])
+    return a == b[start:] + b[:start]
+
+
+def test_adjacent_polygons_share_their_border():
+    # two unit squares side by side, sharing the edge x=1
+    left = {'type': 'Polygon', 'coordinates': [_square(0, 0)]}
+    right = {'type': 'Polygon', 'coordinates': [_square(1, 0)]}
+    topology = features_to_topology([_feature('a', left), _feature('b', right)], quantize=3)
+
+    geometries = topology['objects']['geographies']['geometries']
+    assert [g['id'] for g in geometries] == ['a', 'b']
+    assert geometries[0]['properties'] == {'geoid': 'a'}
+    # the shared edge is one arc, referenced forwards by one square and
+    # backwards by the other
+    (left_arcs, right_arcs) = (geometries[0]['arcs'][0], geometries[1]['arcs'][0])
+    assert len(topology['arcs']) == 3
+    assert set(left_arcs) & set(~i for i in right_arcs)
+
+    assert _same_ring(_decode_ring(topology, left_arcs), _square(0, 0))
+    assert _same_ring(_decode_ring(topology, right_arcs), _square(1, 0))
+
+
+def test_enclave_ring_is_shared_whole():
+    outer = {'type': 'Polygon', 'coordinates': [_square(0, 0, 4), _square(1, 1, 2)[::-1]]}
+    inner = {'type': 'Polygon', 'coordinates': [_square(1, 1, 2)]}
+    topology = features_to_topology([_feature('outer', outer), _feature('inner', inner)], quantize=5)
+
+    (outer_geom, inner_geom) = topology['objects']['geographies']['geometries']
+    assert len(topology['arcs']) == 2
+    assert inner_geom['arcs'][0] == [~outer_geom['arcs'][1][0]]
+
+
+def test_multipolygons_and_null_geometries():
+    multi = {'type': 'MultiPolygon', 'coordinates': [[_square(0, 0)], [_square(5, 5)]]}
+    topology = features_to_topology([_feature('m', multi), _feature('empty', None)], quantize=7)
+
+    (m, empty) = topology['objects']['geographies']['geometries']
+    assert m['type'] == 'MultiPolygon'
+    assert len(m['arcs']) == 2
+    assert _same_ring(_decode_ring(topology, m['arcs'][1][0]), _square(5, 5))
+    assert empty == {'type': None, 'id': 'empty', 'properties': {'geoid': 'empty'}}
+
+
+def test_unsupported_geometry():
+    with pytest.raises(ValueError):
+        features_to_topology([_feature('p', {'type': 'Point', 'coordinates': [0, 0]})])
+
+
+# a wiggly border from (1, 0) to (1, 4), with wiggles of 0.01
+BORDER = [[1, 0], [1.01, 1], [0.99, 2], [1.01, 3], [1, 4]]
+
+
+def _neighbours(left_border, right_border):
+    left = {'type': 'Polygon', 'coordinates': [[[0, 0]] + left_border + [[0, 4], [0, 0]]]}
+    right = {'type': 'Polygon', 'coordinates': [[[2, 0], [2, 4]] + right_border[::-1] + [[2, 0]]]}
+    return [_feature('left', left), _feature('right', right)]
+
+
+def _shared_arcs(topology):
+    (left, right) = topology['objects']['geographies']['geometries']
+    left_arcs = set(i if i >= 0 else ~i for i in left['arcs'][0])
+    right_arcs = set(i if i >= 0 else ~i for i in right['arcs'][0])
+    return left_arcs & right_arcs
+
+
+def test_neighbours_simplified_independently_share_nothing():
+    # each side dropped different vertices of the border, as simplifying
+    # per feature does
+    left_border = [p for p in BORDER if p != [1.01, 3]]
+    right_border = [p for p in BORDER if p != [1.01, 1]]
+    topology = features_to_topology(_neighbours(left_border, right_border), quantize=201)
+    assert not _shared_arcs(topology)
+
+
+def test_arcs_are_simplified_after_extraction():
+    topology = features_to_topology(_neighbours(BORDER, BORDER), quantize=201, simplify=0.05)
+    shared = _shared_arcs(topology)
+    assert len(shared) == 1
+    # the wiggles are under the tolerance, so the border is straightened,
+    # once, for both sides
+    assert _decode_arc(topology, shared.pop()) in ([[1, 0], [1, 4]], [[1, 4], [1, 0]])
+    (left, right) = topology['objects']['geographies']['geometries']
+    assert _same_ring(_decode_ring(topology, left['arcs'][0]), [[0, 0], [1, 0], [1, 4], [0, 4], [0, 0]])
+    assert _same_ring(_decode_ring(topology, right['arcs'][0]), [[2, 0], [2, 4], [1, 4], [1, 0], [2, 0]])
+
+
+def test_simplified_rings_stay_rings():
+    circle = [[math.cos(i * math.pi / 20), math.sin(i * math.pi / 20)] for i in range(40)]
+    island = {'type': 'Polygon', 'coordinates': [circle + [circle[0]]]}
+    topology = features_to_topology([_feature('island', island)], simplify=10)
+    (geometry,) = topology['objects']['geographies']['geometries']
+    assert len(_decode_ring(topology, geometry['arcs'][0])) == 4
@@ -0,0 +1,66 @@
+"""Per-summary-level tile coverage masks.
+
+A coverage mask is a bitmap of the tiles at a reference zoom that any feature
+of a summary level could touch, built from the features' bounding boxes at
+release load (see census_extractomatic.tools.build_tile_coverage). Because
+bounding boxes only ever overstate coverage, a tile whose bits are all clear is
+certain to be empty and geo_tiles can answer it without querying PostGIS.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+from census_extractomatic.tile_store import deg2num
+
+DEFAULT_COVERAGE_ZOOM = 10
+
+# Padding, in degrees, so features that only touch a tile edge still mark it.
+EDGE_PADDING = 1e-7
+
+
+class CoverageMask(object):
+    """Bitmap of covered tiles at ``zoom``, stored row-major (bit y * 2**zoom + x).
+    ``zoom`` must be at least 3 so rows are whole bytes."""
+
+    def __init__(self, zoom=DEFAULT_COVERAGE_ZOOM, mask=None):
+        if zoom < 3:
+            raise ValueError('Coverage masks need a zoom of at least 3')
+        self.zoom = zoom
+        self.size = 2 ** zoom
+        if mask is None:
+            self.mask = bytearray(self.size * self.size // 8)
+        else:
+            self.mask = bytearray(mask)
+
+    def add_bounds(self, bounds):
+        """Mark every tile touching a (minx, miny, maxx, maxy) bbox in degrees."""
+        (minx, miny, maxx, maxy) = bounds
+        (x0, y0) = deg2num(maxy + EDGE_PADDING, minx - EDGE_PADDING, self.zoom)
+        (x1, y1) = deg2num(miny - EDGE_PADDING, maxx + EDGE_PADDING, self.zoom)
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                index = y * self.size + x
+                self.mask[index >> 3] |= 1 << (index & 7)
+
+    def _any_in_row(self, y, x0, width):
+        start = y * self.size + x0
+        if width >= 8:
+            # whole bytes, because x0 and width are multiples of 8 here
+            return any(self.mask[start >> 3:(start + width) >> 3])
+        return any(self.mask[i >> 3] & (1 << (i & 7)) for i in range(start, start + width))
+
+    def covers(self, zoom, x, y):
+        """Whether any feature could appear in tile zoom/x/y."""
+        if not (0 <= x < 2 ** zoom and 0 <= y < 2 ** zoom):
+            return False
+        if zoom >= self.zoom:
+            shift = zoom - self.zoom
+            return self._any_in_row(y >> shift, x >> shift, 1)
+
+        # A coarser tile covers a square block of reference tiles
+        shift = self.zoom - zoom
+        width = 1 << shift
+        x0 = x << shift
+        y0 = y << shift
+        return any(self._any_in_row(row, x0, width) for row in range(y0, y0 + width))
+
+    def to_bytes(self):
+        return bytes(self.mask)
@@ -0,0 +1,123 @@
+"""Pre-rendered vector tile pyramids stored as MBTiles files.
+
+An MBTiles file is a SQLite database holding one tileset; we keep one file per
+TIGER release and summary level, laid out as ``<root>/<release>/<sumlevel>.mbtiles``.
+The builder (``census_extractomatic.tools.build_tile_pyramid``) renders every
+tile covering a summary level's extent over a zoom range but only stores the
+tiles that have features, so once a build has finished, a missing tile inside
+the recorded zoom range is known to be empty.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+import math
+import os
+import sqlite3
+
+MBTILES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS metadata (name TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS tiles (
+    zoom_level INTEGER,
+    tile_column INTEGER,
+    tile_row INTEGER,
+    tile_data BLOB
+);
+CREATE UNIQUE INDEX IF NOT EXISTS tile_index ON tiles (zoom_level, tile_column, tile_row);
+"""
+
+
+def pyramid_path(root, release, sumlevel):
+    """Where the pyramid for a TIGER release and summary level lives under root."""
+    return os.path.join(root, release, '%s.mbtiles' % sumlevel)
+
+
+def tile_cache_key(release, sumlevel, zoom, x, y, extension, data=None):
+    """The response cache key for a tile. ``data`` is a data tile's
+    (acs, column_ids, with_moe), which must be part of the key so data tiles
+    don't share entries with geometry tiles or with other column sets."""
+    cache_key = '1.0/geo/%s/tiles/%s/%s/%s/%s.%s' % (release, sumlevel, zoom, x, y, extension)
+    if data is not None:
+        (acs, column_ids, with_moe) = data
+        cache_key += '?acs=%s&column_ids=%s&moe=%s' % (acs, ','.join(column_ids), with_moe)
+    return cache_key
+
+
+def tms_row(zoom, y):
+    """MBTiles stores rows in TMS order, counting up from the south."""
+    return (2 ** zoom - 1) - y
+
+
+def deg2num(lat_deg, lon_deg, zoom):
+    """The (x, y) XYZ tile containing a lat/lon at the given zoom. The inverse
+    of ``num2deg`` in the API module."""
+    lat_deg = max(min(lat_deg, 85.0511), -85.0511)
+    n = 2 ** zoom
+    lat_rad = math.radians(lat_deg)
+    x = int((lon_deg + 180.0) / 360.0 * n)
+    y = int((1.0 - math.asinh(math.tan(lat_rad)) / math.pi) / 2.0 * n)
+    return (min(max(x, 0), n - 1), min(max(y, 0), n - 1))
+
+
+def tiles_for_bounds(bounds, zoom):
+    """Yield every (zoom, x, y) tile touching a (minx, miny, maxx, maxy) bbox
+    given in degrees."""
+    (minx, miny, maxx, maxy) = bounds
+    (x0, y0) = deg2num(maxy, minx, zoom)
+    (x1, y1) = deg2num(miny, maxx, zoom)
+    for x in range(x0, x1 + 1):
+        for y in range(y0, y1 + 1):
+            yield (zoom, x, y)
+
+
+class MBTilesWriter(object):
+    """Write tiles into an MBTiles file, creating it if needed."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.executescript(MBTILES_SCHEMA)
+
+    def put(self, zoom, x, y, data):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO tiles (zoom_level, tile_column, tile_row, tile_data) VALUES (?, ?, ?, ?)",
+            (zoom, x, tms_row(zoom, y), sqlite3.Binary(data)))
+
+    def set_metadata(self, **values):
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO metadata (name, value) VALUES (?, ?)",
+            [(name, str(value)) for name, value in values.items()])
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class MBTilesReader(object):
+    """Read tiles from a finished (or partial) MBTiles file."""
+
+    def __init__(self, path):
+        self.conn = sqlite3.connect('file:%s?mode=ro' % path, uri=True, check_same_thread=False)
+        metadata = dict(self.conn.execute("SELECT name, value FROM metadata").fetchall())
+        # minzoom/maxzoom are only written once a build completes, so a
+        # partial build never claims that its missing tiles are empty.
+        if 'minzoom' in metadata and 'maxzoom' in metadata:
+            self.zoom_range = (int(metadata['minzoom']), int(metadata['maxzoom']))
+        else:
+            self.zoom_range = None
+
+    def get(self, zoom, x, y):
+        """Return the tile's bytes, ``b''`` for a tile known to be empty, or
+        None when the pyramid doesn't cover the tile."""
+        row = self.conn.execute(
+            "SELECT tile_data FROM tiles WHERE zoom_level=? AND tile_column=? AND tile_row=?",
+            (zoom, x, tms_row(zoom, y))).fetchone()
+        if row is not None:
+            return bytes(row[0])
+        if self.zoom_range and self.zoom_range[0] <= zoom <= self.zoom_range[1]:
+            return b''
+        return None
+
+    def close(self):
+        self.conn.close()
@@ -0,0 +1,217 @@
+"""Replay real search queries against the search endpoints and time them.
+
+Query strings are pulled from gzipped nginx access logs (of the API, or of the
+Census Reporter site, whose search pages take the same q parameter), parsed
+with the same log_rx as update_table_priorities. Each distinct query is run
+against perform_full_text_search (with the configured backend),
+/1.0/table/search or /1.0/geo/search, as the request was, and the report
+gives p50/p95/p99 latency and queries per second for each.
+
+The top results of every query can be saved as golden files, and later runs
+checked against them, so that changes to scoring or to the search schema show
+which queries were re-ranked.
+"""
+import argparse
+import gzip
+import json
+import os
+import sys
+from collections import OrderedDict
+from timeit import default_timer as timer
+try:
+    # Python 3
+    from urllib.parse import urlparse, parse_qs
+except ImportError:
+    # Python 2
+    from urlparse import urlparse, parse_qs
+
+from ..api import app, db, get_full_text_index
+from ..full_text_search import perform_full_text_search
+from .update_table_priorities import log_rx
+
+# Request paths whose q parameter is a query for each search
+SEARCH_PATHS = OrderedDict([
+    ('full_text', ('/2.1/full-text/search', '/search/')),
+    ('table', ('/1.0/table/search',)),
+    ('geo', ('/1.0/geo/search',)),
+])
+
+# Parameters of each search kept from the logged request, besides q
+SEARCH_PARAMS = {
+    'full_text': ('type', 'limit'),
+    'table': ('acs', 'topics', 'fuzzy'),
+    'geo': ('sumlevs', 'fuzzy'),
+}
+
+DEFAULT_TOP_K = 10
+
+
+def parse_query(line):
+    """(search, params) for a logged search request, or None."""
+    m = log_rx.search(line)
+    if m is None or m.group('status') != '200':
+        return None
+    req = m.group('req').split()
+    if len(req) < 2 or req[0] != 'GET':
+        return None
+    parsed = urlparse(req[1])
+    qs = parse_qs(parsed.query)
+    if not qs.get('q'):
+        return None
+    for (search, paths) in SEARCH_PATHS.items():
+        if parsed.path in paths:
+            params = OrderedDict([('q', qs['q'][0])])
+            for param in SEARCH_PARAMS[search]:
+                if param in qs:
+                    params[param] = qs[param][0]
+            return (search, params)
+    return None
+
+
+def read_queries(log_files, max_queries=None):
+    """Distinct logged queries per search, most frequent first."""
+    counts = dict((search, {}) for search in SEARCH_PATHS)
+    for fn in log_files:
+        print('Reading log file: %s' % fn)
+        with gzip.open(fn, 'rt') as f:
+            for line in f:
+                query = parse_query(line)
+                if query is not None:
+                    (search, params) = query
+                    key = json.dumps(params)
+                    counts[search][key] = counts[search].get(key, 0) + 1
+    queries = {}
+    for (search, search_counts) in counts.items():
+        ranked = sorted(search_counts.items(), key=lambda item: (-item[1], item[0]))[:max_queries]
+        queries[search] = [json.loads(key, object_pairs_hook=OrderedDict) for (key, count) in ranked]
+    return queries
+
+
+def run_full_text(client, params, top_k):
+    limit = int(params.get('limit', 10))
+    results = perform_full_text_search(db, params['q'], params.get('type', 'all'), limit, get_full_text_index())
+    return [result['label'] for result in results[:top_k]]
+
+
+def run_table(client, params, top_k):
+    resp = client.get('/1.0/table/search', query_string=params)
+    if resp.status_code != 200:
+        return ['HTTP %s' % resp.status_code]
+    return [result['unique_key'] for result in json.loads(resp.get_data(as_text=True))[:top_k]]
+
+
+def run_geo(client, params, top_k):
+    resp = client.get('/1.0/geo/search', query_string=params)
+    if resp.status_code != 200:
+        return ['HTTP %s' % resp.status_code]
+    return [result['full_geoid'] for result in json.loads(resp.get_data(as_text=True))['results'][:top_k]]
+
+
+RUNNERS = {'full_text': run_full_text, 'table': run_table, 'geo': run_geo}
+
+
+def percentile(sorted_values, fraction):
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, int(round(fraction * len(sorted_values))) - 1))
+    return sorted_values[rank]
+
+
+def benchmark(queries, top_k=DEFAULT_TOP_K):
+    """Run every query; return the timings and top results per search."""
+    report = {}
+    client = app.test_client()
+    with app.app_context():
+        for (search, search_queries) in queries.items():
+            runner = RUNNERS[search]
+            timings = []
+            top = OrderedDict()
+            for params in search_queries:
+                start = timer()
+                top[json.dumps(params)] = runner(client, params, top_k)
+                timings.append(timer() - start)
+                # keep each query in its own transaction, as a request would be
+                db.session.rollback()
+            report[search] = {'timings': timings, 'top': top}
+    return report
+
+
+def print_report(report):
+    print('%-10s %8s %10s %10s %10s %10s' % ('search', 'queries', 'p50 ms', 'p95 ms', 'p99 ms', 'qps'))
+    for (search, results) in report.items():
+        timings = sorted(results['timings'])
+        total = sum(timings)
+        print('%-10s %8d %10.1f %10.1f %10.1f %10.1f' % (
+            search, len(timings),
+            percentile(timings, 0.50) * 1000,
+            percentile(timings, 0.95) * 1000,
+            percentile(timings, 0.99) * 1000,
+            len(timings) / total if total else 0.0))
+
+
+def golden_path(golden_dir, search):
+    return os.path.join(golden_dir, '%s.json' % search)
+
+
+def save_golden(report, golden_dir):
+    if not os.path.isdir(golden_dir):
+        os.makedirs(golden_dir)
+    for (search, results) in report.items():
+        with open(golden_path(golden_dir, search), 'w') as f:
+            json.dump(results['top'], f, indent=1)
+        print('Saved %d golden results to %s' % (len(results['top']), golden_path(golden_dir, search)))
+
+
+def check_golden(report, golden_dir):
+    """Print the queries whose top results differ from the golden files;
+    return how many do."""
+    changed = 0
+    for (search, results) in report.items():
+        path = golden_path(golden_dir, search)
+        if not os.path.exists(path):
+            print('No golden file %s' % path)
+            continue
+        with open(path) as f:
+            golden = json.load(f)
+        for (query, expected) in golden.items():
+            actual = results['top'].get(query)
+            if actual is not None and actual != expected:
+                changed += 1
+                print('%s %s\n  golden: %s\n  now:    %s' % (search, query, expected, actual))
+    print('%d queries changed' % changed)
+    return changed
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description='Benchmark search endpoints with queries from access logs.')
+    parser.add_argument('log_files', nargs='+', help='gzipped nginx access logs')
+    parser.add_argument('--search', action='append', choices=list(SEARCH_PATHS),
+                        help='search to run (repeatable; default all)')
+    parser.add_argument('--max-queries', type=int, default=1000,
+                        help='most frequent distinct queries to run per search')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help='results per query kept for golden files')
+    parser.add_argument('--save-golden', metavar='DIR', help='write top results to golden files in DIR')
+    parser.add_argument('--check-golden', metavar='DIR', help='compare top results with golden files in DIR')
+    args = parser.parse_args(argv)
+
+    queries = read_queries(args.log_files, args.max_queries)
+    if args.search:
+        queries = dict((search, queries[search]) for search in args.search)
+    report = benchmark(queries, args.top_k)
+    print_report(report)
+    if args.save_golden:
+        save_golden(report, args.save_golden)
+    if args.check_golden and check_golden(report, args.check_golden):
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.benchmark_search FILES [--save-golden DIR] [--check-golden DIR]
+    e.g., record results, change the scoring, then compare:
+        python -m census_extractomatic.tools.benchmark_search logs/*.gz --save-golden search_golden
+        python -m census_extractomatic.tools.benchmark_search logs/*.gz --check-golden search_golden
+    """
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""Build the 2020 block to containing geography crosswalk for a TIGER release.
+
+Run once after loading a release. Creates <release>.census_block_crosswalk with
+one row per 2020 block and, in full_geoids, the geographies containing the
+block's internal point, for the summary levels in BLOCK_NESTED_SUMLEVELS.
+Those levels are unions of whole 2020 blocks and aren't redrawn until the
+next census, so the internal point gives the same answer as intersecting any
+point in the block. Places, county subdivisions, school districts and the
+other levels that are updated every year can split 2020 blocks, so they
+aren't in the table; geo_search and geo_locate intersect the point with those
+as before. Both use the table when it exists, so reverse geocoding a point is
+one indexed point-in-block lookup plus a crosswalk fetch for the nested
+levels, instead of a point-in-polygon test against each of them.
+
+The table is built as census_block_crosswalk_new and renamed into place at
+the end, so the API keeps using the old table during a rebuild.
+"""
+import sys
+
+from sqlalchemy import text
+
+from ..api import app, db, allowed_tiger, BLOCK_NESTED_SUMLEVELS
+from .staging import drop_staging_table, staging_table, swap_in_staging_table
+
+
+def build_block_crosswalk(release):
+    with app.app_context():
+        table = staging_table('census_block_crosswalk')
+        drop_staging_table(db, release, 'census_block_crosswalk')
+        db.session.execute(text("DROP TABLE IF EXISTS %s.census_block_crosswalk_rows;" % (release,)))
+        # one row per (block, geography) while building, folded into one row
+        # per block at the end
+        db.session.execute(text(
+            """CREATE UNLOGGED TABLE %s.census_block_crosswalk_rows (
+                   block_geoid varchar(15) NOT NULL,
+                   full_geoid varchar(40) NOT NULL
+               );""" % (release,)))
+
+        for sumlevel in BLOCK_NESTED_SUMLEVELS:
+            result = db.session.execute(text(
+                """INSERT INTO %s.census_block_crosswalk_rows (block_geoid, full_geoid)
+                   SELECT b.geoid20, n.full_geoid
+                   FROM blocks.tabblock20 b
+                   JOIN %s.census_name_lookup n
+                     ON n.sumlevel=:sumlev
+                    AND ST_Contains(n.geom,
+                                    ST_SetSRID(ST_MakePoint(b.intptlon20::double precision,
+                                                            b.intptlat20::double precision),
+                                               4326))""" % (release, release)),
+                {'sumlev': sumlevel}
+            )
+            db.session.commit()
+            if result.rowcount:
+                print('%s %s: %s blocks' % (release, sumlevel, result.rowcount))
+
+        db.session.execute(text(
+            """CREATE TABLE %s.%s AS
+               SELECT block_geoid, array_agg(full_geoid ORDER BY full_geoid)::varchar(40)[] AS full_geoids
+               FROM %s.census_block_crosswalk_rows
+               GROUP BY block_geoid;""" % (release, table, release)))
+        db.session.execute(text("DROP TABLE %s.census_block_crosswalk_rows;" % (release,)))
+        db.session.execute(text("ALTER TABLE %s.%s ADD PRIMARY KEY (block_geoid);" % (release, table)))
+        db.session.execute(text("ANALYZE %s.%s;" % (release, table)))
+        swap_in_staging_table(db, release, 'census_block_crosswalk')
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.build_block_crosswalk [RELEASE]
+    RELEASE defaults to the newest allowed TIGER release, e.g. tiger2024.
+    """
+    release = sys.argv[1] if len(sys.argv) > 1 else allowed_tiger[0]
+    if release not in allowed_tiger:
+        print('\nUnknown TIGER release %s\n' % release)
+        exit()
+    build_block_crosswalk(release)
@@ -0,0 +1,31 @@
+"""Build the embedded full-text search index file.
+
+Run after rebuilding search_metadata (and running topic_scraper and
+update_table_priorities). Writes the rows of search_metadata with their
+lexemes to a gzipped JSON file, which the API loads when
+FULL_TEXT_SEARCH_BACKEND is 'embedded' and FULL_TEXT_INDEX_FILE names the
+file, instead of reading search_metadata on its first search.
+"""
+import sys
+
+from ..api import app, db
+from ..full_text_search import build_full_text_index
+
+
+def build_fts_index(filename):
+    with app.app_context():
+        index = build_full_text_index(db)
+    index.save(filename)
+    print('Wrote %d rows to %s' % (len(index.rows), filename))
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.build_fts_index FILE
+    e.g.:
+        python -m census_extractomatic.tools.build_fts_index /var/lib/census/fts_index.json.gz
+    """
+    if len(sys.argv) < 2:
+        print('\nAn output file must be specified\n')
+        exit()
+    build_fts_index(sys.argv[1])
@@ -0,0 +1,72 @@
+"""Build the precomputed parent lists for a TIGER release.
+
+Run once after loading a release. Creates <release>.census_geo_parents with one
+row per geoid in census_name_lookup, holding the JSON parent list that
+/1.0/geo/<release>/<geoid>/parents returns: the ordered levels from
+compute_profile_item_levels, special cases applied, with each parent's display
+name and sumlevel filled in. geo_parent serves from the table when it exists,
+so a parents request is a single primary key lookup.
+
+The table is built as census_geo_parents_new and renamed into place at the
+end, so requests keep reading the old table during a rebuild.
+"""
+import sys
+
+from flask import json
+from sqlalchemy import text
+
+from ..api import app, db, allowed_tiger, compute_profile_item_levels, parent_name_item
+from .staging import drop_staging_table, staging_table, swap_in_staging_table
+
+BATCH_SIZE = 5000
+
+
+def build_geo_parents_table(release):
+    with app.app_context():
+        containment = {}
+        result = db.session.execute(text(
+            """SELECT * FROM %s.census_geo_containment
+               ORDER BY child_geoid, percent_covered ASC""" % (release,)))
+        for row in result.mappings():
+            containment.setdefault(row['child_geoid'], []).append(row)
+
+        result = db.session.execute(text(
+            "SELECT DISTINCT display_name,sumlevel,full_geoid FROM %s.census_name_lookup" % (release,)))
+        names = dict(parent_name_item(row) for row in result.mappings())
+        print('%s: %s geoids, %s with containment rows' % (release, len(names), len(containment)))
+
+        table = staging_table('census_geo_parents')
+        drop_staging_table(db, release, 'census_geo_parents')
+        db.session.execute(text(
+            """CREATE TABLE %s.%s (
+                   geoid varchar(40) PRIMARY KEY,
+                   parents text NOT NULL
+               );""" % (release, table)))
+
+        insert = text("INSERT INTO %s.%s (geoid, parents) VALUES (:geoid, :parents)" % (release, table))
+        batch = []
+        for geoid in sorted(names):
+            parents = compute_profile_item_levels(geoid, containment)
+            for parent in parents:
+                parent.update(names.get(parent['geoid'], {}))
+            batch.append({'geoid': geoid, 'parents': json.dumps(parents)})
+            if len(batch) >= BATCH_SIZE:
+                db.session.execute(insert, batch)
+                batch = []
+        if batch:
+            db.session.execute(insert, batch)
+
+        db.session.execute(text("ANALYZE %s.%s;" % (release, table)))
+        swap_in_staging_table(db, release, 'census_geo_parents')
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.build_geo_parents [RELEASE]
+    RELEASE defaults to the newest allowed TIGER release, e.g. tiger2024.
+    """
+    release = sys.argv[1] if len(sys.argv) > 1 else allowed_tiger[0]
+    if release not in allowed_tiger:
+        print('\nUnknown TIGER release %s\n' % release)
+        exit()
+    build_geo_parents_table(release)
@@ -0,0 +1,53 @@
+"""Build the pre-simplified geometry store for a TIGER release.
+
+Run once after loading a release. Creates <release>.census_geometry_store with
+one row per geoid holding its GeoJSON at each of the API's
+GEOMETRY_RESOLUTIONS, encoded exactly as the endpoints would encode it per
+request. Geo lookup, geo show, geo search and compare read from the table when
+it exists instead of simplifying geometries on every request.
+
+The table is built as census_geometry_store_new and renamed into place at the
+end, so requests keep reading the old store during a rebuild.
+"""
+import sys
+
+from sqlalchemy import text
+
+from ..api import app, db, allowed_tiger, GEOMETRY_RESOLUTIONS
+from .staging import drop_staging_table, staging_table, swap_in_staging_table
+
+
+def build_geometry_store(release):
+    resolution_columns = [
+        '%s AS geojson_%s' % (expression.format(geom='geom'), resolution)
+        for (resolution, expression) in GEOMETRY_RESOLUTIONS.items()
+    ]
+    table = staging_table('census_geometry_store')
+    statements = [
+        """CREATE TABLE %s.%s AS
+           SELECT DISTINCT ON (full_geoid) full_geoid, %s
+           FROM %s.census_name_lookup
+           WHERE geom IS NOT NULL
+           ORDER BY full_geoid;""" % (release, table, ',\n                  '.join(resolution_columns), release),
+        "ALTER TABLE %s.%s ADD PRIMARY KEY (full_geoid);" % (release, table),
+        "ANALYZE %s.%s;" % (release, table),
+    ]
+
+    with app.app_context():
+        drop_staging_table(db, release, 'census_geometry_store')
+        for statement in statements:
+            print(statement.split('\n')[0])
+            db.session.execute(text(statement))
+        swap_in_staging_table(db, release, 'census_geometry_store')
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.build_geometry_store [RELEASE]
+    RELEASE defaults to the newest allowed TIGER release, e.g. tiger2024.
+    """
+    release = sys.argv[1] if len(sys.argv) > 1 else allowed_tiger[0]
+    if release not in allowed_tiger:
+        print('\nUnknown TIGER release %s\n' % release)
+        exit()
+    build_geometry_store(release)
@@ -0,0 +1,61 @@
+"""Build the per-sumlevel tile coverage masks for a TIGER release.
+
+Run once after loading a release. Stores one bitmap per summary level in
+<release>.census_tile_coverage, marking the tiles at the reference zoom touched
+by any feature's bounding box. geo_tiles loads the masks once per process and
+answers tiles outside them with a static empty tile.
+"""
+import sys
+
+from sqlalchemy import text
+
+from ..api import app, db, allowed_tiger, SUMLEV_NAMES
+from ..tile_coverage import CoverageMask, DEFAULT_COVERAGE_ZOOM
+
+
+def build_tile_coverage(release, zoom=DEFAULT_COVERAGE_ZOOM):
+    with app.app_context():
+        db.session.execute(text(
+            """CREATE TABLE IF NOT EXISTS %s.census_tile_coverage (
+                   sumlevel varchar(3) PRIMARY KEY,
+                   zoom integer NOT NULL,
+                   mask bytea NOT NULL
+               );""" % (release,)))
+
+        for sumlevel in SUMLEV_NAMES:
+            result = db.session.execute(text(
+                """SELECT ST_XMin(geom), ST_YMin(geom), ST_XMax(geom), ST_YMax(geom)
+                   FROM %s.census_name_lookup
+                   WHERE sumlevel=:sumlev AND geom IS NOT NULL""" % (release,)),
+                {'sumlev': sumlevel}
+            )
+
+            mask = CoverageMask(zoom)
+            features = 0
+            for bounds in result:
+                mask.add_bounds(tuple(bounds))
+                features += 1
+
+            if not features:
+                continue
+
+            db.session.execute(text(
+                """INSERT INTO %s.census_tile_coverage (sumlevel, zoom, mask)
+                   VALUES (:sumlev, :zoom, :mask)
+                   ON CONFLICT (sumlevel) DO UPDATE SET zoom=EXCLUDED.zoom, mask=EXCLUDED.mask""" % (release,)),
+                {'sumlev': sumlevel, 'zoom': zoom, 'mask': mask.to_bytes()}
+            )
+            db.session.commit()
+            print('%s %s: %s features' % (release, sumlevel, features))
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.build_tile_coverage [RELEASE]
+    RELEASE defaults to the newest allowed TIGER release, e.g. tiger2024.
+    """
+    release = sys.argv[1] if len(sys.argv) > 1 else allowed_tiger[0]
+    if release not in allowed_tiger:
+        print('\nUnknown TIGER release %s\n' % release)
+        exit()
+    build_tile_coverage(release)
@@ -0,0 +1,66 @@
+"""Build the pre-projected tile geometry table for a TIGER release.
+
+Run once after loading a release. Creates <release>.census_tile_geometry with
+every census_name_lookup geometry transformed to Web Mercator (EPSG:3857) and
+simplified once per zoom band (see TILE_GEOMETRY_BANDS in the API), each band
+with its own GiST index. geo_tiles uses the table when it exists, so tiles are
+cut from ready-made geometry instead of transforming and simplifying on every
+request.
+
+The table is built as census_tile_geometry_new and renamed into place at the
+end, so tiles keep being cut from the old table during a rebuild.
+"""
+import sys
+
+from sqlalchemy import text
+
+from ..api import app, db, allowed_tiger, TILE_GEOMETRY_BANDS, METERS_PER_PIXEL_Z0
+from .staging import drop_staging_table, staging_table, swap_in_staging_table
+
+
+def band_tolerance(max_zoom):
+    # Half a pixel at the most detailed zoom of the band is invisible on the map
+    return METERS_PER_PIXEL_Z0 / 2 ** max_zoom / 2
+
+
+def build_tile_geometry(release):
+    band_columns = []
+    for (max_zoom, column) in TILE_GEOMETRY_BANDS:
+        if max_zoom is None:
+            band_columns.append('geom_3857 AS %s' % column)
+        else:
+            band_columns.append('ST_SimplifyPreserveTopology(geom_3857, %f) AS %s' % (band_tolerance(max_zoom), column))
+
+    table = staging_table('census_tile_geometry')
+    statements = [
+        """CREATE TABLE %s.%s AS
+           SELECT full_geoid, sumlevel, display_name, %s
+           FROM (
+               SELECT full_geoid, sumlevel, display_name, ST_Transform(geom, 3857) AS geom_3857
+               FROM %s.census_name_lookup
+               WHERE geom IS NOT NULL
+           ) projected;""" % (release, table, ',\n                  '.join(band_columns), release),
+        "CREATE INDEX ON %s.%s (sumlevel);" % (release, table),
+    ]
+    for (max_zoom, column) in TILE_GEOMETRY_BANDS:
+        statements.append("CREATE INDEX ON %s.%s USING GIST (%s);" % (release, table, column))
+    statements.append("ANALYZE %s.%s;" % (release, table))
+
+    with app.app_context():
+        drop_staging_table(db, release, 'census_tile_geometry')
+        for statement in statements:
+            print(statement.split('\n')[0])
+            db.session.execute(text(statement))
+        swap_in_staging_table(db, release, 'census_tile_geometry')
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.build_tile_geometry [RELEASE]
+    RELEASE defaults to the newest allowed TIGER release, e.g. tiger2024.
+    """
+    release = sys.argv[1] if len(sys.argv) > 1 else allowed_tiger[0]
+    if release not in allowed_tiger:
+        print('\nUnknown TIGER release %s\n' % release)
+        exit()
+    build_tile_geometry(release)
@@ -0,0 +1,137 @@
+"""Render the vector tile pyramid for one or more summary levels into MBTiles files.
+
+The tiles are rendered with the same query geo_tiles uses on a cache miss, so a
+pyramid is a drop-in replacement for the PostGIS path. geo_tiles serves from
+these files when TILE_PYRAMID_DIR is configured.
+
+Tiles that the sumlevel's coverage mask (see build_tile_coverage) marks as
+empty aren't rendered or stored; like any tile missing from a finished
+pyramid, geo_tiles answers them as empty. Build the masks first, or every
+tile in the sumlevel's bounding box is rendered.
+
+Each file is built beside its destination and renamed into place when it's
+finished, so a rebuild replaces the old pyramid outright (no stale tiles or
+metadata), and an interrupted build leaves the old one alone. API processes
+that already opened the old file keep serving it until they restart.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+from timeit import default_timer as timer
+
+from sqlalchemy import text
+
+from ..api import app, db, allowed_tiger, create_mvt_result, get_tile_coverage, SUMLEV_NAMES
+from ..tile_store import MBTilesWriter, pyramid_path, tiles_for_bounds
+
+
+def _init_worker():
+    # Forked workers must not share the parent's pooled connections.
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def _render(job):
+    (release, sumlevel, tile) = job
+    with app.app_context():
+        return tile, create_mvt_result(release, sumlevel, tile)
+
+
+def sumlevel_bounds(release, sumlevel):
+    with app.app_context():
+        row = db.session.execute(text(
+            """SELECT ST_XMin(ext), ST_YMin(ext), ST_XMax(ext), ST_YMax(ext)
+               FROM (SELECT ST_Extent(geom) AS ext
+                     FROM %s.census_name_lookup
+                     WHERE sumlevel=:sumlev) extent""" % (release,)),
+            {'sumlev': sumlevel}
+        ).fetchone()
+    if row is None or row[0] is None:
+        return None
+    return tuple(row)
+
+
+def sumlevel_coverage(release, sumlevel):
+    with app.app_context():
+        return get_tile_coverage(release).get(sumlevel)
+
+
+def covered_tiles(bounds, zoom, coverage):
+    """Tiles in the bounds that any feature could appear in."""
+    for tile in tiles_for_bounds(bounds, zoom):
+        if coverage is None or coverage.covers(*tile):
+            yield tile
+
+
+def build_pyramid(release, sumlevel, minzoom, maxzoom, out_dir, processes):
+    bounds = sumlevel_bounds(release, sumlevel)
+    if bounds is None:
+        print('%s %s: no geometries, skipping' % (release, sumlevel))
+        return
+    coverage = sumlevel_coverage(release, sumlevel)
+    if coverage is None:
+        print('%s %s: no coverage mask, rendering every tile in the bounds' % (release, sumlevel))
+
+    path = pyramid_path(out_dir, release, sumlevel)
+    build_path = path + '.building'
+    if os.path.exists(build_path):
+        os.remove(build_path)
+    writer = MBTilesWriter(build_path)
+    writer.set_metadata(
+        name='%s %s' % (release, SUMLEV_NAMES[sumlevel]['plural']),
+        format='pbf',
+        bounds=','.join(str(b) for b in bounds),
+    )
+
+    start = timer()
+    rendered = 0
+    stored = 0
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        for zoom in range(minzoom, maxzoom + 1):
+            jobs = ((release, sumlevel, tile) for tile in covered_tiles(bounds, zoom, coverage))
+            for (tile, data) in pool.imap_unordered(_render, jobs, chunksize=16):
+                rendered += 1
+                if data:
+                    writer.put(*tile, data)
+                    stored += 1
+                if rendered % 1000 == 0:
+                    writer.commit()
+                    print('%s %s: z%s, %s tiles rendered, %s stored' % (release, sumlevel, zoom, rendered, stored))
+
+    # Written last: a pyramid with a zoom range is complete, so geo_tiles can
+    # treat tiles missing from it as empty instead of asking PostGIS.
+    writer.set_metadata(minzoom=minzoom, maxzoom=maxzoom)
+    writer.close()
+    os.replace(build_path, path)
+    print('%s %s: done, %s tiles rendered, %s stored in %.1fs -> %s' % (
+        release, sumlevel, rendered, stored, timer() - start, path))
+
+
+def main(argv):
+    tiled_sumlevels = [s for s, names in SUMLEV_NAMES.items() if 'tiger_table' in names and s != '010']
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('out_dir', help='directory to write <release>/<sumlevel>.mbtiles into')
+    parser.add_argument('--release', default=allowed_tiger[0], choices=allowed_tiger)
+    parser.add_argument('--sumlevels', default=','.join(tiled_sumlevels),
+                        help='comma-separated summary levels (default: all with TIGER tables)')
+    parser.add_argument('--minzoom', type=int, default=0)
+    parser.add_argument('--maxzoom', type=int, default=12)
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args(argv)
+
+    for sumlevel in args.sumlevels.split(','):
+        if sumlevel not in tiled_sumlevels:
+            print('Unknown or untiled sumlevel %s, skipping' % sumlevel)
+            continue
+        build_pyramid(args.release, sumlevel, args.minzoom, args.maxzoom, args.out_dir, args.processes)
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.build_tile_pyramid [--release tiger2024]
+            [--sumlevels 050,140] [--minzoom 0] [--maxzoom 12] [--processes 8] OUT_DIR
+    Then point TILE_PYRAMID_DIR at OUT_DIR.
+    """
+    main(sys.argv[1:])
@@ -0,0 +1,112 @@
+"""Warm the tile cache after a deploy or release swap.
+
+Tiles to render come either from gzipped nginx access logs of the API (the most
+requested tiles first) or from an explicit bbox, zoom range and summary level
+list. Each tile is requested through the app itself, so it lands in the
+configured cache under the same key geo_tiles uses; this only helps with a
+shared cache backend such as Redis.
+"""
+import argparse
+import gzip
+import multiprocessing
+import re
+import sys
+from collections import Counter
+from timeit import default_timer as timer
+
+from ..api import app, db
+from ..tile_store import tiles_for_bounds
+from .update_table_priorities import log_rx
+
+tile_rx = re.compile(r'^/1\.0/geo/[^/]+/tiles/\d{3}/\d+/\d+/\d+\.(?:mvt|geojson)(?:\?.*)?$')
+
+
+def count_logged_tiles(log_files):
+    counts = Counter()
+    for fn in log_files:
+        print('Reading log file: %s' % fn)
+        with gzip.open(fn, 'rt') as f:
+            for line in f:
+                m = log_rx.search(line)
+                if m is None or m.group('status') != '200':
+                    continue
+                req = m.group('req').split()
+                if len(req) < 2 or req[0] != 'GET':
+                    continue
+                if tile_rx.match(req[1]):
+                    counts[req[1]] += 1
+    return counts
+
+
+def bbox_tile_paths(release, sumlevels, bounds, minzoom, maxzoom, extension):
+    for sumlevel in sumlevels:
+        for zoom in range(minzoom, maxzoom + 1):
+            for (z, x, y) in tiles_for_bounds(bounds, zoom):
+                yield '/1.0/geo/%s/tiles/%s/%s/%s/%s.%s' % (release, sumlevel, z, x, y, extension)
+
+
+def _init_worker():
+    # Forked workers must not share the parent's pooled connections.
+    with app.app_context():
+        db.engine.dispose(close=False)
+
+
+def _seed(path):
+    with app.test_client() as client:
+        return path, client.get(path).status_code
+
+
+def seed(paths, processes):
+    start = timer()
+    done = 0
+    failed = 0
+    with multiprocessing.Pool(processes, initializer=_init_worker) as pool:
+        for (path, status) in pool.imap_unordered(_seed, paths, chunksize=8):
+            done += 1
+            if status != 200:
+                failed += 1
+                print('%s returned %s' % (path, status))
+            if done % 500 == 0:
+                print('%s tiles seeded (%.1f/s)' % (done, done / (timer() - start)))
+    print('Seeded %s tiles in %.1fs, %s failed' % (done, timer() - start, failed))
+
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('logs', nargs='*', help='gzipped nginx access logs to take the most requested tiles from')
+    parser.add_argument('--top', type=int, default=10000, help='how many of the most requested logged tiles to seed')
+    parser.add_argument('--bbox', help='minx,miny,maxx,maxy in degrees; seed every tile inside instead of reading logs')
+    parser.add_argument('--zooms', default='0-10', help='zoom range for --bbox, e.g. 4-10')
+    parser.add_argument('--sumlevels', default='040,050,140,160', help='comma-separated summary levels for --bbox')
+    parser.add_argument('--release', default='latest', help='TIGER release for --bbox')
+    parser.add_argument('--extension', default='mvt', choices=['mvt', 'geojson'])
+    parser.add_argument('--processes', type=int, default=multiprocessing.cpu_count())
+    args = parser.parse_args(argv)
+
+    if args.bbox:
+        bounds = tuple(float(b) for b in args.bbox.split(','))
+        (minzoom, maxzoom) = (int(z) for z in args.zooms.split('-'))
+        paths = list(bbox_tile_paths(args.release, args.sumlevels.split(','), bounds, minzoom, maxzoom, args.extension))
+        print('%s tiles in the bbox' % len(paths))
+    elif args.logs:
+        counts = count_logged_tiles(args.logs)
+        total = sum(counts.values())
+        top = counts.most_common(args.top)
+        paths = [path for (path, count) in top]
+        covered = sum(count for (path, count) in top)
+        print('%s distinct tiles in %s logged tile requests; the top %s cover %.1f%% of requests' % (
+            len(counts), total, len(paths), 100.0 * covered / total if total else 0))
+    else:
+        parser.error('give either log files or --bbox')
+
+    seed(paths, args.processes)
+
+
+if __name__ == '__main__':
+    """Usage:
+        python -m census_extractomatic.tools.seed_tiles [--top 10000] /var/log/nginx/api.censusreporter.org.access.log*gz
+        python -m census_extractomatic.tools.seed_tiles --bbox -125,24,-66,50 --zooms 4-8 --sumlevels 050,140
+    """
+    # like update_table_priorities, run this on the server with the Production config, e.g.
+    # EXTRACTOMATIC_CONFIG_MODULE=census_extractomatic.config.Production python -m census_extractomatic.tools.seed_tiles ...
+    main(sys.argv[1:])
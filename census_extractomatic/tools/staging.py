@@ -0,0 +1,24 @@
+"""Build a release table under a staging name and swap it in when it's done.
+
+The API keeps reading the old table while the new one is built; the swap is
+one short transaction, so requests only wait for the rename.
+"""
+from sqlalchemy import text
+
+
+def staging_table(table):
+    return '%s_new' % table
+
+
+def drop_staging_table(db, release, table):
+    """Drop a staging table left behind by an earlier, interrupted build."""
+    db.session.execute(text("DROP TABLE IF EXISTS %s.%s;" % (release, staging_table(table))))
+    db.session.commit()
+
+
+def swap_in_staging_table(db, release, table):
+    """Replace <release>.<table> with its finished staging table."""
+    db.session.commit()
+    db.session.execute(text("DROP TABLE IF EXISTS %s.%s;" % (release, table)))
+    db.session.execute(text("ALTER TABLE %s.%s RENAME TO %s;" % (release, staging_table(table), table)))
+    db.session.commit()
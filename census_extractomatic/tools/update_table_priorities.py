@@ -117,7 +117,9 @@ def populate():
             value = sum([ normalized_counts.get(t, 0) for t in tables ])
             print('Updating tabulation: %s, text6=%s' % (tabulation, value))
             db.session.execute(
-                text("""UPDATE search_metadata set text6=:value where text1=:tabulation"""),
+                text("""UPDATE search_metadata
+                        set text6=:value, priority=:value, static_score=:value / 100.0 * 2
+                        where text1=:tabulation"""),
                 { 'value': value, 'tabulation': tabulation })
             db.session.commit()
 
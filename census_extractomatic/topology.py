@@ -0,0 +1,234 @@
+"""Encode GeoJSON polygon features as TopoJSON.
+
+Adjacent geographies share their borders, so a GeoJSON FeatureCollection of
+neighbouring tracts or counties carries every shared border twice. A TopoJSON
+topology stores each border once, as an arc referenced by the polygons on both
+sides, with coordinates quantized to an integer grid and delta-encoded. See
+https://github.com/topojson/topojson-specification.
+
+Borders are only shared where the quantized points match exactly, so the
+input must not have been simplified feature by feature: each feature drops
+different vertices from a common border, and then no arcs are shared. Give
+the features' full geometries (or geometries whose vertices were snapped to a
+common grid) and a ``simplify`` tolerance; arcs are simplified once, after
+they are extracted, so both neighbours of a border get the same simplified
+border.
+
+No database or Flask dependency, so it can be unit-tested in isolation.
+"""
+
+DEFAULT_QUANTIZE = 100000
+
+
+def geometry_polygons(geometry):
+    """The list of polygons (each a list of rings) in a GeoJSON geometry."""
+    if geometry['type'] == 'Polygon':
+        return [geometry['coordinates']]
+    if geometry['type'] == 'MultiPolygon':
+        return geometry['coordinates']
+    raise ValueError('Unsupported geometry type %s' % geometry['type'])
+
+
+def bounds(features):
+    xs = []
+    ys = []
+    for feature in features:
+        if not feature.get('geometry'):
+            continue
+        for polygon in geometry_polygons(feature['geometry']):
+            for ring in polygon:
+                xs.extend(p[0] for p in ring)
+                ys.extend(p[1] for p in ring)
+    if not xs:
+        return None
+    return (min(xs), min(ys), max(xs), max(ys))
+
+
+def quantize_ring(ring, translate, scale):
+    (x0, y0) = translate
+    (kx, ky) = scale
+    points = []
+    for (x, y) in ((p[0], p[1]) for p in ring):
+        point = (int(round((x - x0) / kx)), int(round((y - y0) / ky)))
+        if not points or point != points[-1]:
+            points.append(point)
+    if len(points) < 2 or points[0] != points[-1]:
+        points.append(points[0])
+    return points
+
+
+def find_junctions(rings):
+    """Points where rings meet with different neighbours; shared borders
+    start and end at these."""
+    neighbours = {}
+    junctions = set()
+    for ring in rings:
+        # rings are closed, so the last point repeats the first
+        size = len(ring) - 1
+        for i in range(size):
+            pair = tuple(sorted((ring[i - 1] if i else ring[size - 1], ring[i + 1])))
+            seen = neighbours.setdefault(ring[i], pair)
+            if seen != pair:
+                junctions.add(ring[i])
+    return junctions
+
+
+class ArcIndex(object):
+    """Deduplicating list of arcs. An arc already stored in the other
+    direction is referenced by its one's complement, per the spec."""
+
+    def __init__(self):
+        self.arcs = []
+        self.index = {}
+
+    def add(self, points):
+        key = tuple(points)
+        if key in self.index:
+            return self.index[key]
+        reversed_key = key[::-1]
+        if reversed_key in self.index:
+            return ~self.index[reversed_key]
+        self.index[key] = len(self.arcs)
+        self.arcs.append(points)
+        return self.index[key]
+
+    def simplify(self, tolerance, scale):
+        """Douglas-Peucker simplify every arc to within ``tolerance``, in
+        input units; ``scale`` converts grid units to input units. Arc ends,
+        where borders meet, are kept."""
+        self.arcs = [simplify_arc(arc, tolerance, scale) for arc in self.arcs]
+
+    def encoded(self):
+        encoded = []
+        for arc in self.arcs:
+            (px, py) = arc[0]
+            deltas = [[px, py]]
+            for (x, y) in arc[1:]:
+                deltas.append([x - px, y - py])
+                (px, py) = (x, y)
+            encoded.append(deltas)
+        return encoded
+
+
+def _segment_distance2(point, start, end, scale):
+    """Squared distance in input units from a grid point to a segment."""
+    (kx, ky) = scale
+    (px, py) = ((point[0] - start[0]) * kx, (point[1] - start[1]) * ky)
+    (dx, dy) = ((end[0] - start[0]) * kx, (end[1] - start[1]) * ky)
+    length2 = dx * dx + dy * dy
+    if length2:
+        t = max(0.0, min(1.0, (px * dx + py * dy) / length2))
+        (px, py) = (px - t * dx, py - t * dy)
+    return px * px + py * py
+
+
+def _farthest(points, first, last, scale):
+    (farthest, distance2) = (None, -1.0)
+    for i in range(first + 1, last):
+        d2 = _segment_distance2(points[i], points[first], points[last], scale)
+        if d2 > distance2:
+            (farthest, distance2) = (i, d2)
+    return (farthest, distance2)
+
+
+def simplify_arc(points, tolerance, scale):
+    """Douglas-Peucker simplification of one arc, keeping its ends. A closed
+    arc (a whole ring) keeps at least four points so it stays a ring."""
+    if len(points) < 3:
+        return points
+    keep = [False] * len(points)
+    keep[0] = keep[-1] = True
+    tolerance2 = tolerance * tolerance
+    stack = [(0, len(points) - 1)]
+    if points[0] == points[-1]:
+        # split a closed arc at its farthest point from the start
+        far = max(range(1, len(points) - 1), key=lambda i: _segment_distance2(points[i], points[0], points[0], scale))
+        keep[far] = True
+        stack = [(0, far), (far, len(points) - 1)]
+        # and keep the farthest point off that diameter, so it isn't flattened
+        candidates = [_farthest(points, first, last, scale) for (first, last) in stack]
+        (extra, _) = max(candidates, key=lambda candidate: candidate[1])
+        if extra is not None:
+            keep[extra] = True
+            stack = [(0, min(far, extra)), (min(far, extra), max(far, extra)), (max(far, extra), len(points) - 1)]
+    while stack:
+        (first, last) = stack.pop()
+        (farthest, distance2) = _farthest(points, first, last, scale)
+        if farthest is not None and distance2 > tolerance2:
+            keep[farthest] = True
+            stack.append((first, farthest))
+            stack.append((farthest, last))
+    return [point for (point, kept) in zip(points, keep) if kept]
+
+
+def ring_arcs(ring, junctions, arc_index):
+    points = ring[:-1]
+    cuts = [i for (i, point) in enumerate(points) if point in junctions]
+    if not cuts:
+        # a ring shared whole (an enclave) or not at all: start it at its
+        # lowest point so both sides produce the same arc
+        start = points.index(min(points))
+        points = points[start:] + points[:start]
+        return [arc_index.add(points + [points[0]])]
+
+    start = cuts[0]
+    points = points[start:] + points[:start]
+    cuts = [i - start for i in cuts]
+    closed = points + [points[0]]
+    ends = cuts[1:] + [len(points)]
+    return [arc_index.add(closed[begin:end + 1]) for (begin, end) in zip(cuts, ends)]
+
+
+def features_to_topology(features, quantize=DEFAULT_QUANTIZE, object_name='geographies', simplify=None):
+    """Return a TopoJSON Topology dict for GeoJSON features with Polygon,
+    MultiPolygon or null geometries. Each feature's ``id`` and ``properties``
+    are kept on its geometry object. With ``simplify``, a tolerance in the
+    features' coordinate units, arcs are simplified after extraction."""
+    bbox = bounds(features)
+    if bbox is None:
+        bbox = (0, 0, 0, 0)
+    (x0, y0, x1, y1) = bbox
+    translate = (x0, y0)
+    scale = ((x1 - x0) / (quantize - 1) if x1 > x0 else 1, (y1 - y0) / (quantize - 1) if y1 > y0 else 1)
+
+    quantized = []
+    for feature in features:
+        if feature.get('geometry'):
+            polygons = [
+                [quantize_ring(ring, translate, scale) for ring in polygon]
+                for polygon in geometry_polygons(feature['geometry'])
+            ]
+            quantized.append((feature, polygons))
+        else:
+            quantized.append((feature, None))
+
+    junctions = find_junctions(
+        ring for (feature, polygons) in quantized if polygons for polygon in polygons for ring in polygon)
+
+    arc_index = ArcIndex()
+    geometries = []
+    for (feature, polygons) in quantized:
+        if polygons is None:
+            geometry = {'type': None}
+        else:
+            polygon_arcs = [[ring_arcs(ring, junctions, arc_index) for ring in polygon] for polygon in polygons]
+            if feature['geometry']['type'] == 'Polygon':
+                geometry = {'type': 'Polygon', 'arcs': polygon_arcs[0]}
+            else:
+                geometry = {'type': 'MultiPolygon', 'arcs': polygon_arcs}
+        if feature.get('id') is not None:
+            geometry['id'] = feature['id']
+        if feature.get('properties') is not None:
+            geometry['properties'] = feature['properties']
+        geometries.append(geometry)
+
+    if simplify:
+        arc_index.simplify(simplify, scale)
+
+    return {
+        'type': 'Topology',
+        'bbox': list(bbox),
+        'transform': {'scale': list(scale), 'translate': list(translate)},
+        'objects': {object_name: {'type': 'GeometryCollection', 'geometries': geometries}},
+        'arcs': arc_index.encoded(),
+    }
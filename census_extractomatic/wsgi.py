@@ -1,4 +1,6 @@
-from census_extractomatic.api import app as application
+from census_extractomatic.api import app as application, warm_indexes
+
+warm_indexes()
 
 if __name__ == "__main__":
     application.run()
@@ -6,7 +6,11 @@
 -- -- text5: population or tables,
 -- -- text6: priority or NULL
 -- -- type: 'profile' or 'table',
--- -- document
+-- -- document,
+-- -- priority: profile priority or table priority (see update_table_priorities),
+-- -- population: profile population,
+-- -- static_score: the part of the ranking score that doesn't depend on the
+-- --     query, i.e. all of it for profiles and the priority part for tables
 -- by pulling information about profiles (subquery before the UNION)
 -- and about tables (subquery after the UNION). This creates just one metadata
 -- table with all of the information we (currently) need for search.
@@ -23,7 +27,18 @@ CREATE TABLE search_metadata AS (
            CAST(population as text) as text5,
            CAST(priority as text) as text6,
            'profile' AS type,
-           document AS document -- add conditional and document || to tsvector
+           document AS document, -- add conditional and document || to tsvector
+           CAST(priority as integer) AS priority,
+           CAST(population as bigint) AS population,
+           -- Priority runs from 5 (nation) to 320, so map it onto [0, 1]
+           -- over that range; population maps onto [0, 1] by its log
+           -- relative to the US population (318857056), with empty or zero
+           -- populations counted as 1. Priority is weighted more, because
+           -- from testing it gives the most relevant results. Names without
+           -- a priority sort after all others, so they count as the lowest.
+           CAST((1 - (COALESCE(priority, 320) - 5) / 315.0) * 0.8 +
+                (1 + ln(GREATEST(COALESCE(population, 1), 1) / 318857056.0) / ln(318857056.0)) * 0.2
+                as double precision) AS static_score
     FROM (
         SELECT display_name, sumlevel, full_geoid, population, priority,
                setweight(to_tsvector('simple', coalesce(display_name, ' ')), 'A') ||
@@ -85,7 +100,10 @@ CREATE TABLE search_metadata AS (
            CAST(array_to_string(tables, ' ') as text) AS text5,
            NULL AS text6,
            'table' AS type,
-           document as document
+           document as document,
+           CAST(NULL as integer) AS priority,
+           CAST(NULL as bigint) AS population,
+           CAST(0 as double precision) AS static_score
     FROM (
         SELECT tabulation_code, table_title, topics, simple_table_title,
                tables_in_one_yr as tables,
@@ -154,9 +172,18 @@ UPDATE search_metadata SET text3 = 'secondary school district' WHERE text2 = '96
 UPDATE search_metadata SET text3 = 'unified school district' WHERE text2 = '970' AND type = 'profile';
 
 -- Change ownership and add indexes to speed up search.
+--
+-- The GIN index combines the type with the document (btree_gin provides
+-- the GIN operator class for text), so one index scan finds the matching
+-- rows of a type. The btree indexes follow the ORDER BY of each search in
+-- census_extractomatic/full_text_search.py, so for common terms the planner
+-- can instead walk them in order and stop at the LIMIT.
 
+CREATE EXTENSION IF NOT EXISTS btree_gin;
 CREATE INDEX ON search_metadata (type);
-CREATE INDEX ON search_metadata USING GIN(document);
+CREATE INDEX ON search_metadata USING GIN(type, document);
+CREATE INDEX ON search_metadata (type, priority, population DESC);
+CREATE INDEX ON search_metadata (type, priority DESC);
 
 -- Synonym support
 UPDATE search_metadata SET document = document || to_tsvector('simple', coalesce('saint', ' ')) WHERE text1 LIKE '%St.%' AND type = 'profile';
@@ -187,4 +214,6 @@ UPDATE search_metadata
       AND search_metadata.text4 = g.geoid
       AND g.stusab = st.stusps;
 
+ANALYZE search_metadata;
+
 COMMIT;